@@ -0,0 +1,386 @@
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".aac", ".flac", ".ogg", ".opus", ".wma", ".mp4")
+
+
+# ----------------------------------------------------
+# Inputs
+# ----------------------------------------------------
+def expand_inputs(inputs):
+    """Directories (recursive), globs and plain paths → sorted unique audio files."""
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                files.update(os.path.join(root, n) for n in names if n.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            matches = glob.glob(item, recursive=True) or ([item] if os.path.exists(item) else [])
+            files.update(m for m in matches if os.path.isfile(m))
+    return sorted(os.path.abspath(f) for f in files)
+
+
+# ----------------------------------------------------
+# Streaming decode + resample
+# ----------------------------------------------------
+class StreamingResampler:
+    """
+    Polyphase resampling of a stream in fixed-size pieces (overlap-save).
+
+    Each piece is resampled with `context` input samples of real audio on
+    both sides and only the middle is kept, so piece boundaries leave no
+    filter edge artefacts. Piece and context sizes are multiples of the
+    decimation factor, which keeps output samples exactly aligned.
+    """
+
+    def __init__(self, orig_rate, target_rate=SAMPLE_RATE, piece_seconds=10.0, context=1024):
+        g = math.gcd(orig_rate, target_rate)
+        self.up, self.down = target_rate // g, orig_rate // g
+        self.piece = self.down * max(1, int(piece_seconds * orig_rate) // self.down)
+        self.context = self.down * -(-context // self.down)
+        self._pending = np.empty(0, dtype=np.float32)
+        self._left = np.empty(0, dtype=np.float32)
+
+    def feed(self, samples):
+        if self.up == self.down:
+            yield samples
+            return
+        self._pending = np.concatenate([self._pending, samples])
+        while len(self._pending) >= self.piece + self.context:
+            yield self._emit(self.piece, final=False)
+
+    def flush(self):
+        if self.up == self.down or not len(self._pending):
+            return
+        yield self._emit(len(self._pending), final=True)
+
+    def _emit(self, n, final):
+        from scipy.signal import resample_poly
+
+        right = 0 if final else self.context
+        block = np.concatenate([self._left, self._pending[:n + right]])
+        out = resample_poly(block, self.up, self.down).astype(np.float32)
+
+        skip = len(self._left) * self.up // self.down
+        keep = -(-n * self.up // self.down)
+        piece = out[skip:skip + keep]
+
+        self._left = self._pending[max(0, n - self.context):n]
+        self._pending = self._pending[n:]
+        return piece
+
+
+def _iter_wav(path, block_frames):
+    with wave.open(path, "rb") as wf:
+        rate, channels, width = wf.getframerate(), wf.getnchannels(), wf.getsampwidth()
+        if width != 2:
+            raise ValueError(f"{path}: only 16-bit WAV is read directly")
+        while True:
+            raw = wf.readframes(block_frames)
+            if not raw:
+                break
+            pcm = np.frombuffer(raw, dtype=np.int16).reshape(-1, channels)
+            yield rate, pcm.mean(axis=1).astype(np.float32) / 32768.0
+
+
+def _iter_av(path):
+    # PyAV ships with faster-whisper; it decodes and resamples frame by frame
+    import av
+
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+    with av.open(path) as container:
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                yield SAMPLE_RATE, out.to_ndarray().reshape(-1).astype(np.float32) / 32768.0
+        for out in resampler.resample(None):
+            yield SAMPLE_RATE, out.to_ndarray().reshape(-1).astype(np.float32) / 32768.0
+
+
+def iter_audio(path, block_seconds=10.0):
+    """16 kHz mono float32 blocks of a file, without decoding it all at once."""
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as wf:
+            rate = wf.getframerate()
+        source = _iter_wav(path, int(block_seconds * rate))
+    else:
+        rate = SAMPLE_RATE
+        source = _iter_av(path)
+
+    resampler = StreamingResampler(rate, SAMPLE_RATE, piece_seconds=block_seconds)
+    for _, samples in source:
+        yield from resampler.feed(samples)
+    yield from resampler.flush()
+
+
+def iter_windows(blocks, window_seconds=300.0, search_seconds=2.0, frame=480):
+    """
+    Group blocks into ~window_seconds pieces for transcribe(), cutting at
+    the quietest 30 ms frame in the last `search_seconds` so words are not
+    split. Yields (offset_seconds, samples).
+    """
+    window = int(window_seconds * SAMPLE_RATE)
+    search = int(search_seconds * SAMPLE_RATE)
+    buffer = np.empty(0, dtype=np.float32)
+    offset = 0
+
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) >= window:
+            tail = buffer[window - search:window]
+            n = len(tail) // frame
+            energy = (tail[:n * frame].reshape(n, frame) ** 2).mean(axis=1)
+            cut = window - search + int(np.argmin(energy)) * frame + frame // 2
+
+            yield offset / SAMPLE_RATE, buffer[:cut]
+            offset += cut
+            buffer = buffer[cut:]
+
+    if len(buffer):
+        yield offset / SAMPLE_RATE, buffer
+
+
+# ----------------------------------------------------
+# SRT
+# ----------------------------------------------------
+def srt_time(seconds):
+    ms = int(round(seconds * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def to_srt(segments):
+    lines = []
+    for i, seg in enumerate(segments, 1):
+        lines += [str(i), f"{srt_time(seg['start'])} --> {srt_time(seg['end'])}", seg["text"], ""]
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------
+# Worker process: one CT2 Whisper model each
+# ----------------------------------------------------
+_worker = {}
+
+
+def _init_worker(model_path, device, compute_type, cpu_threads):
+    # Keep each process to its share of the cores; oversubscription kills scaling
+    os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+
+    from model_registry import get_model
+
+    _worker["model"] = get_model(model_path, device=device, compute_type=compute_type,
+                                 cpu_threads=cpu_threads, num_workers=1)
+
+
+def process_file(path, task="translate", language="ur", beam_size=1, window_seconds=300.0):
+    """Transcribe/translate one file in the worker. Returns a result record."""
+    model = _worker["model"]
+    started = time.perf_counter()
+    segments, duration = [], 0.0
+
+    for offset, samples in iter_windows(iter_audio(path), window_seconds):
+        duration = offset + len(samples) / SAMPLE_RATE
+        parts, _ = model.transcribe(
+            samples,
+            task=task,
+            language=language,
+            beam_size=beam_size,
+            vad_filter=True,
+            condition_on_previous_text=False
+        )
+        for s in parts:
+            text = s.text.strip()
+            if text:
+                segments.append({
+                    "start": round(offset + s.start, 2),
+                    "end": round(offset + s.end, 2),
+                    "text": text
+                })
+
+    wall = time.perf_counter() - started
+    return {
+        "duration": round(duration, 2),
+        "wall": round(wall, 2),
+        "rtf": round(wall / duration, 4) if duration else None,
+        "worker": os.getpid(),
+        "segments": segments
+    }
+
+
+# ----------------------------------------------------
+# Resumable run
+# ----------------------------------------------------
+def _fingerprint(path):
+    st = os.stat(path)
+    return {"file": path, "size": st.st_size, "mtime": int(st.st_mtime)}
+
+
+def load_done(results_path):
+    """Files already finished by an earlier run (same size and mtime)."""
+    done = {}
+    if os.path.exists(results_path):
+        with open(results_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue   # a half-written last line from an interrupted run
+                if "error" not in rec:
+                    done[rec["file"]] = (rec["size"], rec["mtime"])
+    return done
+
+
+def srt_path(out_dir, path, root):
+    rel = os.path.relpath(path, root) if root else os.path.basename(path)
+    return os.path.join(out_dir, os.path.splitext(rel)[0] + ".srt")
+
+
+def translate_files(inputs, out_dir="batch_output", workers=None, threads_per_worker=None,
+                    model_path=None, device=None, compute_type=None, task="translate",
+                    language="ur", beam_size=1, window_seconds=300.0, on_result=None):
+    """
+    Translate every audio file under `inputs` with a pool of processes.
+
+    Each file gets an .srt in out_dir and one line in out_dir/results.jsonl.
+    Files already listed there (unchanged since) are skipped, so an
+    interrupted run picks up where it stopped. Returns the run summary.
+    """
+    from translator import COMPUTE_TYPE, DEVICE, MODEL_PATH
+
+    model_path = model_path or MODEL_PATH
+    device = device or DEVICE
+    compute_type = compute_type or COMPUTE_TYPE
+
+    cores = os.cpu_count() or 1
+    workers = workers or max(1, cores // (threads_per_worker or 2))
+    threads_per_worker = threads_per_worker or max(1, cores // workers)
+
+    os.makedirs(out_dir, exist_ok=True)
+    results_path = os.path.join(out_dir, "results.jsonl")
+    done = load_done(results_path)
+
+    files = expand_inputs(inputs)
+    root = os.path.commonpath(files) if len(files) > 1 else None
+    todo = []
+    for path in files:
+        fp = _fingerprint(path)
+        if done.get(path) != (fp["size"], fp["mtime"]):
+            todo.append(path)
+
+    # Longest first, so one big file doesn't finish alone at the end
+    todo.sort(key=os.path.getsize, reverse=True)
+
+    print(f"📂 {len(files)} files, {len(files) - len(todo)} already done, "
+          f"{len(todo)} to go on {workers} workers × {threads_per_worker} threads")
+
+    total_audio = total_compute = 0.0
+    finished = failed = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(model_path, device, compute_type, threads_per_worker)
+    ) as pool, open(results_path, "a", encoding="utf-8") as results:
+
+        futures = {
+            pool.submit(process_file, path, task, language, beam_size, window_seconds): path
+            for path in todo
+        }
+
+        for future in as_completed(futures):
+            path = futures[future]
+            record = _fingerprint(path)
+            try:
+                record.update(future.result())
+                out = srt_path(out_dir, path, root)
+                os.makedirs(os.path.dirname(out), exist_ok=True)
+                with open(out + ".tmp", "w", encoding="utf-8") as f:
+                    f.write(to_srt(record["segments"]))
+                os.replace(out + ".tmp", out)
+                record["srt"] = out
+
+                finished += 1
+                total_audio += record["duration"]
+                total_compute += record["wall"]
+                print(f"✔ {os.path.basename(path)}: {record['duration']:.0f}s in {record['wall']:.1f}s "
+                      f"(RTF {record['rtf']}) [{finished + failed}/{len(todo)}]")
+            except Exception as e:
+                record["error"] = str(e)
+                failed += 1
+                print(f"❌ {os.path.basename(path)}: {e}")
+
+            # One line per file, flushed, so a crash loses at most the file in flight
+            results.write(json.dumps(record, ensure_ascii=False) + "\n")
+            results.flush()
+
+            if on_result:
+                on_result(record)
+
+    wall = time.perf_counter() - started
+    summary = {
+        "files": finished,
+        "failed": failed,
+        "skipped": len(files) - len(todo),
+        "workers": workers,
+        "threads_per_worker": threads_per_worker,
+        "audio_s": round(total_audio, 1),
+        "wall_s": round(wall, 1),
+        "rtf": round(wall / total_audio, 4) if total_audio else None,
+        "speedup_x": round(total_audio / wall, 1) if wall else None,
+        "files_per_hour": round(finished / wall * 3600, 1) if wall else None,
+        "worker_rtf": round(total_compute / total_audio, 4) if total_audio else None
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch Urdu → English for recorded bulletins (Whisper)")
+    parser.add_argument("inputs", nargs="+", help="audio files, directories or globs (quote them)")
+    parser.add_argument("--out", default="batch_output", help="output folder (SRT + results.jsonl)")
+    parser.add_argument("--workers", type=int, help="processes, each with its own model")
+    parser.add_argument("--threads", type=int, help="CTranslate2 threads per worker")
+    parser.add_argument("--model", help="Whisper model path (default WHISPER_MODEL_PATH)")
+    parser.add_argument("--compute-type", help="e.g. int8 (default WHISPER_COMPUTE_TYPE)")
+    parser.add_argument("--task", default="translate", choices=["translate", "transcribe"])
+    parser.add_argument("--beam-size", type=int, default=1)
+    parser.add_argument("--window", type=float, default=300, help="seconds of audio per transcribe() call")
+    args = parser.parse_args()
+
+    summary = translate_files(
+        args.inputs,
+        out_dir=args.out,
+        workers=args.workers,
+        threads_per_worker=args.threads,
+        model_path=args.model,
+        compute_type=args.compute_type,
+        task=args.task,
+        beam_size=args.beam_size,
+        window_seconds=args.window
+    )
+
+    print("\n==========================================")
+    print(f"  {summary['files']} files, {summary['audio_s'] / 3600:.2f} h of audio in {summary['wall_s']:.0f}s")
+    print(f"  RTF {summary['rtf']} ({summary['speedup_x']}x real time), "
+          f"{summary['files_per_hour']} files/hour")
+    if summary["failed"]:
+        print(f"  ⚠ {summary['failed']} failed (rerun to retry them)")
+    print("==========================================")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import argparse
+import time
+
+from nllb_service import MODEL_NAME, NLLBService, TransformersNLLB
+
+# Short news-style Urdu sentences, roughly the length of one ASR utterance
+SENTENCES = [
+    "وزیر اعظم نے آج قومی اسمبلی سے خطاب کیا۔",
+    "ملک میں مہنگائی کی شرح میں کمی دیکھی گئی ہے۔",
+    "کراچی میں آج موسم ابر آلود رہنے کا امکان ہے۔",
+    "حکومت نے نئے ترقیاتی منصوبوں کا اعلان کر دیا۔",
+    "کرکٹ ٹیم اگلے ہفتے دورے پر روانہ ہوگی۔",
+    "اسٹاک مارکیٹ میں آج تیزی کا رجحان رہا۔",
+    "وزارت صحت نے ویکسین مہم شروع کرنے کا فیصلہ کیا ہے۔",
+    "بارشوں کے باعث کئی شہروں میں سیلاب کا خطرہ ہے۔",
+]
+
+
+def run_sequential(translator, sentences):
+    started = time.perf_counter()
+    for sentence in sentences:
+        translator.translate_batch([sentence])
+    return time.perf_counter() - started
+
+
+def run_batched(translator, sentences, max_batch, max_wait):
+    service = NLLBService(translator, max_batch=max_batch, max_wait=max_wait)
+    started = time.perf_counter()
+    futures = [service.submit(sentence) for sentence in sentences]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - started
+    stats = service.stats()
+    service.close()
+    return elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NLLB CPU throughput: per-sentence vs micro-batched")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--batch", type=int, default=16, help="max micro-batch size")
+    parser.add_argument("--wait", type=float, default=0.05, help="max batch wait (s)")
+    parser.add_argument("--repeat", type=int, default=4, help="copies of the sentence set")
+    args = parser.parse_args()
+
+    translator = TransformersNLLB(MODEL_NAME, threads=args.threads)
+    sentences = SENTENCES * args.repeat
+
+    translator.translate_batch(SENTENCES[:2])  # warm-up
+
+    seq = run_sequential(translator, sentences)
+    batched, stats = run_batched(translator, sentences, args.batch, args.wait)
+
+    n = len(sentences)
+    print(f"Sentences:       {n}")
+    print(f"Per-sentence:    {seq:.2f}s  ({n / seq:.2f} sentences/s)")
+    print(f"Micro-batched:   {batched:.2f}s  ({n / batched:.2f} sentences/s, avg batch {stats['avg_batch']})")
+    print(f"Speed-up:        {seq / batched:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
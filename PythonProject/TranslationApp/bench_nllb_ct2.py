@@ -0,0 +1,115 @@
+import argparse
+import json
+import math
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from bench_nllb import SENTENCES
+
+
+# ----------------------------------------------------
+# Child: one backend in its own process (clean peak RSS)
+# ----------------------------------------------------
+def peak_rss_mb():
+    try:
+        import resource
+        # ru_maxrss is KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def run_backend(backend, threads):
+    from nllb_ct2 import load_nllb
+
+    started = time.perf_counter()
+    translator = load_nllb(backend, threads=threads)
+    load_time = time.perf_counter() - started
+
+    translator.translate_batch(SENTENCES[:2])  # warm-up
+
+    latencies, outputs = [], []
+    for sentence in SENTENCES:
+        started = time.perf_counter()
+        outputs += translator.translate_batch([sentence])
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    translator.translate_batch(SENTENCES)
+    batch_time = time.perf_counter() - started
+
+    latencies.sort()
+    print(json.dumps({
+        "backend": backend,
+        "load_s": round(load_time, 2),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 1),
+        "p95_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 1),
+        "batch_sentences_per_s": round(len(SENTENCES) / batch_time, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "outputs": outputs
+    }, ensure_ascii=False))
+
+
+# ----------------------------------------------------
+# BLEU-style agreement (corpus BLEU-4, add-one smoothing)
+# ----------------------------------------------------
+def _ngrams(tokens, n):
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def bleu(hypotheses, references, max_n=4):
+    matches, totals = [0] * max_n, [0] * max_n
+    hyp_len = ref_len = 0
+
+    for hyp, ref in zip(hypotheses, references):
+        h, r = hyp.lower().split(), ref.lower().split()
+        hyp_len += len(h)
+        ref_len += len(r)
+        for n in range(1, max_n + 1):
+            hc, rc = _ngrams(h, n), _ngrams(r, n)
+            matches[n - 1] += sum(min(c, rc[g]) for g, c in hc.items())
+            totals[n - 1] += max(len(h) - n + 1, 0)
+
+    if hyp_len == 0:
+        return 0.0
+    log_precision = sum(math.log((m + 1) / (t + 1)) for m, t in zip(matches, totals)) / max_n
+    brevity = 1.0 if hyp_len > ref_len else math.exp(1 - ref_len / hyp_len)
+    return 100 * brevity * math.exp(log_precision)
+
+
+# ----------------------------------------------------
+# Parent: compare the two backends
+# ----------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="NLLB: transformers vs CTranslate2 int8")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_backend(args.child, args.threads)
+        return
+
+    results = {}
+    for backend in ("transformers", "ct2"):
+        cmd = [sys.executable, __file__, "--child", backend]
+        if args.threads:
+            cmd += ["--threads", str(args.threads)]
+        out = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", check=True)
+        results[backend] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"{'':24}{'transformers':>14}{'ct2 int8':>14}")
+    for key, label in [("load_s", "load (s)"), ("mean_ms", "latency mean (ms)"),
+                       ("p95_ms", "latency p95 (ms)"), ("batch_sentences_per_s", "batch sentences/s"),
+                       ("peak_rss_mb", "peak RSS (MB)")]:
+        print(f"{label:24}{results['transformers'][key]:>14}{results['ct2'][key]:>14}")
+
+    score = bleu(results["ct2"]["outputs"], results["transformers"]["outputs"])
+    print(f"\nBLEU of ct2 against transformers output: {score:.1f}")
+
+
+if __name__ == "__main__":
+    main()
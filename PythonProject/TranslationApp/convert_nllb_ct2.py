@@ -0,0 +1,9 @@
+from ctranslate2.converters import TransformersConverter
+
+from nllb_ct2 import CT2_MODEL_DIR
+from nllb_service import MODEL_NAME
+
+print(f"Converting {MODEL_NAME} to CTranslate2 (int8)...")
+converter = TransformersConverter(MODEL_NAME, copy_files=["sentencepiece.bpe.model"])
+model_dir = converter.convert(CT2_MODEL_DIR, quantization="int8", force=True)
+print("Model converted to:", model_dir)
@@ -1,21 +1,87 @@
-from recorder import record_from_line_in
-from translator import urdu_to_english
+import argparse
 
-def main():
-    print("▶ Play your Urdu video on mobile (AUX connected)...")
-
-    # Record from Line-In
-    audio_file = record_from_line_in(duration=10, device_index=5)
-
-    # Translate
-    print("\n🔄 Translating Urdu → English...\n")
-    translated_text = urdu_to_english(audio_file)
+from model_registry import warm_up
+from recorder import StreamingRecorder, file_stream, record_from_line_in
+from streaming import transcribe_live
+from translator import COMPUTE_TYPE, DEVICE, MODEL_PATH, load_model, urdu_to_english
 
+def print_translation(translated_text):
     print("==========================================")
     print("        📌 English Translation")
     print("==========================================")
     print(translated_text)
     print("==========================================")
 
+def run_blocks(args):
+    while True:
+        # Record from Line-In
+        audio_file = record_from_line_in(duration=args.duration, device_index=args.device)
+
+        # Translate
+        print("\n🔄 Translating Urdu → English...\n")
+        print_translation(urdu_to_english(audio_file))
+
+def run_stream(args):
+    # Gapless capture: each window comes out of the ring buffer, no WAV files
+    factory = file_stream(args.file, speed=args.speed) if args.file else None
+    recorder = StreamingRecorder(window_seconds=args.duration, device_index=args.device,
+                                 stream_factory=factory)
+
+    with recorder:
+        for window in recorder.windows(timeout=args.duration * 3):
+            print("\n🔄 Translating Urdu → English...\n")
+            print_translation(urdu_to_english(window))
+
+    if recorder.overruns:
+        print(f"⚠ Fell behind: {recorder.overruns} window(s) skipped")
+
+def run_live(args):
+    # ~1 s steps: partial English while speaking, final once two passes agree
+    factory = file_stream(args.file, speed=args.speed) if args.file else None
+    # Room for --ring seconds: a slow pass is caught up by the next one,
+    # audio is only lost if the passes fall that far behind
+    recorder = StreamingRecorder(window_seconds=args.step, device_index=args.device,
+                                 n_windows=max(4, int(args.ring / args.step)), stream_factory=factory)
+
+    def on_event(event):
+        if event["type"] == "final":
+            print(f"\r[{event['start']:7.2f}–{event['end']:7.2f}] {event['text']}".ljust(100))
+        else:
+            print(f"\r   … {event['text']}"[:100].ljust(100), end="", flush=True)
+
+    with recorder:
+        transcribe_live(load_model(), recorder, on_event, step_s=args.step)
+
+    if recorder.overruns:
+        print(f"⚠ Fell behind: {recorder.overruns} step(s) of audio skipped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Line-In Urdu → English (Whisper)")
+    parser.add_argument("--device", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per window")
+    parser.add_argument("--stream", action="store_true", help="continuous capture, no WAV files")
+    parser.add_argument("--live", action="store_true", help="streaming Whisper with partial results")
+    parser.add_argument("--step", type=float, default=1.0, help="--live: seconds between passes")
+    parser.add_argument("--ring", type=float, default=30.0, help="--live: seconds of audio buffered")
+    parser.add_argument("--file", help="feed a WAV file instead of the device (implies --stream)")
+    parser.add_argument("--speed", type=float, default=1.0, help="--file playback speed")
+    args = parser.parse_args()
+
+    # Pay the model load once, before the first recording
+    warm_up(MODEL_PATH, device=DEVICE, compute_type=COMPUTE_TYPE)
+
+    print("▶ Play your Urdu video on mobile (AUX connected)...")
+    print("   (Ctrl+C to stop)")
+
+    try:
+        if args.live:
+            run_live(args)
+        elif args.stream or args.file:
+            run_stream(args)
+        else:
+            run_blocks(args)
+    except KeyboardInterrupt:
+        print("\nExiting.")
+
 if __name__ == "__main__":
     main()
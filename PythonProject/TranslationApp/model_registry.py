@@ -0,0 +1,66 @@
+import gc
+import os
+import threading
+import time
+
+import numpy as np
+
+# The faster-whisper (CTranslate2) model that ships in models/
+# (download_ct2_model.py fetches it); the default for every app
+BUNDLED_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+_models = {}
+_lock = threading.Lock()
+
+
+def _key(model_path, device, compute_type):
+    if os.path.isdir(model_path):
+        model_path = os.path.abspath(model_path)
+    return model_path, device, compute_type
+
+
+def get_model(model_path, device="cpu", compute_type="default", **kwargs):
+    """
+    Shared WhisperModel for (model_path, device, compute_type).
+
+    Loaded lazily on first use and then reused by every caller and thread
+    in the process. Extra kwargs (cpu_threads, num_workers) only apply
+    to the first load.
+    """
+    key = _key(model_path, device, compute_type)
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            # Imported here so BUNDLED_MODEL can be read without faster_whisper
+            from faster_whisper import WhisperModel
+
+            print(f"🧠 Loading Whisper model ({model_path}, {device}, {compute_type})...")
+            started = time.time()
+            model = WhisperModel(model_path, device=device, compute_type=compute_type, **kwargs)
+            _models[key] = model
+            print(f"✔ Whisper model loaded in {time.time() - started:.1f}s")
+        return model
+
+
+def warm_up(model_path, device="cpu", compute_type="default", **kwargs):
+    """Load the model and run one second of silence through it."""
+    model = get_model(model_path, device, compute_type, **kwargs)
+    segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), task="translate")
+    list(segments)
+    return model
+
+
+def unload(model_path=None, device="cpu", compute_type="default"):
+    """Drop one model (or all of them with no model_path) and free its memory."""
+    with _lock:
+        if model_path is None:
+            _models.clear()
+        else:
+            _models.pop(_key(model_path, device, compute_type), None)
+    gc.collect()
+
+
+def loaded_models():
+    with _lock:
+        return list(_models)
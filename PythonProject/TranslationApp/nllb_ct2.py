@@ -0,0 +1,67 @@
+import os
+
+from nllb_service import MODEL_NAME, SRC_LANG, TGT_LANG
+
+# Next to this file, whatever the working directory (TranslationApp2 imports it too)
+CT2_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "nllb-200-distilled-600M-ct2")
+
+
+# ----------------------------------------------------
+# CTranslate2 NLLB (int8, CPU)
+# ----------------------------------------------------
+class CT2NLLB:
+    """
+    NLLB on CTranslate2 with int8 weights: same translate_batch() as
+    TransformersNLLB, at a fraction of the memory and latency on CPU.
+
+    The model dir comes from convert_nllb_ct2.py and holds model.bin plus
+    sentencepiece.bpe.model. inter_threads is how many batches can run in
+    parallel; intra_threads is the threads per batch (0 = all cores).
+    """
+
+    name = "ctranslate2"
+
+    def __init__(self, model_dir=CT2_MODEL_DIR, device="cpu", compute_type="int8",
+                 inter_threads=1, intra_threads=0, beam_size=1, max_batch_size=16,
+                 max_length=256):
+        import ctranslate2
+        import sentencepiece as spm
+
+        self.beam_size = beam_size
+        self.max_batch_size = max_batch_size
+        self.max_length = max_length
+        self.translator = ctranslate2.Translator(
+            model_dir,
+            device=device,
+            compute_type=compute_type,
+            inter_threads=inter_threads,
+            intra_threads=intra_threads
+        )
+        self.sp = spm.SentencePieceProcessor(
+            model_file=os.path.join(model_dir, "sentencepiece.bpe.model")
+        )
+
+    def translate_batch(self, sentences):
+        # NLLB input: <lang> pieces </s>; the target is forced to start with <lang>
+        source = [[SRC_LANG] + self.sp.encode(s, out_type=str) + ["</s>"] for s in sentences]
+        results = self.translator.translate_batch(
+            source,
+            target_prefix=[[TGT_LANG]] * len(source),
+            beam_size=self.beam_size,
+            max_batch_size=self.max_batch_size,
+            max_decoding_length=self.max_length
+        )
+        return [self.sp.decode(r.hypotheses[0][1:]) for r in results]
+
+
+def load_nllb(backend="transformers", threads=None, **kwargs):
+    """The NLLB translator named by NLLB_BACKEND (transformers | ct2)."""
+    if backend == "ct2":
+        return CT2NLLB(
+            model_dir=kwargs.pop("model_dir", os.getenv("NLLB_CT2_MODEL", CT2_MODEL_DIR)),
+            intra_threads=threads or 0,
+            **kwargs
+        )
+
+    from nllb_service import TransformersNLLB
+    return TransformersNLLB(MODEL_NAME, threads=threads, **kwargs)
@@ -0,0 +1,175 @@
+import re
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue, Empty
+
+MODEL_NAME = "facebook/nllb-200-distilled-600M"
+SRC_LANG = "urd_Arab"   # Urdu (Arabic script)
+TGT_LANG = "eng_Latn"   # English (Latin script)
+
+_SENTENCE_END = re.compile(r"(?<=[۔؟!?])\s*")
+
+
+def split_sentences(text, max_chars=400):
+    """Split Urdu at sentence ends (۔ ؟ ! ?) so no single input gets too long."""
+    parts = [p.strip() for p in _SENTENCE_END.split(text) if p and p.strip()]
+
+    # No punctuation at all (raw ASR output): fall back to word chunks
+    out = []
+    for part in parts:
+        while len(part) > max_chars:
+            cut = part.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            out.append(part[:cut].strip())
+            part = part[cut:].strip()
+        if part:
+            out.append(part)
+    return out
+
+
+# ----------------------------------------------------
+# Transformers NLLB (full precision, PyTorch)
+# ----------------------------------------------------
+class TransformersNLLB:
+    """translate_batch(list of Urdu sentences) -> list of English strings."""
+
+    name = "transformers"
+
+    def __init__(self, model_name=MODEL_NAME, threads=None, num_beams=1, max_length=256):
+        import torch
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+        self.torch = torch
+        if threads:
+            torch.set_num_threads(threads)
+
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.num_beams = num_beams
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, src_lang=SRC_LANG)
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name).to(self.device).eval()
+        self.target_id = self.tokenizer.convert_tokens_to_ids(TGT_LANG)
+
+    def translate_batch(self, sentences):
+        with self.torch.inference_mode():
+            inputs = self.tokenizer(
+                sentences, return_tensors="pt", padding=True,
+                truncation=True, max_length=self.max_length
+            ).to(self.device)
+            output = self.model.generate(
+                **inputs,
+                forced_bos_token_id=self.target_id,
+                num_beams=self.num_beams,
+                max_new_tokens=self.max_length
+            )
+        return self.tokenizer.batch_decode(output, skip_special_tokens=True)
+
+
+# ----------------------------------------------------
+# Micro-batching service
+# ----------------------------------------------------
+class NLLBService:
+    """
+    Collects sentences from many callers into dynamic micro-batches.
+
+    The worker takes the first waiting sentence, then keeps collecting
+    until it has `max_batch` or `max_wait` seconds have passed, and runs
+    them through translate_batch() in one forward pass. Sentences are
+    sorted by length inside a batch to keep padding small. submit() splits
+    the input at sentence boundaries and resolves once all parts are back.
+    """
+
+    def __init__(self, translator, max_batch=16, max_wait=0.05):
+        self.translator = translator
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = Queue()
+        self._stop = threading.Event()
+
+        self.batches = 0
+        self.sentences = 0
+        self.busy_time = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="nllb-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        """Future of the English translation of `text`."""
+        result = Future()
+        sentences = split_sentences(text)
+        if not sentences:
+            result.set_result("")
+            return result
+
+        parts = [None] * len(sentences)
+        remaining = [len(sentences)]
+        lock = threading.Lock()
+
+        def done(index, english):
+            with lock:
+                parts[index] = english
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                result.set_result(" ".join(parts))
+
+        for i, sentence in enumerate(sentences):
+            self._queue.put((sentence, i, done, result))
+        return result
+
+    def translate(self, text):
+        return self.submit(text).result()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=0.5)
+        except Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+
+            batch.sort(key=lambda job: len(job[0]))
+            started = time.perf_counter()
+            try:
+                english = self.translator.translate_batch([job[0] for job in batch])
+            except Exception as e:
+                for _, _, _, result in batch:
+                    if not result.done():
+                        result.set_exception(e)
+                continue
+
+            self.busy_time += time.perf_counter() - started
+            self.batches += 1
+            self.sentences += len(batch)
+
+            for (_, index, done, _), text in zip(batch, english):
+                done(index, text)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "sentences": self.sentences,
+            "avg_batch": round(self.sentences / self.batches, 2) if self.batches else 0.0,
+            "sentences_per_s": round(self.sentences / self.busy_time, 2) if self.busy_time else 0.0
+        }
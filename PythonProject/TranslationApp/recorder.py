@@ -1,11 +1,20 @@
-import sounddevice as sd
-from scipy.io.wavfile import write
 import datetime
+import threading
+import time
+import wave
+
+import numpy as np
+from scipy.io.wavfile import write
+
+FS = 16000  # Whisper recommended sample rate
+
 
 def record_from_line_in(duration=10, device_index=5):
+    import sounddevice as sd
+
     print(f"🎤 Recording from Line-In (device {device_index})...")
 
-    fs = 16000  # Whisper recommended sample rate
+    fs = FS
 
     audio = sd.rec(
         int(duration * fs),
@@ -21,3 +30,217 @@ def record_from_line_in(duration=10, device_index=5):
 
     print(f"✔ Saved audio: {filename}")
     return filename
+
+
+# ----------------------------------------------------
+# Continuous capture into a ring buffer
+# ----------------------------------------------------
+class StreamingRecorder:
+    """
+    Gapless line-in capture.
+
+    An InputStream callback copies each block into a preallocated
+    float32 ring buffer of `n_windows` windows. windows() yields each
+    completed window as an array, with no temp file, ready for
+    model.transcribe(). Consecutive windows are back-to-back in time.
+
+    The consumer has (n_windows - 1) windows of time to keep up. If it
+    falls further behind, the oldest audio is skipped and counted in
+    `overruns`.
+    """
+
+    def __init__(self, window_seconds=10, device_index=5, fs=FS, n_windows=4,
+                 blocksize=1600, stream_factory=None):
+        self.fs = fs
+        self.device_index = device_index
+        self.blocksize = blocksize
+        self.window = int(window_seconds * fs)
+        self.capacity = self.window * n_windows
+        self.buffer = np.zeros(self.capacity, dtype=np.float32)
+        self.stream_factory = stream_factory
+
+        self.written = 0    # frames received since start
+        self.consumed = 0   # frames handed out as windows
+        self.overruns = 0
+        self.torn = 0       # zero-copy windows overwritten while still in use
+        self.status_errors = 0
+        self._cond = threading.Condition()
+        self._stream = None
+        self._closed = False
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            self.status_errors += 1
+
+        data = indata[:, 0] if indata.ndim > 1 else indata
+        pos = self.written % self.capacity
+        first = min(frames, self.capacity - pos)
+        self.buffer[pos:pos + first] = data[:first]
+        if first < frames:
+            self.buffer[:frames - first] = data[first:frames]
+
+        with self._cond:
+            self.written += frames
+            behind = self.written - self.consumed
+            if behind > self.capacity - self.window:
+                # Reader is too slow: skip whole windows it can no longer get
+                skip = -(-(behind - (self.capacity - self.window)) // self.window) * self.window
+                self.consumed += skip
+                self.overruns += skip // self.window
+            self._cond.notify_all()
+
+    def start(self):
+        if self.stream_factory is None:
+            import sounddevice as sd
+            factory = sd.InputStream
+        else:
+            factory = self.stream_factory
+
+        self._stream = factory(
+            samplerate=self.fs,
+            channels=1,
+            dtype="float32",
+            blocksize=self.blocksize,
+            device=self.device_index,
+            callback=self._callback
+        )
+        self._stream.start()
+        print(f"🎤 Streaming from Line-In (device {self.device_index})...")
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def windows(self, timeout=None, copy=True):
+        """
+        Yield each completed window, as a copy the consumer may keep.
+
+        copy=False yields read-only views into the ring instead, which
+        are only valid until the ring wraps back over them. A view that
+        was overwritten while the consumer still had it (its result is
+        garbage) is counted in `torn` and reported.
+        """
+        held = None     # start frame of the view the consumer has
+        while True:
+            with self._cond:
+                if held is not None and self.written - held > self.capacity:
+                    self.torn += 1
+                    print(f"⚠ Window at {held / self.fs:.1f}s was overwritten while in use "
+                          f"({self.torn} so far); use copy=True or a bigger ring")
+
+                ready = self._cond.wait_for(
+                    lambda: self._closed or self.written - self.consumed >= self.window,
+                    timeout
+                )
+                if not ready or self.written - self.consumed < self.window:
+                    return
+                start = self.consumed % self.capacity
+                window = self.buffer[start:start + self.window]
+                if copy:
+                    # Taken under the lock, before the callback can reach it
+                    window = window.copy()
+                else:
+                    held = self.consumed
+                    window.flags.writeable = False
+                self.consumed += self.window
+
+            yield window
+
+    def read(self, min_frames=1, timeout=None):
+        """
+        Everything captured since the last read as one float32 copy, once
+        at least `min_frames` are ready. A consumer that took longer than
+        usual gets all the audio it missed rather than one window of it.
+        Returns None on timeout, or once stopped with nothing left.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._closed or self.written - self.consumed >= min_frames,
+                timeout
+            )
+            count = self.written - self.consumed
+            if count <= 0 or (count < min_frames and not self._closed):
+                return None
+
+            start = self.consumed % self.capacity
+            first = min(count, self.capacity - start)
+            audio = np.concatenate([self.buffer[start:start + first], self.buffer[:count - first]])
+            self.consumed += count
+            return audio
+
+
+# ----------------------------------------------------
+# File-backed stand-in for sounddevice.InputStream
+# ----------------------------------------------------
+class FileInputStream:
+    """
+    Plays a WAV file into an InputStream-style callback.
+
+    Same constructor/start/stop/close shape as sd.InputStream, so it can
+    be passed as StreamingRecorder(stream_factory=...). `speed` > 1 feeds
+    faster than real time; 0 feeds as fast as possible. When the file
+    ends, `finished` is set.
+    """
+
+    def __init__(self, path, samplerate, channels=1, dtype="float32",
+                 blocksize=1600, device=None, callback=None, speed=1.0):
+        with wave.open(path, "rb") as wf:
+            if wf.getframerate() != samplerate:
+                raise ValueError(f"{path} is {wf.getframerate()} Hz, expected {samplerate} Hz")
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            pcm = pcm.reshape(-1, wf.getnchannels())[:, :channels]
+
+        self.samples = pcm.astype(np.float32) / 32768.0
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.speed = speed
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        started = time.monotonic()
+        for offset in range(0, len(self.samples), self.blocksize):
+            if self._stop.is_set():
+                break
+            block = self.samples[offset:offset + self.blocksize]
+            self.callback(block, len(block), None, None)
+
+            if self.speed > 0:
+                due = started + (offset + len(block)) / self.samplerate / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        self.finished.set()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        pass
+
+
+def file_stream(path, speed=1.0):
+    """stream_factory for StreamingRecorder that reads `path` instead of a device."""
+    def factory(**kwargs):
+        return FileInputStream(path, speed=speed, **kwargs)
+    return factory
@@ -0,0 +1,165 @@
+import re
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def _norm(word):
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+# ----------------------------------------------------
+# Streaming Whisper (local agreement)
+# ----------------------------------------------------
+class StreamingTranscriber:
+    """
+    Near-live Whisper over a rolling window.
+
+    Audio is appended with insert(). Every process() call re-runs the
+    model on the audio since the last commit point (plus `overlap_s` of
+    context) with word timestamps. Words on which two consecutive passes
+    agree (LocalAgreement-2) are committed as final. The rest of the
+    newest pass is returned as a partial hypothesis that may still change.
+
+    Committed audio is dropped from the window, so each pass stays short.
+    If nothing stabilises within `max_window_s`, the current hypothesis
+    is committed anyway to bound latency.
+
+    Events are dicts: {"type": "partial" | "final", "text", "start", "end"}
+    with times in seconds from the start of the stream.
+    """
+
+    def __init__(self, model, task="translate", language="ur", overlap_s=1.0,
+                 max_window_s=15.0, min_chunk_s=1.0, beam_size=1):
+        self.model = model
+        self.task = task
+        self.language = language
+        self.overlap = int(overlap_s * SAMPLE_RATE)
+        self.max_window = int(max_window_s * SAMPLE_RATE)
+        self.min_chunk = int(min_chunk_s * SAMPLE_RATE)
+        self.beam_size = beam_size
+
+        self.audio = np.empty(0, dtype=np.float32)
+        self.offset = 0.0            # stream time of audio[0]
+        self.committed = []          # [(start, end, word)]
+        self.committed_end = 0.0
+        self._previous = []          # uncommitted words from the last pass
+        self._new_samples = 0
+
+    def insert(self, samples):
+        self.audio = np.concatenate([self.audio, np.asarray(samples, dtype=np.float32)])
+        self._new_samples += len(samples)
+
+    def process(self):
+        if self._new_samples < self.min_chunk:
+            return []
+        self._new_samples = 0
+
+        words = self._transcribe()
+        events = []
+
+        # Commit the longest prefix this pass shares with the last one
+        agreed = 0
+        for old, new in zip(self._previous, words):
+            if _norm(old[2]) != _norm(new[2]):
+                break
+            agreed += 1
+
+        if agreed:
+            events.append(self._commit(words[:agreed]))
+        pending = words[agreed:]
+
+        if not agreed and len(self.audio) >= self.max_window and pending:
+            # Nothing is settling; take what we have rather than wait forever
+            events.append(self._commit(pending))
+            pending = []
+
+        self._previous = pending
+        if pending:
+            events.append(self._event("partial", pending))
+
+        self._trim()
+        return events
+
+    def finish(self):
+        """End of stream: everything left becomes final."""
+        self._new_samples = self.min_chunk
+        words = self._transcribe() if len(self.audio) else []
+        self._previous = []
+        return [self._commit(words)] if words else []
+
+    # ---------- internals ----------
+
+    def _transcribe(self):
+        prompt = " ".join(w for _, _, w in self.committed[-30:]) or None
+        segments, _ = self.model.transcribe(
+            self.audio,
+            task=self.task,
+            language=self.language,
+            beam_size=self.beam_size,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+            initial_prompt=prompt
+        )
+
+        words = []
+        for segment in segments:
+            for w in segment.words or []:
+                start, end = self.offset + w.start, self.offset + w.end
+                # Already committed in an earlier window (the overlap)
+                if end <= self.committed_end + 0.05:
+                    continue
+                words.append((start, end, w.word.strip()))
+        return words
+
+    def _commit(self, words):
+        self.committed.extend(words)
+        self.committed_end = words[-1][1]
+        return self._event("final", words)
+
+    def _event(self, kind, words):
+        return {
+            "type": kind,
+            "text": " ".join(w for _, _, w in words),
+            "start": round(words[0][0], 2),
+            "end": round(words[-1][1], 2)
+        }
+
+    def _trim(self):
+        """Drop audio before the last committed word, keeping `overlap` for context."""
+        cut = int((self.committed_end - self.offset) * SAMPLE_RATE) - self.overlap
+        if cut <= 0:
+            return
+        self.audio = self.audio[cut:]
+        self.offset += cut / SAMPLE_RATE
+
+
+def transcribe_live(model, recorder, on_event, step_s=1.0, **kwargs):
+    """
+    Drive a StreamingTranscriber from a StreamingRecorder: a new pass
+    about every step_s seconds. Each pass first takes all the audio that
+    is ready, so after a slow pass the next one covers everything
+    captured meanwhile instead of falling a step further behind. Audio
+    the ring had to drop anyway is reported as it happens.
+    """
+    transcriber = StreamingTranscriber(model, min_chunk_s=step_s, **kwargs)
+    step = int(step_s * recorder.fs)
+    overruns = recorder.overruns
+
+    while True:
+        audio = recorder.read(min_frames=step, timeout=step_s * 5)
+        if audio is None:
+            break
+
+        transcriber.insert(audio)
+        for event in transcriber.process():
+            on_event(event)
+
+        if recorder.overruns > overruns:
+            print(f"\n⚠ Fell behind: {recorder.overruns - overruns} window(s) of audio skipped "
+                  f"({recorder.overruns} total)")
+            overruns = recorder.overruns
+
+    for event in transcriber.finish():
+        on_event(event)
@@ -1,11 +1,15 @@
-from faster_whisper import WhisperModel
+import os
 
-def load_model():
-    print("🧠 Loading Whisper model (small)...")
-    model = WhisperModel("models/small", device="cpu")
+from model_registry import BUNDLED_MODEL, get_model
+
+MODEL_PATH = os.getenv("WHISPER_MODEL_PATH", BUNDLED_MODEL)
+DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "default")
 
-    print("✔ Whisper model loaded")
-    return model
+
+def load_model():
+    # Loaded once per process by the registry, then shared
+    return get_model(MODEL_PATH, device=DEVICE, compute_type=COMPUTE_TYPE)
 
 
 def urdu_to_english(audio_file):
@@ -1,33 +1,44 @@
+import os
+
 import speech_recognition as sr
-from transformers import pipeline
-import torch
 
-def initialize_translator():
+from nllb_ct2 import load_nllb
+from nllb_service import MODEL_NAME, NLLBService
+
+def initialize_translator(threads=None, backend="transformers"):
     """
     Loads the NLLB translator model once.
-    Uses GPU (CUDA) if available, otherwise defaults to CPU.
+    backend="transformers": PyTorch, uses GPU (CUDA) if available, otherwise CPU.
+    backend="ct2": int8 CTranslate2 model on CPU (see convert_nllb_ct2.py).
+    Returns a batching NLLBService (or None if the model can't load).
     """
-    device = 0 if torch.cuda.is_available() else -1
-    model_name = "facebook/nllb-200-distilled-600M"
-    
-    print(f"Loading NLLB translator model ({model_name})...")
-    print(f"Using device: {'GPU (CUDA)' if device == 0 else 'CPU'}")
-    
+    print(f"Loading NLLB translator model ({MODEL_NAME}, {backend})...")
+
     try:
-        translator = pipeline("translation",
-                            model=model_name,
-                            tokenizer=model_name,
-                            device=device)
+        translator = load_nllb(backend, threads=threads)
+        if backend != "ct2":
+            print(f"Using device: {'GPU (CUDA)' if translator.device == 'cuda' else 'CPU'}")
         print("Translator model loaded successfully.")
-        return translator
+        return NLLBService(translator, max_batch=16, max_wait=0.05)
     except Exception as e:
         print(f"Error loading model: {e}")
-        print("Please ensure you have 'transformers', 'torch', and 'sentencepiece' installed.")
+        print("Please ensure you have 'transformers', 'torch', and 'sentencepiece' installed"
+              " (and 'ctranslate2' for the ct2 backend).")
         return None
 
+def print_translation(urdu_text, future):
+    try:
+        print(f"\n[URDU]: {urdu_text}")
+        print(f"[ENGLISH]: {future.result()}")
+    except Exception as e:
+        print(f"Translation failed: {e}")
+
 def main():
     # 1. Initialize models
-    translator = initialize_translator()
+    translator = initialize_translator(
+        threads=int(os.getenv("NLLB_THREADS", 0)) or None,
+        backend=os.getenv("NLLB_BACKEND", "transformers")
+    )
     if translator is None:
         return
 
@@ -35,58 +46,49 @@ def main():
 
     # 2. Main listening loop
     print("\n--- Live Urdu to English Translation (Press Ctrl+C to exit) ---")
-    
-    while True:
-        try:
-            # Use the default microphone as the audio source
-            with sr.Microphone() as source:
+
+    # Open the microphone and calibrate once, not on every utterance
+    with sr.Microphone() as source:
+        recognizer.adjust_for_ambient_noise(source, duration=0.5)
+
+        while True:
+            try:
                 print("\nListening for Urdu speech...")
-                
-                # Adjust for ambient noise to improve recognition
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                
+
                 # Listen for the user's input
                 audio_data = recognizer.listen(source)
 
-            print("Processing audio...")
-
-            # 3. Transcribe audio using Whisper
-            # This uses the local 'large-v3' model.
-            # The first time this runs, it will download the model.
-            urdu_text = recognizer.recognize_whisper(
-                audio_data,
-                model="large-v3",  # <-- This line is updated
-                language="urdu"    # Hinting the language is Urdu
-            )
-
-            print(f"\n[URDU]: {urdu_text}")
-
-            # 4. Translate the text using NLLB
-            # We must provide the correct NLLB language codes
-            # urd_Arab = Urdu (Arabic script)
-            # eng_Latn = English (Latin script)
-            
-            translation_result = translator(
-                urdu_text,
-                src_lang="urd_Arab",
-                tgt_lang="eng_Latn"
-            )
-
-            english_text = translation_result[0]['translation_text']
-            print(f"[ENGLISH]: {english_text}")
-
-        except sr.UnknownValueError:
-            # This error means Whisper couldn't understand the audio
-            print("Whisper could not understand the audio. Please try speaking again.")
-        except sr.RequestError as e:
-            # This error is for API-based recognizers, but good to keep
-            print(f"Could not request results; {e}")
-        except KeyboardInterrupt:
-            print("\nExiting program.")
-            break
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
-            break
+                print("Processing audio...")
+
+                # 3. Transcribe audio using Whisper
+                # This uses the local 'large-v3' model.
+                # The first time this runs, it will download the model.
+                urdu_text = recognizer.recognize_whisper(
+                    audio_data,
+                    model="large-v3",
+                    language="urdu"    # Hinting the language is Urdu
+                )
+
+                # 4. Translate with NLLB in the background: sentences are
+                # batched with anything else waiting, and we go straight
+                # back to listening
+                future = translator.submit(urdu_text)
+                future.add_done_callback(lambda f, text=urdu_text: print_translation(text, f))
+
+            except sr.UnknownValueError:
+                # This error means Whisper couldn't understand the audio
+                print("Whisper could not understand the audio. Please try speaking again.")
+            except sr.RequestError as e:
+                # This error is for API-based recognizers, but good to keep
+                print(f"Could not request results; {e}")
+            except KeyboardInterrupt:
+                print("\nExiting program.")
+                break
+            except Exception as e:
+                print(f"An unexpected error occurred: {e}")
+                break
+
+    translator.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,10 +1,16 @@
 from flask import Flask, jsonify, request, render_template
+import os
 import threading
+import time
+import uuid
 import speech_recognition as sr
 from deep_translator import GoogleTranslator
-import pyodbc
 from queue import Queue
 from bs4 import BeautifulSoup
+import paths  # noqa: F401  (shared modules on sys.path)
+from db import ConnectionPool, SegmentStore, WriteBehindQueue, connect_factory
+from dedupe import NearDuplicateFilter
+from translation_cache import TranslationCache
 
 app = Flask(__name__)
 
@@ -15,21 +21,26 @@ AUDIO_DEVICE_INDEX = 1  # Your working Line-In device
 recognizer = sr.Recognizer()
 translator = GoogleTranslator(source="ur", target="en")
 
+# Repeated utterances are answered from here instead of Google
+translation_cache = TranslationCache(
+    path=os.getenv("TRANSLATION_CACHE", os.path.join(os.path.dirname(__file__), "translation_cache.db"))
+)
+
 # Audio Queue for Continuous Capture
 audio_queue = Queue()
 
 is_running = False
 latest_urdu = ""
 latest_english = ""
-last_transcript = ""   # For duplicate filtering
+latest_seq = 0
+session_id = uuid.uuid4().hex[:12]
+duplicate_filter = NearDuplicateFilter()   # For duplicate filtering
 
 
 # ---------------- 1) CONTINUOUS AUDIO CAPTURE THREAD -------------------
 
 def audio_capture_thread():
     """Continuously capture audio without stopping microphone."""
-    global is_running
-
     print("🎧 Starting continuous audio capture...")
 
     with sr.Microphone(device_index=AUDIO_DEVICE_INDEX) as source:
@@ -39,7 +50,11 @@ def audio_capture_thread():
             try:
                 print("🎙 Listening...")
                 audio = recognizer.listen(source, phrase_time_limit=None)
-                audio_queue.put(audio)  # push audio chunk into queue
+
+                # The phrase just ended; its length gives when the speech started
+                ended = time.time()
+                started = ended - len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+                audio_queue.put((audio, started, ended))  # push audio chunk into queue
 
             except Exception as e:
                 print("❌ Audio Capture Error:", e)
@@ -49,25 +64,34 @@ def audio_capture_thread():
 
 def translation_worker():
     """Process queued audio WITHOUT blocking microphone."""
-    global latest_urdu, latest_english, last_transcript, is_running
+    global latest_urdu, latest_english, latest_seq
 
     while is_running:
-        audio = audio_queue.get()
+        audio, started, ended = audio_queue.get()
 
         try:
             print("📝 Translating...")
-            urdu = recognizer.recognize_google(audio, language="ur-PK")
-            english = translator.translate(urdu)
+            heard = recognizer.recognize_google(audio, language="ur-PK")
 
-            # Duplicate filtering
-            if urdu == last_transcript:
-                print("⚠ Duplicate ignored:", urdu)
+            # Duplicate filtering (before paying for the translation):
+            # near-repeats are dropped, overlap with the last chunk is trimmed
+            urdu = duplicate_filter.filter(heard)
+            if not urdu:
+                print("⚠ Duplicate ignored:", heard)
                 audio_queue.task_done()
                 continue
 
-            last_transcript = urdu
+            english = translation_cache.get_or_compute(
+                urdu, translator.translate, model="google", prompt_version="ur-en"
+            )
+
             latest_urdu = urdu
             latest_english = english
+            latest_seq += 1
+
+            # One row per segment, written in the background
+            if segment_store is not None:
+                segment_store.add(session_id, latest_seq, urdu, english, started=started, ended=ended)
 
             print("✔ Urdu:", urdu)
             print("✔ English:", english)
@@ -82,16 +106,46 @@ def translation_worker():
 
 # ---------------- SQL CONNECTION -------------------
 
-def get_db():
-    return pyodbc.connect(
-        "DRIVER={SQL Server};"
-        "SERVER=khi-webdbs;"
-        "DATABASE=TranslationApp;"
-        "UID=NcUser;"
-        "PWD=New#Contact_DB_user_2003;"
+INSERT_TRANSLATION = """
+    INSERT INTO Translations (UrduText, EnglishText)
+    VALUES (?, ?)
+"""
+
+# DB_URL=sqlite:///translations.db runs against a local SQLite file instead
+db_pool = ConnectionPool(
+    connect_factory(),
+    max_size=int(os.getenv("DB_POOL_SIZE", 5)),
+    max_idle=int(os.getenv("DB_MAX_IDLE", 300))
+)
+
+# DB_WRITE_BEHIND=1: /save returns at once, rows are batched in the background
+db_writer = None
+if os.getenv("DB_WRITE_BEHIND", "0") == "1":
+    db_writer = WriteBehindQueue(
+        db_pool,
+        INSERT_TRANSLATION,
+        batch_size=int(os.getenv("DB_BATCH_SIZE", 50)),
+        flush_interval=float(os.getenv("DB_FLUSH_SECONDS", 2)),
+        spool_path=os.path.join(os.path.dirname(__file__), "db_spool.jsonl")
+    )
+
+
+# SAVE_SEGMENTS=0 turns off per-segment rows (only /save writes then)
+segment_store = None
+if os.getenv("SAVE_SEGMENTS", "1") == "1":
+    segment_store = SegmentStore(
+        db_pool,
+        batch_size=int(os.getenv("DB_BATCH_SIZE", 50)),
+        flush_interval=float(os.getenv("DB_FLUSH_SECONDS", 2)),
+        spool_path=os.path.join(os.path.dirname(__file__), "segments_spool.jsonl")
     )
 
 
+def get_db():
+    """Pooled connection; use as `with get_db() as conn:`."""
+    return db_pool.connection()
+
+
 # ---------------- ROUTES -------------------
 
 @app.route("/")
@@ -102,13 +156,15 @@ def index():
 @app.get("/start")
 def start_translation():
     """Start audio capture + translation threads."""
-    global is_running
+    global is_running, session_id, latest_seq
     is_running = True
+    session_id = uuid.uuid4().hex[:12]
+    latest_seq = 0
 
     threading.Thread(target=audio_capture_thread, daemon=True).start()
 
     threading.Thread(target=translation_worker, daemon=True).start()
-    return jsonify({"status": "started"})
+    return jsonify({"status": "started", "session": session_id})
 
 
 @app.get("/stop")
@@ -124,7 +180,12 @@ def get_latest():
     """Send latest Urdu & English to UI."""
     global latest_urdu, latest_english
 
-    data = {"urdu": latest_urdu, "english": latest_english}
+    data = {
+        "urdu": latest_urdu,
+        "english": latest_english,
+        "session": session_id,
+        "seq": latest_seq
+    }
 
     # Clear after sending
     latest_urdu = ""
@@ -135,9 +196,37 @@ def get_latest():
 
 # ---------------- SAVE TO DATABASE (PARSE EDITOR TEXT) -------------------
 
+def valid_edit(edit):
+    return (isinstance(edit, dict)
+            and isinstance(edit.get("seq"), int) and not isinstance(edit["seq"], bool)
+            and isinstance(edit.get("english"), str))
+
+
 @app.post("/save")
 def save_to_db():
-    editor_html = request.json["editor"]
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "expected a JSON object"}), 400
+
+    # Segment edits: {"session": "...", "edits": [{"seq": 3, "english": "..."}]}
+    if "edits" in body:
+        edits = body["edits"]
+        if not isinstance(body.get("session"), str) or not isinstance(edits, list):
+            return jsonify({"error": "edits need a \"session\" and a list of edits"}), 400
+        if not all(valid_edit(e) for e in edits):
+            return jsonify({"error": "every edit needs an integer \"seq\" and an \"english\" string"}), 400
+        if segment_store is None:
+            return jsonify({"error": "segment storage is off (SAVE_SEGMENTS=0)"}), 400
+
+        missing = segment_store.save_edits(body["session"], edits)
+        return jsonify({
+            "saved": len(edits) - len(missing),
+            "missing": missing
+        })
+
+    editor_html = body.get("editor")
+    if not isinstance(editor_html, str):
+        return jsonify({"error": "expected \"edits\" or \"editor\""}), 400
 
     soup = BeautifulSoup(editor_html, "html.parser")
     editor_text = soup.get_text("\n")
@@ -160,24 +249,33 @@ def save_to_db():
     print("ENGLISH:\n", english_full)
     print("========================\n")
 
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO Translations (UrduText, EnglishText)
-        VALUES (?, ?)
-    """, (urdu_full, english_full))
-    conn.commit()
-    conn.close()
+    if db_writer is not None:
+        db_writer.put((urdu_full, english_full))
+        return jsonify({"saved": True, "queued": True})
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(INSERT_TRANSLATION, (urdu_full, english_full))
+        conn.commit()
 
     return jsonify({"saved": True})
 
 
+@app.get("/cache_stats")
+def cache_stats():
+    return jsonify(translation_cache.stats())
+
+
 @app.get("/test_db")
 def test_db():
     try:
-        conn = get_db()
-        conn.close()
-        return jsonify({"db": "connected"})
+        with get_db() as conn:
+            conn.cursor().execute("SELECT 1").fetchall()
+        return jsonify({
+            "db": "connected",
+            "pool": db_pool.stats(),
+            "writer": db_writer.stats() if db_writer else None
+        })
     except Exception as e:
         return jsonify({"db_error": str(e)})
 
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# DB pool and writers, translation cache and duplicate filter are shared
+# with TranslationApp2 and live in common/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMON_DIR = os.path.join(ROOT, "common")
+
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
@@ -0,0 +1,15 @@
+-- SQL Server tables used by db.py (the SQLite stand-in creates its own)
+
+IF OBJECT_ID('dbo.Segments', 'U') IS NULL
+CREATE TABLE dbo.Segments (
+    SessionId   NVARCHAR(32)  NOT NULL,
+    Seq         INT           NOT NULL,
+    StartedAt   DATETIME2(3)  NULL,
+    EndedAt     DATETIME2(3)  NULL,
+    UrduText    NVARCHAR(MAX) NULL,
+    EnglishText NVARCHAR(MAX) NULL,
+    Summary     NVARCHAR(MAX) NULL,
+    Edited      BIT           NOT NULL DEFAULT 0,
+    EditedAt    DATETIME2(3)  NULL,
+    CONSTRAINT PK_Segments PRIMARY KEY (SessionId, Seq)
+);
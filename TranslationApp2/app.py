@@ -1,228 +1,244 @@
 import os
-import re
-import time
 import threading
-from flask import Flask, jsonify, request, render_template
-import speech_recognition as sr
-from openai import OpenAI
-import pyodbc
-from queue import Queue
-from bs4 import BeautifulSoup
+from flask import Flask, Response, jsonify, request, render_template, stream_with_context
 from dotenv import load_dotenv
+from ipc import EngineClient, EngineUnavailable, UnknownSession
+from segment_stream import sse_events
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 app = Flask(__name__)
 
-AUDIO_DEVICE_INDEX = 2
+# ENGINE_ADDRESS set: capture, ASR and translation run in the engine
+# process (serve.py) and this module is only the web front, so any number
+# of web workers can load it. Unset: the engine runs in this process, as
+# with the dev server (python app.py), loaded on the first route that
+# needs it.
+ENGINE_ADDRESS = os.getenv("ENGINE_ADDRESS")
 
-recognizer = sr.Recognizer()
-recognizer.pause_threshold = 1.2
-recognizer.phrase_threshold = 0.2
-recognizer.non_speaking_duration = 0.2
 
-audio_queue = Queue()
+class LocalEngine:
+    """
+    engine.Engine in this process, imported on first use.
 
-is_running = False
-latest_urdu = ""
-latest_english = ""
-latest_summary = ""
-buffered_urdu = ""
-last_chunk = ""
-last_audio_time = time.time()
+    Importing engine.py loads the ASR/translation backends, opens the
+    capture devices and starts the worker pools, so "/" and the health
+    probes don't wait for any of it.
+    """
 
+    def __init__(self):
+        self._engine = None
+        self._lock = threading.Lock()
 
-# ----------------------------------------------------
-# Urdu punctuation helper
-# ----------------------------------------------------
-def punctuate_urdu(text):
-    text = text.strip()
-    if not re.search(r"[۔.!?]$", text):
-        text += "۔"
-    text = re.sub(r"( اور | لیکن | تاہم | پھر | جبکہ )", r".\1", text)
-    text = re.sub(r"۔+", "۔", text)
-    return text
+    @property
+    def loaded(self):
+        return self._engine is not None
 
+    def _load(self):
+        with self._lock:
+            if self._engine is None:
+                from engine import Engine
+                self._engine = Engine()
+        return self._engine
 
-# ----------------------------------------------------
-# GPT Translation (BBC Style)
-# ----------------------------------------------------
-def gpt_translate_with_summary(urdu_text):
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return getattr(self._engine or self._load(), method)
 
-    print("\n==============================")
-    print("📝 Urdu Input:", urdu_text)
-    print("==============================")
 
-    prompt = f"""
-You are a senior BBC journalist and translator.
+engine = EngineClient(ENGINE_ADDRESS) if ENGINE_ADDRESS else LocalEngine()
 
-TASK 1 → Translate the Urdu text into professional, concise **BBC News English**.
-TASK 2 → Produce a **1–2 sentence BBC-style summary**.
+DEFAULT_SESSION = "default"
 
-STRICT FORMAT:
-English: <translation>
-Summary: <summary>
-
-Urdu:
-{urdu_text}
-"""
-
-    try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}]
-        )
 
-        out = resp.choices[0].message.content.strip()
+def session_name():
+    """The session named by ?session= (default "default")."""
+    return request.args.get("session", DEFAULT_SESSION)
 
-        english, summary = "", ""
-        for line in out.split("\n"):
-            if line.startswith("English:"):
-                english = line.replace("English:", "").strip()
-            if line.startswith("Summary:"):
-                summary = line.replace("Summary:", "").strip()
 
-        print("📘 English:", english)
-        print("📰 Summary:", summary)
-        print("==============================\n")
+class EngineStream:
+    """The part of SegmentStream that sse_events() reads, through the engine."""
 
-        return english, summary
+    def __init__(self, name):
+        self.name = name
 
-    except Exception as e:
-        print("❌ GPT ERROR:", e)
-        return "", ""
+    @property
+    def session_id(self):
+        return engine.session_id(self.name)
 
+    def wait_updates(self, seq, session_id=None, partial_rev=0, timeout=15):
+        return engine.wait_updates(self.name, seq, session_id, partial_rev, timeout)
 
-# ----------------------------------------------------
-# Microphone Capture Thread
-# ----------------------------------------------------
-def audio_capture_thread():
-    global is_running
 
-    print("🎤 Microphone Listening...")
+@app.errorhandler(EngineUnavailable)
+def engine_unavailable(e):
+    return jsonify({"error": str(e)}), 503
 
-    with sr.Microphone(device_index=AUDIO_DEVICE_INDEX) as source:
-        recognizer.adjust_for_ambient_noise(source, duration=0.5)
 
-        while is_running:
-            try:
-                audio = recognizer.listen(source, timeout=None, phrase_time_limit=10)
-                audio_queue.put(audio)
-            except:
-                continue
+@app.errorhandler(UnknownSession)
+def unknown_session(e):
+    return jsonify({"error": str(e)}), 404
 
 
 # ----------------------------------------------------
-# Translation Worker Thread
+# Routes
 # ----------------------------------------------------
-def translation_worker():
-    global buffered_urdu, last_audio_time
-    global latest_urdu, latest_english, latest_summary
-    global last_chunk, is_running
-
-    while is_running:
-
-        # Process batch after silence
-        if buffered_urdu and time.time() - last_audio_time > 4:
-            full = punctuate_urdu(buffered_urdu.strip())
-            eng, summ = gpt_translate_with_summary(full)
+@app.route("/")
+def index():
+    return render_template("index.html")
 
-            latest_urdu = full
-            latest_english = eng
-            latest_summary = summ
 
-            buffered_urdu = ""
-            continue
+@app.get("/start")
+def start():
+    # ?session=<name>&device=<index> runs several inputs side by side
+    try:
+        return jsonify(engine.start(session_name(), request.args.get("device", type=int)))
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
 
-        try:
-            audio = audio_queue.get(timeout=1)
-        except:
-            continue
 
-        try:
-            text = recognizer.recognize_google(audio, language="ur-PK").strip()
-            print("🎧 Heard:", text)
-            last_audio_time = time.time()
+@app.get("/stop")
+def stop():
+    name = session_name()
+    lingering = engine.stop(name)
+    return jsonify({"status": "stopped", "name": name, "lingering_threads": lingering})
 
-            if text != last_chunk:
-                buffered_urdu += " " + text
-                last_chunk = text
 
-            # If long or ends with punctuation → translate immediately
-            if len(buffered_urdu.split()) >= 40 or re.search(r"[۔.!?]$", buffered_urdu):
-                full = punctuate_urdu(buffered_urdu.strip())
-                eng, summ = gpt_translate_with_summary(full)
+@app.get("/start_all")
+def start_all():
+    """Start a session for every CAPTURE_SOURCES entry."""
+    return jsonify({"status": "started", "sessions": engine.start_all()})
 
-                latest_urdu = full
-                latest_english = eng
-                latest_summary = summ
 
-                buffered_urdu = ""
+@app.get("/sessions")
+def list_sessions():
+    return jsonify(engine.sessions())
 
-        except:
-            continue
 
+@app.get("/pipeline_stats")
+def get_pipeline_stats():
+    # Queue depth / throughput per stage, for sizing the worker pools
+    return jsonify(engine.pipeline_stats())
 
-# ----------------------------------------------------
-# Routes
-# ----------------------------------------------------
-@app.route("/")
-def index():
-    return render_template("index.html")
 
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(engine.metrics_text(), mimetype="text/plain; version=0.0.4")
 
-@app.get("/start")
-def start():
-    global is_running
-    is_running = True
 
-    threading.Thread(target=audio_capture_thread, daemon=True).start()
-    threading.Thread(target=translation_worker, daemon=True).start()
+@app.get("/stats")
+def stats():
+    # p50/p95/p99 per stage and session, plus counters and gauges
+    return jsonify(engine.stats())
 
-    return jsonify({"status": "started"})
 
+@app.get("/stream")
+def stream():
+    # EventSource sends Last-Event-ID by itself when it reconnects
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_id")
+    # 404 now, before the response has started
+    engine.session_id(session_name())
+    on_deliver = (lambda seg: engine.delivered([seg])) if engine.tracing_enabled() else None
 
-@app.get("/stop")
-def stop():
-    global is_running
-    is_running = False
-    return jsonify({"status": "stopped"})
+    return Response(
+        stream_with_context(sse_events(EngineStream(session_name()), last_id, on_deliver=on_deliver)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.get("/get_latest")
 def get_latest():
-    global latest_urdu, latest_english, latest_summary
+    # Kept for old clients: read-only, pass ?since=<seq> to page forward
+    return jsonify(engine.latest(session_name(), request.args.get("since", default=0, type=int)))
+
+
+@app.get("/transcript")
+def transcript():
+    # The whole run, a page at a time: ?after=<seq>&limit=<n>, optionally
+    # only segments published between ?from= and ?to= (Unix times)
+    return jsonify(engine.transcript(
+        session_name(),
+        after=request.args.get("after", default=0, type=int),
+        limit=request.args.get("limit", default=50, type=int),
+        start=request.args.get("from", type=float),
+        end=request.args.get("to", type=float)
+    ))
+
+
+@app.get("/search")
+def search():
+    # ?q=<words> (all must match, Urdu or English), newest first;
+    # pass the returned "next" as ?before= for the next page
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "missing ?q="}), 400
+
+    return jsonify(engine.search(
+        session_name(), query,
+        limit=request.args.get("limit", default=20, type=int),
+        before=request.args.get("before", type=int)
+    ))
+
 
-    data = {
-        "urdu": latest_urdu,
-        "english": latest_english,
-        "summary": latest_summary
-    }
+# ----------------------------------------------------
+# Health (liveness / readiness probes)
+# ----------------------------------------------------
+@app.get("/health")
+def health():
+    # Liveness of this web worker; the engine part is informational only,
+    # so a restarting engine doesn't get the web workers killed too
+    if isinstance(engine, LocalEngine) and not engine.loaded:
+        return jsonify({"status": "alive", "pid": os.getpid(), "engine": {"status": "not loaded"}})
+
+    try:
+        engine_health = engine.health()
+    except EngineUnavailable as e:
+        engine_health = {"status": "unavailable", "error": str(e)}
 
-    latest_urdu = ""
-    latest_english = ""
-    latest_summary = ""
+    return jsonify({"status": "alive", "pid": os.getpid(), "engine": engine_health})
+
+
+@app.get("/ready")
+def ready():
+    # 503 until the engine has its models loaded and its pools running
+    try:
+        result = engine.ready()
+    except EngineUnavailable as e:
+        return jsonify({"ready": False, "error": str(e)}), 503
 
-    return jsonify(data)
+    return jsonify(result), 200 if result["ready"] else 503
 
 
 # ----------------------------------------------------
 # Save to Database
 # ----------------------------------------------------
-def get_db():
-    return pyodbc.connect(
-        "DRIVER={SQL Server};"
-        "SERVER=khi-webdbs;"
-        "DATABASE=TranslationApp;"
-        "UID=NcUser;"
-        "PWD=New#Contact_DB_user_2003;"
-    )
-
-
 @app.post("/save")
 def save():
-    html = request.json["editor"]
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "expected a JSON object"}), 400
+
+    # Segment edits: {"session": "...", "edits": [{"seq": 3, "english": "..."}]}
+    if "edits" in body:
+        edits = body["edits"]
+        if not body.get("session") or not isinstance(edits, list):
+            return jsonify({"error": "edits need a \"session\" and a list of edits"}), 400
+        if not all(isinstance(e, dict) and "seq" in e for e in edits):
+            return jsonify({"error": "every edit needs a \"seq\""}), 400
+
+        try:
+            return jsonify(engine.save_edits(body["session"], edits))
+        except (ValueError, TypeError) as e:
+            return jsonify({"error": str(e)}), 400
+
+    # Old clients still post the whole editor HTML
+    from bs4 import BeautifulSoup
+
+    html = body.get("editor")
+    if not isinstance(html, str):
+        return jsonify({"error": "expected \"edits\" or \"editor\""}), 400
     soup = BeautifulSoup(html, "html.parser")
     text = soup.get_text("\n")
 
@@ -234,17 +250,33 @@ def save():
         if line.startswith("English:"):
             eng += line.replace("English:", "").strip() + "\n"
 
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute("INSERT INTO Translations (UrduText, EnglishText) VALUES (?, ?)", (urdu, eng))
-    conn.commit()
-    conn.close()
+    return jsonify(engine.save_text(urdu, eng))
 
-    return jsonify({"saved": True})
+
+@app.get("/test_db")
+def test_db():
+    try:
+        return jsonify(engine.test_db())
+    except EngineUnavailable:
+        raise
+    except Exception as e:
+        return jsonify({"db_error": str(e)})
+
+
+@app.get("/segments")
+def saved_segments():
+    """Stored segments of one run: ?run=<id>, or the current run of ?session=<name>."""
+    session_id = request.args.get("run") or engine.session_id(session_name())
+
+    try:
+        return jsonify(engine.saved_segments(session_id))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 # ----------------------------------------------------
 # Run App
 # ----------------------------------------------------
 if __name__ == "__main__":
+    # Dev server only; see serve.py for production
     app.run(debug=False, use_reloader=False, host="127.0.0.1")
@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+import speech_recognition as sr
+
+import paths  # noqa: F401  (PythonProject on sys.path)
+from model_registry import BUNDLED_MODEL, get_model
+
+SAMPLE_RATE = 16000
+
+
+# ----------------------------------------------------
+# Audio helpers
+# ----------------------------------------------------
+def audio_to_float32(audio):
+    """sr.AudioData → 16 kHz mono float32 in [-1, 1], straight from memory."""
+    raw = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def load_wav_audio(path):
+    with wave.open(path, "rb") as wf:
+        frames = wf.readframes(wf.getnframes())
+        rate, width, channels = wf.getframerate(), wf.getsampwidth(), wf.getnchannels()
+
+    if channels > 1:
+        pcm = np.frombuffer(frames, dtype=np.int16).reshape(-1, channels).mean(axis=1)
+        frames = pcm.astype(np.int16).tobytes()
+    return sr.AudioData(frames, rate, width)
+
+
+# ----------------------------------------------------
+# ASR Backends
+# ----------------------------------------------------
+class GoogleASR:
+    """The network recognizer the app has always used."""
+
+    name = "google"
+
+    def __init__(self, recognizer, language="ur-PK"):
+        self.recognizer = recognizer
+        self.language = language
+
+    def transcribe(self, audio):
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language).strip()
+        except sr.UnknownValueError:
+            return None
+
+
+class FasterWhisperASR:
+    """
+    Local CTranslate2 Whisper. No network round trip per phrase.
+
+    The model comes from PythonProject's model_registry, so it is loaded
+    once per process and shared with anything else using the same path.
+    num_workers lets that many threads transcribe at once, so match it
+    to ASR_WORKERS; cpu_threads is the intra-op thread count per worker
+    (0 = CTranslate2 default).
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, model=BUNDLED_MODEL, device="cpu", compute_type="int8",
+                 cpu_threads=0, num_workers=1, language="ur", beam_size=1):
+        self.language = language
+        self.beam_size = beam_size
+        self.model = get_model(model, device, compute_type,
+                               cpu_threads=cpu_threads, num_workers=num_workers)
+
+    def transcribe(self, audio):
+        pcm = audio_to_float32(audio) if isinstance(audio, sr.AudioData) else audio
+        segments, _ = self.model.transcribe(
+            pcm,
+            language=self.language,
+            task="transcribe",
+            beam_size=self.beam_size,
+            condition_on_previous_text=False
+        )
+        text = " ".join(s.text.strip() for s in segments).strip()
+        return text or None
+
+
+def create_asr_backend(name, recognizer=None, workers=1):
+    """Build the backend named by ASR_BACKEND (google | whisper)."""
+    if name == "google":
+        return GoogleASR(recognizer or sr.Recognizer())
+
+    if name in ("whisper", "faster-whisper"):
+        return FasterWhisperASR(
+            # A local model folder, or a model name to download from the hub
+            model=os.getenv("WHISPER_MODEL") or os.getenv("WHISPER_MODEL_PATH") or BUNDLED_MODEL,
+            device=os.getenv("WHISPER_DEVICE", "cpu"),
+            compute_type=os.getenv("WHISPER_COMPUTE_TYPE", "int8"),
+            cpu_threads=int(os.getenv("WHISPER_CPU_THREADS", 0)),
+            num_workers=int(os.getenv("WHISPER_NUM_WORKERS", workers))
+        )
+
+    raise ValueError(f"Unknown ASR backend: {name}")
+
+
+# ----------------------------------------------------
+# Throughput check: python asr.py [google|whisper] file.wav ...
+# ----------------------------------------------------
+if __name__ == "__main__":
+    backend = create_asr_backend(sys.argv[1])
+    total_audio = total_wall = 0.0
+
+    for path in sys.argv[2:]:
+        audio = load_wav_audio(path)
+        seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+
+        started = time.perf_counter()
+        text = backend.transcribe(audio)
+        wall = time.perf_counter() - started
+
+        total_audio += seconds
+        total_wall += wall
+        print(f"{os.path.basename(path)}: {seconds:.1f}s audio in {wall:.2f}s (RTF {wall / seconds:.2f})")
+        print("   ", text)
+
+    if total_audio:
+        print(f"\nTotal: {total_audio:.1f}s audio in {total_wall:.2f}s, RTF {total_wall / total_audio:.3f}")
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import paths  # noqa: F401  (shared modules on sys.path)
+from metrics import Histogram
+
+
+# ----------------------------------------------------
+# Backend interface
+# ----------------------------------------------------
+class TranslationBackend:
+    """
+    Urdu text → (english, summary).
+
+    translate() is the blocking call used by the pipeline workers;
+    translate_batch() is the async batch form. Backends without a
+    native batch call get one that runs translate() on worker threads.
+    Backends without summaries return "" for the summary.
+    """
+
+    name = "base"
+    streaming = False
+
+    def translate(self, urdu_text, on_partial=None):
+        raise NotImplementedError
+
+    async def translate_batch(self, texts):
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self.translate, t) for t in texts),
+            return_exceptions=True
+        )
+        return [("", "") if isinstance(r, Exception) else r for r in results]
+
+
+class GoogleBackend(TranslationBackend):
+    name = "google"
+
+    def __init__(self):
+        from deep_translator import GoogleTranslator
+        self.translator = GoogleTranslator(source="ur", target="en")
+
+    def translate(self, urdu_text, on_partial=None):
+        return self.translator.translate(urdu_text) or "", ""
+
+
+class GPTBackend(TranslationBackend):
+    name = "gpt"
+    streaming = True
+
+    def __init__(self, gpt):
+        self.gpt = gpt
+        self.name = f"gpt:{gpt.model}"
+
+    def translate(self, urdu_text, on_partial=None):
+        if on_partial is not None:
+            return self.gpt.translate_stream(urdu_text, on_partial)
+        return self.gpt.translate(urdu_text)
+
+    async def translate_batch(self, texts):
+        # Submitted together, so the backend's coalescing window groups them
+        futures = [asyncio.wrap_future(self.gpt.submit(t)) for t in texts]
+        return await asyncio.gather(*futures)
+
+
+class NLLBBackend(TranslationBackend):
+    """Local NLLB (transformers or int8 CTranslate2) behind the micro-batcher."""
+
+    def __init__(self, engine="ct2", threads=None, max_batch=16, max_wait=0.05):
+        from nllb_ct2 import load_nllb
+        from nllb_service import NLLBService
+
+        self.name = f"nllb:{engine}"
+        self.service = NLLBService(load_nllb(engine, threads=threads), max_batch=max_batch, max_wait=max_wait)
+
+    def translate(self, urdu_text, on_partial=None):
+        return self.service.translate(urdu_text), ""
+
+    async def translate_batch(self, texts):
+        futures = [asyncio.wrap_future(self.service.submit(t)) for t in texts]
+        return [(english, "") for english in await asyncio.gather(*futures)]
+
+
+def create_backend(name, gpt=None):
+    """google | gpt | nllb | nllb-transformers"""
+    if name == "google":
+        return GoogleBackend()
+    if name == "gpt":
+        return GPTBackend(gpt)
+    if name in ("nllb", "nllb-ct2"):
+        return NLLBBackend("ct2", threads=int(os.getenv("NLLB_THREADS", 0)) or None)
+    if name == "nllb-transformers":
+        return NLLBBackend("transformers", threads=int(os.getenv("NLLB_THREADS", 0)) or None)
+    raise ValueError(f"Unknown translation backend: {name}")
+
+
+# ----------------------------------------------------
+# Fallback chain
+# ----------------------------------------------------
+class FallbackChain:
+    """
+    Try backends in order until one returns English.
+
+    A backend is skipped when it raises, returns no English, or takes
+    longer than `timeout` seconds. A timed-out call keeps running in the
+    background, but its answer is discarded. Every attempt is recorded
+    in a per-backend latency histogram with success/failure/timeout
+    counters, which is the data needed to route by cost and latency.
+
+    A streaming attempt that is given up on is cut off from on_partial,
+    so its late partials can't overwrite the fallback's answer.
+    """
+
+    def __init__(self, backends, timeout=20.0):
+        self.backends = backends
+        self.timeout = timeout
+        self.primary = backends[0].name
+        self.name = ">".join(b.name for b in backends)
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="backend")
+        self.latency = {b.name: Histogram() for b in backends}
+        self.counters = {b.name: {"ok": 0, "failed": 0, "timeout": 0} for b in backends}
+        self._counters_lock = threading.Lock()
+
+    def translate(self, urdu_text, on_partial=None, skip=0):
+        """
+        Returns (english, summary, backend_name); backend_name is None if
+        all failed. `skip` starts further down the chain.
+        """
+        for backend in self.backends[skip:]:
+            live = threading.Event()
+            live.set()
+            partial = None
+            if on_partial is not None and backend.streaming:
+                def forward(english, live=live):
+                    if live.is_set():
+                        on_partial(english)
+                partial = forward
+
+            started = time.perf_counter()
+            future = self._pool.submit(backend.translate, urdu_text, partial)
+
+            try:
+                english, summary = future.result(timeout=self.timeout)
+                outcome = "ok" if english else "failed"
+            except FutureTimeout:
+                english, summary, outcome = "", "", "timeout"
+            except Exception as e:
+                print(f"❌ {backend.name} error:", e)
+                english, summary, outcome = "", "", "failed"
+
+            self.latency[backend.name].observe(time.perf_counter() - started)
+            self._count(backend.name, outcome)
+
+            if outcome == "ok":
+                return english, summary, backend.name
+
+            # A timed-out call keeps running; its partials are stale now
+            live.clear()
+            future.cancel()
+            print(f"⚠ {backend.name} {outcome}, falling back...")
+
+        return "", "", None
+
+    async def translate_batch(self, texts):
+        """Batch through the first backend; anything it misses falls through one by one."""
+        first = self.backends[0]
+        started = time.perf_counter()
+        try:
+            results = await asyncio.wait_for(first.translate_batch(texts), self.timeout)
+        except Exception as e:
+            print(f"❌ {first.name} batch error:", e)
+            results = [("", "")] * len(texts)
+        self.latency[first.name].observe(time.perf_counter() - started)
+
+        out = []
+        for text, (english, summary) in zip(texts, results):
+            if english:
+                self._count(first.name, "ok")
+                out.append((english, summary, first.name))
+            else:
+                self._count(first.name, "failed")
+                out.append(await asyncio.to_thread(self.translate, text, None, 1))
+        return out
+
+    def _count(self, name, outcome):
+        # Incremented from several pool threads at once
+        with self._counters_lock:
+            self.counters[name][outcome] += 1
+
+    def counts(self):
+        """A consistent copy of the counters: {backend: {outcome: n}}."""
+        with self._counters_lock:
+            return {name: dict(c) for name, c in self.counters.items()}
+
+    def stats(self):
+        counts = self.counts()
+        return {
+            name: dict(counts[name], latency=self.latency[name].snapshot())
+            for name in self.latency
+        }
+
+
+def build_chain(names, gpt=None, timeout=20.0):
+    """TRANSLATION_BACKENDS="gpt,nllb" → GPT first, local NLLB when it fails or times out."""
+    backends = [create_backend(n.strip(), gpt=gpt) for n in names.split(",") if n.strip()]
+    return FallbackChain(backends, timeout=timeout)
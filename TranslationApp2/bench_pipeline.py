@@ -0,0 +1,583 @@
+import argparse
+import glob
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+import wave
+import zlib
+
+import numpy as np
+import speech_recognition as sr
+
+import paths  # noqa: F401  (shared modules on sys.path)
+from backends import FallbackChain, TranslationBackend
+from capture import CaptureManager
+from metrics import MetricsRegistry
+from pipeline import FairPool
+from session import TranslationSession
+from tracing import CHUNK_SPANS, SEGMENT_SPANS, Tracer
+from translation_cache import TranslationCache, cache_key
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "..", "PythonProject", "TranslationApp")
+SAMPLE_RATE = 16000
+
+# News-style Urdu lines the stub ASR "hears". The first few recur the way
+# headlines and station idents do, which is what the cache is for.
+SENTENCES = [
+    "یہ خبریں ہیں ریڈیو پاکستان سے۔",
+    "اب آپ سنیں گے تازہ ترین خبریں۔",
+    "وزیر اعظم نے آج قومی اسمبلی سے خطاب کیا۔",
+    "ملک میں مہنگائی کی شرح میں کمی دیکھی گئی ہے۔",
+    "کراچی میں آج موسم ابر آلود رہنے کا امکان ہے۔",
+    "حکومت نے نئے ترقیاتی منصوبوں کا اعلان کر دیا۔",
+    "کرکٹ ٹیم اگلے ہفتے دورے پر روانہ ہوگی۔",
+    "اسٹاک مارکیٹ میں آج تیزی کا رجحان رہا۔",
+    "وزارت صحت نے ویکسین مہم شروع کرنے کا فیصلہ کیا ہے۔",
+    "بارشوں کے باعث کئی شہروں میں سیلاب کا خطرہ ہے۔",
+]
+HEADLINES = 2
+
+
+# ----------------------------------------------------
+# Stub backends with configurable latency
+# ----------------------------------------------------
+def stub_delay(ms, jitter, rng):
+    if ms > 0:
+        time.sleep(ms / 1000 * rng.uniform(1 - jitter, 1 + jitter))
+
+
+class StubASR:
+    """
+    recognize(audio) → Urdu text after `latency_ms` (± jitter).
+
+    The text is picked from a hash of the audio, so the same clip always
+    "says" the same thing: a `repeat` share of chunks are recurring
+    headlines, and a `continued` share lack the closing "۔" so they are
+    buffered and wait for the next chunk or the silence flush.
+    """
+
+    def __init__(self, latency_ms, jitter, repeat, continued, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.repeat = repeat
+        self.continued = continued
+        self.seed = seed
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, audio):
+        digest = zlib.crc32(audio.frame_data)
+        rng = random.Random(digest ^ self.seed)
+        with self._lock:
+            self.calls += 1
+        stub_delay(self.latency_ms, self.jitter, rng)
+
+        if rng.random() < self.repeat:
+            return SENTENCES[rng.randrange(HEADLINES)]
+        text = SENTENCES[rng.randrange(HEADLINES, len(SENTENCES))]
+        # A number unique to the chunk keeps the duplicate filter and cache honest
+        text = f"{text[:-1]} {digest % 100000}"
+        return text if rng.random() < self.continued else text + "۔"
+
+
+class StubBackend(TranslationBackend):
+    """Translation backend that sleeps `latency_ms` (± jitter) per call."""
+
+    name = "stub"
+
+    def __init__(self, latency_ms, jitter):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate(self, urdu_text, on_partial=None):
+        with self._lock:
+            self.calls += 1
+        stub_delay(self.latency_ms, self.jitter, random.Random(urdu_text))
+        return f"[en] {len(urdu_text.split())} words", "[summary]"
+
+
+# ----------------------------------------------------
+# Fake microphone (for the listen / VAD capture paths)
+# ----------------------------------------------------
+class FakeMicrophone(sr.AudioSource):
+    """
+    Stands in for sr.Microphone: device_index picks a WAV file from
+    FakeMicrophone.files and stream.read() plays it at `speed`. At the
+    end of the file it sets the file's entry in FakeMicrophone.finished
+    and blocks until release(), then returns silence so the capture
+    loop can notice it is being stopped.
+    """
+
+    files = {}
+    finished = {}
+    released = threading.Event()
+    speed = 1.0
+
+    @classmethod
+    def release(cls):
+        cls.released.set()
+
+    def __init__(self, device_index=None, sample_rate=None, chunk_size=1024):
+        self.device_index = device_index
+        self.path = FakeMicrophone.files[device_index]
+        self.SAMPLE_RATE = SAMPLE_RATE
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = chunk_size
+        self.stream = None
+
+    def __enter__(self):
+        self.stream = _FileStream(self.path, self.CHUNK, FakeMicrophone.speed,
+                                  FakeMicrophone.finished[self.device_index], FakeMicrophone.released)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+
+class _FileStream:
+    def __init__(self, path, chunk, speed, finished, released):
+        self.pcm = read_wav(path).tobytes()
+        self.chunk = chunk
+        self.speed = speed
+        self.finished = finished
+        self.released = released
+        self.offset = 0
+        self.started = time.monotonic()
+
+    def read(self, frames):
+        data = self.pcm[self.offset:self.offset + 2 * frames]
+        self.offset += 2 * frames
+        if len(data) < 2 * frames:
+            self.finished.set()
+            if not data:
+                self.released.wait()
+            data += b"\x00" * (2 * frames - len(data))
+
+        if self.speed > 0:
+            due = self.started + self.offset / 2 / SAMPLE_RATE / self.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+
+def read_wav(path):
+    """Mono int16 samples; raises ValueError for files the pipeline can't take."""
+    with wave.open(path, "rb") as wf:
+        if wf.getnframes() == 0:
+            raise ValueError("no audio frames")
+        if wf.getframerate() != SAMPLE_RATE or wf.getsampwidth() != 2:
+            raise ValueError(f"{wf.getframerate()} Hz / {8 * wf.getsampwidth()} bit, expected {SAMPLE_RATE} Hz / 16 bit")
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        return pcm.reshape(-1, wf.getnchannels())[:, 0].copy()
+
+
+# ----------------------------------------------------
+# Measurements
+# ----------------------------------------------------
+class BenchTracer(Tracer):
+    """Tracer that also keeps every span so percentiles are exact and pooled across sessions."""
+
+    def __init__(self, registry):
+        super().__init__(registry)
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def _keep(self, trace, spans):
+        with self._lock:
+            for name, start, end, _ in spans:
+                if start in trace and end in trace:
+                    self.spans.setdefault(name, []).append(trace[end] - trace[start])
+
+    def chunk_done(self, trace, session):
+        super().chunk_done(trace, session)
+        if trace is not None:
+            self._keep(trace, CHUNK_SPANS)
+
+    def segment_done(self, trace, session):
+        super().segment_done(trace, session)
+        if trace is not None:
+            self._keep(trace, SEGMENT_SPANS)
+
+
+def percentiles(values):
+    if not values:
+        return {"count": 0}
+    ms = 1000 * np.asarray(values)
+    return {
+        "count": len(values),
+        "mean_ms": round(float(ms.mean()), 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "max_ms": round(float(ms.max()), 1)
+    }
+
+
+def cpu_seconds():
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+    except ImportError:
+        return time.process_time()
+
+
+def rss_mb():
+    """(current, peak) resident set size in MB; (None, None) without /proc or psutil."""
+    try:
+        import resource
+        # ru_maxrss is KB on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        return current, peak
+    except (ImportError, OSError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None, None
+    info = psutil.Process().memory_info()
+    return info.rss / (1024 * 1024), getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+
+
+class QueueSampler:
+    """Polls queue depths every `interval` seconds on its own thread."""
+
+    def __init__(self, pools, sessions, capture, interval=0.1):
+        self.pools = pools
+        self.sessions = sessions
+        self.capture = capture
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-sampler", daemon=True)
+        self.started = None
+
+    def start(self):
+        self.started = time.monotonic()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def depths(self):
+        sample = {}
+        for pool in self.pools:
+            lanes = pool.stats()["lanes"]
+            sample[pool.name] = sum(lane["depth"] for lane in lanes)
+            sample[f"{pool.name}_in_flight"] = sum(lane["in_flight"] for lane in lanes)
+        sample["reorder"] = sum(s.asr_order.waiting + s.translate_order.waiting
+                                for s in self.sessions if s.asr_order)
+        sample["capture"] = sum(s["buffered_blocks"] for s in self.capture.stats()) if self.capture else 0
+        return sample
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples.append((time.monotonic() - self.started, self.depths()))
+
+    def summary(self, until=None):
+        """Max / mean depth per queue, and growth (items/s, least squares) up to `until`."""
+        out = {}
+        for key in (self.samples[0][1] if self.samples else {}):
+            points = [(t, d[key]) for t, d in self.samples]
+            values = [v for _, v in points]
+            growing = [(t, v) for t, v in points if until is None or t <= until]
+            slope = 0.0
+            if len(growing) >= 2 and len({t for t, _ in growing}) > 1:
+                slope = float(np.polyfit([t for t, _ in growing], [v for _, v in growing], 1)[0])
+            out[key] = {
+                "max": max(values),
+                "mean": round(sum(values) / len(values), 2),
+                "growth_per_s": round(slope, 3)
+            }
+        return out
+
+
+# ----------------------------------------------------
+# Benchmark run
+# ----------------------------------------------------
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def expand_files(patterns):
+    if not patterns:
+        patterns = [os.path.join(FIXTURES, "*.wav")]
+    files, skipped = [], {}
+    for path in (p for pattern in patterns for p in sorted(glob.glob(pattern))):
+        try:
+            pcm = read_wav(path)
+        except (ValueError, wave.Error, EOFError) as e:
+            skipped[os.path.basename(path)] = str(e)
+            continue
+        files.append((path, len(pcm) / SAMPLE_RATE))
+    return files, skipped
+
+
+def run(args):
+    files, skipped = expand_files(args.files)
+    for name, reason in skipped.items():
+        print(f"⚠ Skipping {name}: {reason}")
+    if not files:
+        raise SystemExit("No usable 16 kHz WAV files")
+
+    # N sessions play the files round-robin
+    count = args.sessions or len(files)
+    feeds = [(f"s{i}", *files[i % len(files)]) for i in range(count)]
+
+    registry = MetricsRegistry()
+    tracer = BenchTracer(registry) if args.trace else Tracer(registry, enabled=False)
+
+    # Same wiring as app.py, with stub backends in place of Google / GPT
+    recognize = StubASR(args.asr_ms, args.jitter, args.repeat, args.continued, args.seed)
+    stub = StubBackend(args.translate_ms, args.jitter)
+    chain = FallbackChain([stub], timeout=args.translate_timeout)
+    cache = TranslationCache(path=None, memory_size=args.cache_size) if args.cache_size else None
+
+    def translate(urdu_text, on_partial=None):
+        # As app.translate_cached()
+        key = cache_key(urdu_text, chain.primary, "bench")
+        if cache is not None:
+            cached = cache.get(key)
+            if cached:
+                return cached
+        english, summary, backend = chain.translate(urdu_text, on_partial)
+        if english and cache is not None:
+            cache.put(key, (english, summary))
+        return english, summary
+
+    asr_pool = FairPool("asr", workers=args.asr_workers, maxsize=args.asr_queue).start()
+    translate_pool = FairPool("translate", workers=args.translate_workers, maxsize=args.translate_queue).start()
+
+    published = []
+    published_lock = threading.Lock()
+
+    def on_segment(segment):
+        with published_lock:
+            published.append((time.time(), segment))
+
+    vad_options = {}
+    if args.chunk:
+        # Everything is "speech": segments are cut every --chunk seconds,
+        # at the quietest frame near the limit (see VADSegmenter)
+        vad_options = {"start_db": -200.0, "stop_db": -200.0, "max_segment_s": args.chunk,
+                       "split_search_s": min(1.0, args.chunk / 2), "calibrate_ms": 0}
+
+    capture = None
+    sessions = []
+    if args.source == "capture":
+        capture = CaptureManager(sample_rate=SAMPLE_RATE, file_speed=args.speed)
+        for name, path, _ in feeds:
+            source = capture.add(name, f"file:{path}")
+            sessions.append(TranslationSession(
+                name, None, recognize, translate, on_segment=on_segment,
+                silence_flush=args.silence_flush, source=source, vad_options=vad_options,
+                asr_pool=asr_pool, translate_pool=translate_pool, tracer=tracer))
+    else:
+        sr.Microphone = FakeMicrophone
+        FakeMicrophone.speed = args.speed
+        for i, (name, path, _) in enumerate(feeds):
+            FakeMicrophone.files[i] = path
+            FakeMicrophone.finished[i] = threading.Event()
+            sessions.append(TranslationSession(
+                name, i, recognize, translate, on_segment=on_segment, segmenter=args.segmenter,
+                silence_flush=args.silence_flush, vad_options=vad_options,
+                asr_pool=asr_pool, translate_pool=translate_pool, tracer=tracer))
+
+    sampler = QueueSampler([asr_pool, translate_pool], sessions, capture, args.sample_ms / 1000)
+    cpu_started = cpu_seconds()
+    rss_before, _ = rss_mb()
+    started = time.monotonic()
+
+    sampler.start()
+    for session in sessions:
+        session.start()
+
+    # Playback: until every feed has reached the end of its file
+    if args.source == "capture":
+        done = [(lambda s=s: not s.capturing) for s in sessions]
+    else:
+        done = [FakeMicrophone.finished[i].is_set for i in range(count)]
+    while not all(finished() for finished in done):
+        time.sleep(0.05)
+    playback = time.monotonic() - started
+
+    # Drain: queues empty, nothing in flight, no Urdu waiting for the silence flush
+    deadline = time.monotonic() + args.drain_timeout
+    idle_since = None
+    while time.monotonic() < deadline:
+        depths = sampler.depths()
+        idle = not any(depths.values()) and not any(s._buffer for s in sessions)
+        if idle:
+            idle_since = idle_since or time.monotonic()
+            if time.monotonic() - idle_since >= 0.3:
+                break
+        else:
+            idle_since = None
+        time.sleep(0.05)
+    drained = idle_since is not None
+    wall = time.monotonic() - started
+
+    FakeMicrophone.release()
+    lingering = [t for s in sessions for t in s.stop()]
+    sampler.stop()
+    asr_pool.stop()
+    translate_pool.stop()
+
+    cpu = cpu_seconds() - cpu_started
+    rss_after, rss_peak = rss_mb()
+    audio_seconds = sum(seconds for _, _, seconds in feeds)
+
+    end_to_end = [t - s["speech_end"] for t, s in published if "speech_end" in s]
+    spans = getattr(tracer, "spans", {})
+    cache_stats = cache.stats() if cache is not None else None
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "files": {os.path.basename(p): round(sec, 2) for p, sec in files},
+        "skipped": skipped,
+        "results": {
+            "sessions": count,
+            "audio_seconds": round(audio_seconds, 2),
+            "playback_seconds": round(playback, 2),
+            "wall_seconds": round(wall, 2),
+            "drained": drained,
+            "lingering_threads": lingering,
+            "asr_calls": recognize.calls,
+            "translate_calls": stub.calls,
+            "segments": len(published),
+            "segments_per_s": round(len(published) / wall, 3) if wall else 0.0,
+            "audio_x_realtime": round(audio_seconds / wall, 2) if wall else 0.0,
+            "end_to_end": percentiles(end_to_end),
+            "stages": {name: percentiles(values) for name, values in sorted(spans.items())},
+            "queues": sampler.summary(until=playback),
+            "pools": {
+                "asr": {"blocked_puts": sum(s.asr_stage.blocked_puts for s in sessions)},
+                "translate": {"blocked_puts": sum(s.translate_stage.blocked_puts for s in sessions)}
+            },
+            "capture_overruns": sum(s["overruns"] for s in capture.stats()) if capture else 0,
+            "duplicates_dropped": sum(s.duplicate_filter.stats().get("dropped", 0) for s in sessions),
+            "cache": cache_stats,
+            "cpu_seconds": round(cpu, 2),
+            "cpu_percent": round(100 * cpu / wall, 1) if wall else 0.0,
+            "rss_mb": round(rss_after, 1) if rss_after is not None else None,
+            "rss_growth_mb": round(rss_after - rss_before, 1) if rss_after is not None else None,
+            "peak_rss_mb": round(rss_peak, 1) if rss_peak is not None else None
+        }
+    }
+
+
+# ----------------------------------------------------
+# Comparing two runs
+# ----------------------------------------------------
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            out.update(flatten(item, f"{prefix}{key}."))
+        return out
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix[:-1]: value}
+    return {}
+
+
+def compare(baseline, current):
+    """Print every numeric result side by side with the change in percent."""
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    print(f"\n{'':44}{baseline.get('commit') or 'baseline':>12}{current.get('commit') or 'current':>12}{'change':>10}")
+    for key in sorted(set(old) | set(new)):
+        a, b = old.get(key), new.get(key)
+        change = ""
+        if a and b is not None:
+            change = f"{100 * (b - a) / abs(a):+.1f}%"
+        print(f"{key:44}{'-' if a is None else a:>12}{'-' if b is None else b:>12}{change:>10}")
+
+    changed = sorted(k for k in set(baseline["config"]) | set(current["config"])
+                     if baseline["config"].get(k) != current["config"].get(k))
+    if changed:
+        print(f"\n⚠ Config differs: {', '.join(changed)}")
+
+
+def print_report(report):
+    r = report["results"]
+    print(f"\n📊 {r['sessions']} sessions, {r['audio_seconds']}s of audio in {r['wall_seconds']}s "
+          f"({r['audio_x_realtime']}x real time)")
+    print(f"   {r['asr_calls']} ASR calls, {r['segments']} segments, {r['translate_calls']} translations, "
+          f"{r['segments_per_s']} segments/s")
+    e2e = r["end_to_end"]
+    if e2e["count"]:
+        print(f"   end to end: p50 {e2e['p50_ms']} ms, p95 {e2e['p95_ms']} ms, p99 {e2e['p99_ms']} ms")
+    for name, q in r["queues"].items():
+        print(f"   queue {name:20} max {q['max']:>4}  mean {q['mean']:>7}  growth {q['growth_per_s']:>7}/s")
+    if r["rss_mb"] is not None:
+        print(f"   CPU {r['cpu_seconds']}s ({r['cpu_percent']}%), RSS {r['rss_mb']} MB (peak {r['peak_rss_mb']} MB)")
+    else:
+        print(f"   CPU {r['cpu_seconds']}s ({r['cpu_percent']}%), RSS n/a (pip install psutil)")
+    if not r["drained"]:
+        print("⚠ Pipeline did not drain before --drain-timeout")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmark: recorded WAVs through sessions with stub ASR / translation")
+    parser.add_argument("files", nargs="*", help="WAV files or globs (default: the captures in PythonProject/TranslationApp)")
+    parser.add_argument("--source", choices=("capture", "microphone"), default="capture",
+                        help="capture: CaptureManager file devices; microphone: fake sr.Microphone")
+    parser.add_argument("--segmenter", choices=("listen", "vad"), default="vad", help="with --source microphone")
+    parser.add_argument("--speed", type=float, default=4.0, help="playback speed; 1 = real time, 0 = as fast as possible")
+    parser.add_argument("--sessions", type=int, default=0, help="concurrent sessions (default: one per file)")
+    parser.add_argument("--chunk", type=float, default=0.0,
+                        help="cut fixed segments of this many seconds instead of detecting speech")
+    parser.add_argument("--asr-ms", type=float, default=300)
+    parser.add_argument("--translate-ms", type=float, default=800)
+    parser.add_argument("--jitter", type=float, default=0.3, help="± share of the stub latency")
+    parser.add_argument("--repeat", type=float, default=0.2, help="share of chunks that are recurring headlines")
+    parser.add_argument("--continued", type=float, default=0.25, help="share of chunks without closing punctuation")
+    parser.add_argument("--asr-workers", type=int, default=2)
+    parser.add_argument("--translate-workers", type=int, default=2)
+    parser.add_argument("--asr-queue", type=int, default=16)
+    parser.add_argument("--translate-queue", type=int, default=8)
+    parser.add_argument("--translate-timeout", type=float, default=45)
+    parser.add_argument("--silence-flush", type=float, default=4)
+    parser.add_argument("--cache-size", type=int, default=512, help="0 disables the translation cache")
+    parser.add_argument("--no-trace", dest="trace", action="store_false")
+    parser.add_argument("--sample-ms", type=float, default=100)
+    parser.add_argument("--drain-timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Saved {args.out}")
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Cold start: python bench_startup.py [--out after.json] [--compare before.json]
+# Run it once against an older checkout (--app-dir) to get the "before".
+#
+# Each run is a fresh interpreter that imports app and answers one request
+# through Flask's test client, the way a freshly (re)started web worker does.
+
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get(sys.argv[1])
+answered = time.perf_counter()
+print(json.dumps({"status": response.status_code,
+                  "import_ms": (imported - started) * 1000,
+                  "request_ms": (answered - imported) * 1000}), flush=True)
+os._exit(0)
+"""
+
+
+def git_commit(app_dir):
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=app_dir,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# ----------------------------------------------------
+# Import-time profile (python -X importtime)
+# ----------------------------------------------------
+def parse_importtime(stderr):
+    """-X importtime lines → [(module, self_us, cumulative_us)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative)))
+    return rows
+
+
+def import_profile(app_dir, env, top=15):
+    """Where `import app` spends its time, grouped by top-level package."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                          cwd=app_dir, env=env, capture_output=True, text=True, timeout=600)
+    rows = parse_importtime(proc.stderr)
+
+    # Self times add up to the total without double counting
+    by_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    app_row = next((r for r in rows if r[0] == "app"), None)
+    return {
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        "app_ms": round(app_row[2] / 1000, 1) if app_row else None,
+        "modules": len(rows),
+        "packages": {name: round(us / 1000, 1)
+                     for name, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]}
+    }
+
+
+# ----------------------------------------------------
+# Time to first response
+# ----------------------------------------------------
+def first_response(app_dir, route, env):
+    """One cold process: wall time from spawn to the response being ready."""
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", CHILD, route], cwd=app_dir, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # The child prints one JSON line once it has answered; app output may precede it
+    result = None
+    for line in proc.stdout:
+        if line.startswith("{\"status\""):
+            result = json.loads(line)
+            result["wall_ms"] = (time.perf_counter() - started) * 1000
+            break
+    proc.wait(timeout=60)
+    if result is None:
+        lines = proc.stderr.read().strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+    return result
+
+
+def summarize(samples, key):
+    values = [s[key] for s in samples]
+    return {
+        "median_ms": round(statistics.median(values), 1),
+        "min_ms": round(min(values), 1),
+        "max_ms": round(max(values), 1)
+    }
+
+
+def cold_start(app_dir, routes, runs, env):
+    results = {}
+    for route in routes:
+        samples = [first_response(app_dir, route, env) for _ in range(runs)]
+        ok = [s for s in samples if "error" not in s]
+        if not ok:
+            results[route] = {"error": samples[0]["error"]}
+            continue
+        results[route] = {
+            "status": ok[0]["status"],
+            "runs": len(ok),
+            "first_response": summarize(ok, "wall_ms"),
+            "import": summarize(ok, "import_ms"),
+            "request": summarize(ok, "request_ms")
+        }
+    return results
+
+
+# ----------------------------------------------------
+# Report
+# ----------------------------------------------------
+def print_report(report):
+    imports = report["imports"]
+    print(f"\n📦 import app: {imports['app_ms']} ms over {imports['modules']} modules")
+    if imports["error"]:
+        print(f"⚠ {imports['error']}")
+    for name, ms in imports["packages"].items():
+        print(f"   {name:32}{ms:>10} ms")
+
+    print("\n⏱ Time to first response (cold process)")
+    for route, r in report["routes"].items():
+        if "error" in r:
+            print(f"   {route:16} ⚠ {r['error']}")
+            continue
+        fr = r["first_response"]
+        print(f"   {route:16} [{r['status']}] median {fr['median_ms']} ms "
+              f"(min {fr['min_ms']}, max {fr['max_ms']}); import {r['import']['median_ms']} ms, "
+              f"request {r['request']['median_ms']} ms")
+
+
+def compare(baseline, current):
+    """First-response medians side by side."""
+    print(f"\n{'':24}{baseline.get('commit') or 'baseline':>12}{current.get('commit') or 'current':>12}{'change':>10}")
+    rows = [("import app", baseline["imports"]["app_ms"], current["imports"]["app_ms"])]
+    for route in current["routes"]:
+        a = baseline["routes"].get(route, {}).get("first_response", {}).get("median_ms")
+        b = current["routes"][route].get("first_response", {}).get("median_ms")
+        rows.append((route, a, b))
+
+    for name, a, b in rows:
+        change = f"{100 * (b - a) / a:+.1f}%" if a and b is not None else ""
+        print(f"{name:24}{'-' if a is None else a:>12}{'-' if b is None else b:>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark: import profile and time to first response")
+    parser.add_argument("routes", nargs="*", default=["/", "/health", "/test_db"])
+    parser.add_argument("--app-dir", default=HERE, help="directory holding app.py (e.g. an older checkout)")
+    parser.add_argument("--runs", type=int, default=5, help="cold processes per route")
+    parser.add_argument("--top", type=int, default=15, help="packages to list in the import profile")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="extra environment for the app, e.g. --env DB_URL=sqlite:///bench.db")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.update(item.split("=", 1) for item in args.env)
+
+    app_dir = os.path.abspath(args.app_dir)
+    report = {
+        "commit": git_commit(app_dir),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "imports": import_profile(app_dir, env, args.top),
+        "routes": cold_start(app_dir, args.routes, args.runs, env)
+    }
+    print_report(report)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+import glob
+import os
+import sys
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+from vad import VADSegmenter
+
+SAMPLE_RATE = 16000
+
+
+# ----------------------------------------------------
+# Device streams (PortAudio callback, or a WAV file)
+# ----------------------------------------------------
+class PyAudioDevice:
+    """
+    A PortAudio input stream in callback mode.
+
+    PortAudio calls callback(int16 interleaved frames, frame_count) on
+    its own thread, so nothing blocks on read() and one stream serves
+    every channel of a multichannel card.
+    """
+
+    _pa = None
+    _pa_lock = threading.Lock()
+
+    def __init__(self, device, channels, sample_rate, blocksize, callback):
+        import pyaudio
+
+        with PyAudioDevice._pa_lock:
+            if PyAudioDevice._pa is None:
+                PyAudioDevice._pa = pyaudio.PyAudio()
+
+        def on_audio(in_data, frame_count, time_info, status):
+            callback(np.frombuffer(in_data, dtype=np.int16), frame_count, status)
+            return None, pyaudio.paContinue
+
+        self._stream = PyAudioDevice._pa.open(
+            format=pyaudio.paInt16,
+            channels=channels,
+            rate=sample_rate,
+            input=True,
+            input_device_index=device,
+            frames_per_buffer=blocksize,
+            stream_callback=on_audio,
+            start=False
+        )
+        self.finished = threading.Event()
+
+    def start(self):
+        self._stream.start_stream()
+
+    def stop(self):
+        self._stream.stop_stream()
+        self._stream.close()
+
+
+class FileDevice:
+    """
+    A WAV file played into the same callback as PyAudioDevice.
+
+    Used as a virtual device for tests and benchmarks ("file:clip.wav").
+    Missing channels are filled by repeating the file's last channel.
+    `speed` > 1 plays faster than real time; 0 as fast as possible.
+    Sets `finished` at the end of the file.
+    """
+
+    def __init__(self, path, channels, sample_rate, blocksize, callback, speed=1.0):
+        with wave.open(path, "rb") as wf:
+            if wf.getframerate() != sample_rate:
+                raise ValueError(f"{path} is {wf.getframerate()} Hz, expected {sample_rate} Hz")
+            file_channels = wf.getnchannels()
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+        pcm = pcm.reshape(-1, file_channels)
+        pick = [min(c, file_channels - 1) for c in range(channels)]
+        self.pcm = np.ascontiguousarray(pcm[:, pick])
+
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.speed = speed
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="file-device", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        started = time.monotonic()
+        for offset in range(0, len(self.pcm), self.blocksize):
+            if self._stop.is_set():
+                break
+            block = self.pcm[offset:offset + self.blocksize]
+            self.callback(block.reshape(-1), len(block), None)
+
+            if self.speed > 0:
+                due = started + (offset + len(block)) / self.sample_rate / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        self.finished.set()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+def parse_device(spec):
+    """
+    "2" → (2, 0); "2:1" → (2, 1) (channel 1 of device 2);
+    "file:clip.wav" → ("file:clip.wav", 0); "file:clip.wav:1" → channel 1.
+    """
+    spec = str(spec).strip()
+    head, sep, tail = spec.rpartition(":")
+    if sep and tail.isdigit() and head and head != "file":
+        device, channel = head, int(tail)
+    else:
+        device, channel = spec, 0
+    return (int(device) if device.isdigit() else device), channel
+
+
+def parse_sources(value):
+    """CAPTURE_SOURCES="studio=2,feed2=7:1,test=file:clip.wav" → {name: spec}."""
+    sources = {}
+    for part in (value or "").split(","):
+        if "=" in part:
+            name, spec = part.split("=", 1)
+            sources[name.strip()] = spec.strip()
+    return sources
+
+
+# ----------------------------------------------------
+# Capture Source (one mono feed)
+# ----------------------------------------------------
+class CaptureSource:
+    """
+    One mono feed: a whole device, or one channel of a multichannel one.
+
+    The device callback appends float32 blocks; read() hands them to the
+    consumer. At most `max_blocks` are held, after that the oldest are
+    dropped and counted in `overruns` so a stalled consumer can't grow
+    memory without bound.
+    """
+
+    def __init__(self, manager, name, device, channel, max_blocks=200):
+        self.manager = manager
+        self.name = name
+        self.device = device
+        self.channel = channel
+        self.sample_rate = manager.sample_rate
+
+        self._blocks = deque()
+        self._max_blocks = max_blocks
+        self._cond = threading.Condition()
+        self.active = False
+
+        self.frames = 0
+        self.overruns = 0
+
+    def open(self):
+        self.manager.open(self)
+        return self
+
+    def close(self):
+        self.manager.close(self)
+
+    @property
+    def finished(self):
+        """True once a file-backed device has played to the end and been read."""
+        return self.manager.device_finished(self.device) and not self._blocks
+
+    def _push(self, samples):
+        with self._cond:
+            if len(self._blocks) >= self._max_blocks:
+                self._blocks.popleft()
+                self.overruns += 1
+            self._blocks.append(samples)
+            self.frames += len(samples)
+            self._cond.notify()
+
+    def read(self, timeout=0.5):
+        """Next float32 block, or None if nothing arrived within `timeout`."""
+        with self._cond:
+            if not self._blocks:
+                self._cond.wait(timeout)
+            if not self._blocks:
+                return None
+            return self._blocks.popleft()
+
+    def _clear(self):
+        with self._cond:
+            self._blocks.clear()
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "name": self.name,
+                "device": self.device,
+                "channel": self.channel,
+                "active": self.active,
+                "seconds": round(self.frames / self.sample_rate, 1),
+                "buffered_blocks": len(self._blocks),
+                "overruns": self.overruns
+            }
+
+
+# ----------------------------------------------------
+# Capture Manager
+# ----------------------------------------------------
+class CaptureManager:
+    """
+    Opens each input device once and fans its callback out to sources.
+
+    Several sources on one device (different channels) share a single
+    stream opened with enough channels for all of them. A device is
+    opened when its first source is opened and closed with its last.
+    device_factory(device, channels, sample_rate, blocksize, callback)
+    builds the stream; "file:<path>" devices are always FileDevice.
+
+    Streams are stopped outside `_lock`: stop() waits for a running
+    callback, and the callback takes `_lock` to find its sources.
+    `_switch_lock` keeps opens and closes from interleaving instead.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, blocksize=1600, file_speed=1.0, device_factory=None):
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.file_speed = file_speed
+        self.device_factory = device_factory or PyAudioDevice
+
+        self._sources = {}
+        self._streams = {}      # device → (stream, channels)
+        self._lock = threading.Lock()
+        self._switch_lock = threading.Lock()
+
+    def add(self, name, spec):
+        device, channel = parse_device(spec)
+        with self._lock:
+            if name in self._sources:
+                raise ValueError(f"Source '{name}' already exists")
+            source = CaptureSource(self, name, device, channel)
+            self._sources[name] = source
+            return source
+
+    def source(self, name):
+        with self._lock:
+            return self._sources.get(name)
+
+    def sources(self):
+        with self._lock:
+            return list(self._sources.values())
+
+    def open(self, source):
+        with self._switch_lock:
+            with self._lock:
+                source.active = True
+                device = source.device
+                channels = 1 + max(s.channel for s in self._sources.values() if s.device == device)
+
+                current = self._streams.get(device)
+                if current and current[1] >= channels and not current[0].finished.is_set():
+                    return
+                self._streams.pop(device, None)
+
+            # First source on this device, or it needs more channels now
+            if current:
+                current[0].stop()
+            stream = self._make_stream(device, channels)
+            with self._lock:
+                self._streams[device] = (stream, channels)
+            stream.start()
+            print(f"🎤 Capturing device {device} ({channels} ch)")
+
+    def close(self, source):
+        with self._switch_lock:
+            with self._lock:
+                source.active = False
+                source._clear()
+                device = source.device
+                if any(s.active for s in self._sources.values() if s.device == device):
+                    return
+                current = self._streams.pop(device, None)
+            if current:
+                current[0].stop()
+
+    def close_all(self):
+        for source in self.sources():
+            self.close(source)
+
+    def device_finished(self, device):
+        with self._lock:
+            current = self._streams.get(device)
+            return current is not None and current[0].finished.is_set()
+
+    def _make_stream(self, device, channels):
+        def callback(pcm, frames, status):
+            # PortAudio thread: de-interleave and hand off, nothing more
+            data = pcm.reshape(frames, channels).astype(np.float32) / 32768.0
+            for source in self._targets(device):
+                # A source added for a wider stream waits for that stream
+                if source.channel < channels:
+                    source._push(data[:, source.channel].copy())
+
+        if isinstance(device, str) and device.startswith("file:"):
+            return FileDevice(device[len("file:"):], channels, self.sample_rate,
+                              self.blocksize, callback, speed=self.file_speed)
+        return self.device_factory(device, channels, self.sample_rate, self.blocksize, callback)
+
+    def _targets(self, device):
+        with self._lock:
+            return [s for s in self._sources.values() if s.device == device and s.active]
+
+    def stats(self):
+        return [s.stats() for s in self.sources()]
+
+
+# ----------------------------------------------------
+# Offline check: python capture.py [wav files or globs]
+# Every file becomes a virtual device; all play at once.
+# ----------------------------------------------------
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    patterns = sys.argv[1:] or [os.path.join(here, "..", "PythonProject", "TranslationApp", "linein_*.wav")]
+    paths = [p for pattern in patterns for p in sorted(glob.glob(pattern))]
+
+    manager = CaptureManager(file_speed=0)
+    sources = [manager.add(f"src{i}", f"file:{path}") for i, path in enumerate(paths)]
+
+    def consume(source, results):
+        vad = VADSegmenter(sample_rate=source.sample_rate)
+        segments = []
+        source.open()
+        while not source.finished:
+            block = source.read(timeout=0.2)
+            if block is not None:
+                segments += vad.feed(block)
+        segments += vad.flush()
+        source.close()
+        results[source.name] = segments
+
+    results = {}
+    started = time.perf_counter()
+    threads = [threading.Thread(target=consume, args=(s, results)) for s in sources]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    for source, path in zip(sources, paths):
+        stats = source.stats()
+        print(f"{source.name} ({os.path.basename(path)}): {stats['seconds']}s captured, "
+              f"{len(results[source.name])} segments, {stats['overruns']} overruns")
+    print(f"\n{len(sources)} sources in {wall:.2f}s")
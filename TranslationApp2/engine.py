@@ -0,0 +1,434 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from asr import create_asr_backend
+from backends import build_chain
+from capture import CaptureManager, parse_sources
+import paths  # noqa: F401  (shared modules on sys.path)
+from db import ConnectionPool, SegmentStore, WriteBehindQueue, connect_factory
+from gpt_backend import PROMPT_VERSION, AsyncGPTTranslator
+from ipc import UnknownSession
+from metrics import MetricsRegistry
+from pipeline import FairPool
+from session import SessionManager, TranslationSession, new_recognizer
+from tracing import Tracer
+from translation_cache import TranslationCache, cache_key
+
+# Everything that owns threads, audio devices or models lives here, once
+# per deployment. app.py imports this module directly when it runs alone
+# (dev server); in production serve.py runs it in its own process and
+# the web workers reach it through ipc.py.
+
+load_dotenv()
+
+# Translation backends, tried in order: e.g. "gpt,nllb" falls back to
+# local NLLB when GPT fails or takes longer than TRANSLATION_TIMEOUT
+TRANSLATION_BACKENDS = os.getenv("TRANSLATION_BACKENDS", "gpt")
+GPT_MODEL = os.getenv("GPT_MODEL", "gpt-4o-mini")
+TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", 45))
+GPT_BUDGET = min(float(os.getenv("GPT_BUDGET", TRANSLATION_TIMEOUT - 1)), TRANSLATION_TIMEOUT - 1)
+
+# Async GPT client: bounded concurrency, retries on 429/5xx, and once all
+# GPT_CONCURRENCY slots are busy, segments arriving within GPT_COALESCE_MS
+# share one request (0 = off). All retries of a segment fit in
+# GPT_BUDGET seconds, which stays below TRANSLATION_TIMEOUT so GPT gives
+# up on its own before the chain abandons it.
+gpt = None
+if "gpt" in TRANSLATION_BACKENDS.split(","):
+    gpt = AsyncGPTTranslator(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        model=GPT_MODEL,
+        concurrency=int(os.getenv("GPT_CONCURRENCY", 4)),
+        max_retries=int(os.getenv("GPT_RETRIES", 4)),
+        timeout=float(os.getenv("GPT_TIMEOUT", 15)),
+        budget=GPT_BUDGET,
+        coalesce_window=float(os.getenv("GPT_COALESCE_MS", 150)) / 1000
+    )
+
+translation_chain = build_chain(TRANSLATION_BACKENDS, gpt=gpt, timeout=TRANSLATION_TIMEOUT)
+
+# Stream GPT replies so partial English reaches the UI token by token.
+# Streaming and coalescing combine: a segment streams while a request
+# slot is free and joins a coalesced batch (no partials) once all are busy.
+GPT_STREAM = os.getenv("GPT_STREAM", "1") == "1"
+
+# Repeated segments (headlines, intros, ad breaks) skip translation entirely.
+# Set TRANSLATION_CACHE="" to keep the cache in memory only.
+translation_cache = TranslationCache(
+    path=os.getenv("TRANSLATION_CACHE", os.path.join(os.path.dirname(__file__), "translation_cache.db")),
+    memory_size=int(os.getenv("CACHE_MEMORY_SIZE", 512)),
+    ttl=float(os.getenv("CACHE_TTL_HOURS", 168)) * 3600,
+    max_rows=int(os.getenv("CACHE_MAX_ROWS", 50000))
+)
+
+AUDIO_DEVICE_INDEX = int(os.getenv("AUDIO_DEVICE_INDEX", 2))
+
+recognizer = new_recognizer()
+
+# "listen": speech_recognition's pause heuristics (10 s phrase cap)
+# "vad":    vad.VADSegmenter picks split points from the audio itself
+SEGMENTER = os.getenv("SEGMENTER", "listen")
+
+# Pool sizes and per-session queue bounds for the shared ASR / translation pools
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", 2))
+TRANSLATE_WORKERS = int(os.getenv("TRANSLATE_WORKERS", 2))
+ASR_QUEUE_SIZE = int(os.getenv("ASR_QUEUE_SIZE", 16))
+TRANSLATE_QUEUE_SIZE = int(os.getenv("TRANSLATE_QUEUE_SIZE", 8))
+
+# "google" (network) or "whisper" (local faster-whisper, loaded once here)
+# and shared by every session
+asr_backend = create_asr_backend(os.getenv("ASR_BACKEND", "google"), recognizer, ASR_WORKERS)
+
+# One ASR pool and one translation pool, served round-robin across sessions
+asr_pool = FairPool("asr", workers=ASR_WORKERS, maxsize=ASR_QUEUE_SIZE).start()
+translate_pool = FairPool("translate", workers=TRANSLATE_WORKERS, maxsize=TRANSLATE_QUEUE_SIZE).start()
+
+# Several feeds in one process: CAPTURE_SOURCES="studio=2,feed2=7:1,test=file:clip.wav"
+# (name=device[:channel], or a WAV file as a virtual device). Each name is a
+# session whose audio comes through capture.py's callback layer.
+capture = CaptureManager(
+    sample_rate=int(os.getenv("CAPTURE_RATE", 16000)),
+    file_speed=float(os.getenv("CAPTURE_FILE_SPEED", 1))
+)
+for source_name, spec in parse_sources(os.getenv("CAPTURE_SOURCES", "")).items():
+    capture.add(source_name, spec)
+
+# Buffered Urdu is translated after this much silence
+SILENCE_FLUSH_SECONDS = 4
+
+# Per-segment stage timings → /metrics (Prometheus) and /stats (JSON).
+# TRACING=0 turns the per-segment part off; scrape-time gauges stay.
+metrics = MetricsRegistry()
+tracer = Tracer(metrics, enabled=os.getenv("TRACING", "1") == "1")
+
+for backend_name, histogram in translation_chain.latency.items():
+    metrics.register("backend_seconds", histogram, "Translation backend call", backend=backend_name)
+
+metrics.gauge("backend_calls", lambda: [
+    ({"backend": name, "outcome": outcome}, n)
+    for name, counts in translation_chain.counts().items()
+    for outcome, n in counts.items()
+], "Translation backend calls by outcome")
+
+metrics.gauge("queue_depth", lambda: [
+    ({"pool": pool["name"], "lane": lane["name"]}, lane["depth"])
+    for pool in (asr_pool.stats(), translate_pool.stats())
+    for lane in pool["lanes"]
+], "Items waiting per pool lane")
+
+metrics.gauge("cache_hit_rate", lambda: translation_cache.stats()["hit_rate"], "Translation cache hit rate")
+
+
+# ----------------------------------------------------
+# Database
+# ----------------------------------------------------
+INSERT_TRANSLATION = "INSERT INTO Translations (UrduText, EnglishText) VALUES (?, ?)"
+
+# DB_URL=sqlite:///translations.db runs against a local SQLite file instead
+db_pool = ConnectionPool(
+    connect_factory(),
+    max_size=int(os.getenv("DB_POOL_SIZE", 5)),
+    max_idle=int(os.getenv("DB_MAX_IDLE", 300))
+)
+
+# DB_WRITE_BEHIND=1: /save returns at once, rows are batched in the background
+db_writer = None
+if os.getenv("DB_WRITE_BEHIND", "0") == "1":
+    db_writer = WriteBehindQueue(
+        db_pool,
+        INSERT_TRANSLATION,
+        batch_size=int(os.getenv("DB_BATCH_SIZE", 50)),
+        flush_interval=float(os.getenv("DB_FLUSH_SECONDS", 2)),
+        spool_path=os.path.join(os.path.dirname(__file__), "db_spool.jsonl")
+    )
+
+# SAVE_SEGMENTS=0 turns off per-segment rows (only /save writes then)
+segment_store = None
+if os.getenv("SAVE_SEGMENTS", "1") == "1":
+    segment_store = SegmentStore(
+        db_pool,
+        batch_size=int(os.getenv("DB_BATCH_SIZE", 50)),
+        flush_interval=float(os.getenv("DB_FLUSH_SECONDS", 2)),
+        spool_path=os.path.join(os.path.dirname(__file__), "segments_spool.jsonl")
+    )
+
+
+def get_db():
+    """Pooled connection; use as `with get_db() as conn:`."""
+    return db_pool.connection()
+
+
+# ----------------------------------------------------
+# Translation (BBC Style, with fallback)
+# ----------------------------------------------------
+def translate_with_summary(urdu_text, on_partial=None):
+    """
+    Runs the backend chain. With on_partial (and GPT_STREAM on) a streaming
+    backend calls on_partial(english_so_far) as the English line arrives.
+    Returns (english, summary, backend_name).
+    """
+
+    print("\n==============================")
+    print("📝 Urdu Input:", urdu_text)
+    print("==============================")
+
+    english, summary, backend = translation_chain.translate(
+        urdu_text, on_partial if GPT_STREAM else None
+    )
+
+    print(f"📘 English ({backend}):", english)
+    print("📰 Summary:", summary)
+    print("==============================\n")
+
+    return english, summary, backend
+
+
+def translate_cached(urdu_text, on_partial=None):
+    """translate_with_summary() behind the translation cache → (english, summary)."""
+    key = cache_key(urdu_text, translation_chain.primary, PROMPT_VERSION)
+    cached = translation_cache.get(key)
+    if cached:
+        eng, summ = cached
+        return eng, summ
+
+    eng, summ, backend = translate_with_summary(urdu_text, on_partial)
+
+    # Only the primary backend's answers are cached; fallbacks are stopgaps
+    if eng and backend == translation_chain.primary:
+        translation_cache.put(key, (eng, summ))
+    return eng, summ
+
+
+def store_segment(segment):
+    # One row per segment, written in the background as it is produced
+    if segment_store is not None:
+        segment_store.add(segment["session"], segment["seq"], segment["urdu"],
+                          segment["english"], segment["summary"],
+                          started=segment["started"], ended=segment["ended"])
+
+
+# ----------------------------------------------------
+# Sessions: one capture → ASR → translation pipeline each
+# ----------------------------------------------------
+def recognize(audio):
+    return asr_backend.transcribe(audio)
+
+
+def new_session(name, device_index=None):
+    return TranslationSession(
+        name,
+        AUDIO_DEVICE_INDEX if device_index is None else device_index,
+        recognize=recognize,
+        translate=translate_cached,
+        on_segment=store_segment,
+        segmenter=SEGMENTER,
+        asr_workers=ASR_WORKERS,
+        translate_workers=TRANSLATE_WORKERS,
+        asr_queue_size=ASR_QUEUE_SIZE,
+        translate_queue_size=TRANSLATE_QUEUE_SIZE,
+        silence_flush=SILENCE_FLUSH_SECONDS,
+        dedupe_window=int(os.getenv("DEDUPE_WINDOW", 8)),
+        dedupe_threshold=float(os.getenv("DEDUPE_THRESHOLD", 0.8)),
+        source=capture.source(name),
+        asr_pool=asr_pool,
+        translate_pool=translate_pool,
+        tracer=tracer,
+        transcript_memory=int(float(os.getenv("TRANSCRIPT_MEMORY_MB", 8)) * 1024 * 1024),
+        transcript_dir=os.getenv("TRANSCRIPT_SPILL_DIR") or None
+    )
+
+
+sessions = SessionManager(new_session, max_sessions=int(os.getenv("MAX_SESSIONS", 8)),
+                          idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", 3600)))
+
+
+def find_session(name):
+    """Read routes only look sessions up; /start and /start_all create them."""
+    session = sessions.get(name)
+    if session is None:
+        raise UnknownSession(f"No session '{name}'; start it first")
+    return session
+
+metrics.gauge("sessions_running", lambda: sum(s.running for s in sessions.sessions()), "Running sessions")
+
+
+def pipeline_stats():
+    return {
+        "asr_backend": asr_backend.name,
+        "cache": translation_cache.stats(),
+        "backends": translation_chain.stats(),
+        "segments_db": segment_store.stats() if segment_store else None,
+        "pools": [asr_pool.stats(), translate_pool.stats()],
+        "capture": capture.stats(),
+        "sessions": sessions.stats()
+    }
+
+
+# ----------------------------------------------------
+# Engine (what the web routes call)
+# ----------------------------------------------------
+class Engine:
+    """
+    The operations behind the web routes, on plain arguments and return
+    values so they can be called in-process or through ipc.EngineManager.
+
+    Errors the routes turn into 4xx responses are raised as RuntimeError
+    (device in use, too many sessions) or ValueError (bad request); the
+    IPC proxy re-raises them in the web worker.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.pid = os.getpid()
+
+    # ---------- sessions ----------
+
+    def start(self, name, device=None):
+        session, started = sessions.start(name, device)
+        return {
+            "status": "started" if started else "already running",
+            "name": session.name,
+            "device": session.device_index,
+            "session": session.session_id
+        }
+
+    def stop(self, name):
+        # Threads still inside a slow ASR/translation call finish on their own
+        return sessions.stop(name)
+
+    def start_all(self):
+        """Start a session for every CAPTURE_SOURCES entry."""
+        started = {}
+        for source in capture.sources():
+            try:
+                session, _ = sessions.start(source.name)
+                started[source.name] = session.session_id
+            except RuntimeError as e:
+                started[source.name] = {"error": str(e)}
+        return started
+
+    def sessions(self):
+        return sessions.stats()
+
+    def session_id(self, name):
+        return find_session(name).session_id
+
+    # ---------- segments ----------
+
+    def latest(self, name, since=0):
+        stream = find_session(name).stream
+        return {
+            "session": stream.session_id,
+            "segments": stream.since(since),
+            "last_seq": stream.last_seq
+        }
+
+    def transcript(self, name, after=0, limit=50, start=None, end=None):
+        """TranscriptStore.range() of session `name`."""
+        session = find_session(name)
+        return dict(session.transcript.range(after, limit, start, end), session=session.session_id)
+
+    def search(self, name, query, limit=20, before=None):
+        """TranscriptStore.search() of session `name`."""
+        session = find_session(name)
+        return dict(session.transcript.search(query, limit, before), session=session.session_id, query=query)
+
+    def wait_updates(self, name, seq, session_id=None, partial_rev=0, timeout=15):
+        """SegmentStream.wait_updates() of session `name` (see segment_stream.sse_events)."""
+        return find_session(name).stream.wait_updates(seq, session_id, partial_rev, timeout)
+
+    def delivered(self, segments):
+        """/stream sent these segments to a browser."""
+        for segment in segments:
+            tracer.delivered(segment)
+
+    # ---------- stats ----------
+
+    def pipeline_stats(self):
+        return pipeline_stats()
+
+    def metrics_text(self):
+        return metrics.render_prometheus()
+
+    def stats(self):
+        return {"tracing": tracer.enabled, "metrics": metrics.snapshot()}
+
+    def tracing_enabled(self):
+        return tracer.enabled
+
+    # ---------- database ----------
+
+    def save_edits(self, session_id, edits):
+        if segment_store is None:
+            raise ValueError("segment storage is off (SAVE_SEGMENTS=0)")
+
+        missing = segment_store.save_edits(session_id, edits)
+        return {"saved": len(edits) - len(missing), "missing": missing}
+
+    def save_text(self, urdu, english):
+        if db_writer is not None:
+            db_writer.put((urdu, english))
+            return {"saved": True, "queued": True}
+
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(INSERT_TRANSLATION, (urdu, english))
+            conn.commit()
+        return {"saved": True}
+
+    def test_db(self):
+        with get_db() as conn:
+            conn.cursor().execute("SELECT 1").fetchall()
+        return {
+            "db": "connected",
+            "pool": db_pool.stats(),
+            "writer": db_writer.stats() if db_writer else None
+        }
+
+    def saved_segments(self, session_id):
+        if segment_store is None:
+            raise ValueError("segment storage is off (SAVE_SEGMENTS=0)")
+
+        segment_store.writer.flush()
+        return {"session": session_id, "segments": segment_store.load(session_id)}
+
+    # ---------- health ----------
+
+    def health(self):
+        """Liveness: answers as long as the engine process is serving calls."""
+        return {
+            "status": "alive",
+            "pid": self.pid,
+            "uptime": round(time.time() - self.started_at, 1),
+            "threads": threading.active_count(),
+            "sessions_running": sum(s.running for s in sessions.sessions())
+        }
+
+    def ready(self):
+        """Readiness: models loaded (at import) and every pool worker still running."""
+        checks = {
+            "asr_backend": asr_backend.name,
+            "translation": translation_chain.name,
+            "asr_pool": asr_pool.stats()["alive"] == asr_pool.workers,
+            "translate_pool": translate_pool.stats()["alive"] == translate_pool.workers,
+            "capture_errors": {s.name: s.capture_error for s in sessions.sessions() if s.capture_error}
+        }
+        return {"ready": checks["asr_pool"] and checks["translate_pool"], "checks": checks}
+
+    def warm_up(self):
+        """Load what is otherwise loaded on first use, so the first segment doesn't wait."""
+        if gpt is not None:
+            gpt.connect()
+
+    def shutdown(self, timeout=5):
+        """Stop every session, flush pending DB rows and remove transcript spill files."""
+        lingering = sessions.stop_all(timeout)
+        for writer in (db_writer, segment_store.writer if segment_store else None):
+            if writer is not None:
+                writer.close(timeout)
+        asr_pool.stop(timeout)
+        translate_pool.stop(timeout)
+        for session in sessions.sessions():
+            session.transcript.close()
+        return lingering
@@ -0,0 +1,412 @@
+import asyncio
+import json
+import random
+import threading
+
+PROMPT_VERSION = "bbc-v1"
+
+
+# ----------------------------------------------------
+# Prompts
+# ----------------------------------------------------
+def build_prompt(urdu_text):
+    return f"""
+You are a senior BBC journalist and translator.
+
+TASK 1 → Translate the Urdu text into professional, concise **BBC News English**.
+TASK 2 → Produce a **1–2 sentence BBC-style summary**.
+
+STRICT FORMAT:
+English: <translation>
+Summary: <summary>
+
+Urdu:
+{urdu_text}
+"""
+
+
+def build_batch_prompt(urdu_texts):
+    numbered = "\n".join(
+        json.dumps({"id": i, "urdu": text}, ensure_ascii=False)
+        for i, text in enumerate(urdu_texts, 1)
+    )
+
+    return f"""
+You are a senior BBC journalist and translator.
+
+Below are several separate Urdu segments, one JSON object per line.
+For EACH segment:
+TASK 1 → Translate the Urdu text into professional, concise **BBC News English**.
+TASK 2 → Produce a **1–2 sentence BBC-style summary**.
+
+Treat segments independently. Reply with JSON only, in this shape:
+{{"segments": [{{"id": <id>, "english": "<translation>", "summary": "<summary>"}}]}}
+
+Segments:
+{numbered}
+"""
+
+
+def parse_reply(out):
+    english, summary = "", ""
+    for line in out.strip().split("\n"):
+        if line.startswith("English:"):
+            english = line.replace("English:", "").strip()
+        if line.startswith("Summary:"):
+            summary = line.replace("Summary:", "").strip()
+    return english, summary
+
+
+def parse_batch_reply(out, count):
+    """Map a batch JSON reply back to segment ids 1..count. Missing ids are absent."""
+    results = {}
+    try:
+        data = json.loads(out)
+    except ValueError:
+        return results
+
+    for item in data.get("segments", []) if isinstance(data, dict) else []:
+        try:
+            seg_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if 1 <= seg_id <= count:
+            results[seg_id] = (
+                str(item.get("english", "")).strip(),
+                str(item.get("summary", "")).strip()
+            )
+    return results
+
+
+class StreamingReplyParser:
+    """
+    Incremental parser for the "English: ... / Summary: ..." reply.
+
+    feed() takes each streamed chunk and returns the English text seen so
+    far whenever it has grown, otherwise None. The English field is one
+    line, so it ends at the first newline after "English:".
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.text = ""
+        self.english = ""
+        self._english_done = False
+
+    def feed(self, delta):
+        self.text += delta
+        if self._english_done:
+            return None
+
+        start = self.text.find("English:")
+        if start < 0:
+            return None
+
+        body = self.text[start + len("English:"):]
+        end = body.find("\n")
+        if end >= 0:
+            body = body[:end]
+            self._english_done = True
+
+        english = body.strip()
+        if english == self.english:
+            return None
+
+        self.english = english
+        return english
+
+
+def is_retryable(error):
+    import openai
+
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, openai.RateLimitError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+
+def retry_after(error):
+    """Seconds from a Retry-After header, if the server sent one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# ----------------------------------------------------
+# Async GPT Translator
+# ----------------------------------------------------
+class AsyncGPTTranslator:
+    """
+    AsyncOpenAI backend running on its own event loop thread.
+
+    - at most `concurrency` requests are in flight at once
+    - 429 / 5xx / timeouts are retried with exponential backoff (honouring
+      Retry-After), all attempts together within `budget` seconds
+    - a segment goes out at once while a request slot is free; once all
+      are busy, segments submitted within `coalesce_window` seconds of
+      each other are sent as one multi-segment JSON prompt and split
+      back up. Streamed requests follow the same rule: under load a
+      segment joins a batch (no partials) instead of streaming.
+
+    Worker threads call translate(), which blocks until the result is in.
+    """
+
+    def __init__(self, api_key=None, model="gpt-4o-mini", concurrency=4,
+                 max_retries=4, timeout=30.0, backoff=0.5,
+                 coalesce_window=0.15, max_batch=6, base_url=None, budget=None):
+        self.model = model
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.budget = budget
+        self.backoff = backoff
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+        self._client_args = {"api_key": api_key, "base_url": base_url}
+        self._client = None
+        self._client_lock = threading.Lock()
+
+        self._pending = []
+        self._flush_handle = None
+        self._in_flight = 0     # _complete() calls running, retries included
+
+        self.requests = 0
+        self.retries = 0
+        self.coalesced = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name="gpt-loop", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._ready.set()
+        self._loop.run_forever()
+
+    @property
+    def client(self):
+        """
+        The AsyncOpenAI client, built on first use: importing openai takes
+        most of a second, which app startup shouldn't pay for. connect()
+        builds it up front instead (and raises on a missing API key).
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import AsyncOpenAI
+
+                    # Retries are ours, so the SDK's own retry loop is off
+                    self._client = AsyncOpenAI(timeout=self.timeout, max_retries=0, **self._client_args)
+        return self._client
+
+    def connect(self):
+        """Build the client now rather than on the first request."""
+        return self.client
+
+    # ---------- public (thread-safe) ----------
+
+    def submit(self, urdu_text):
+        """Returns a concurrent.futures.Future of (english, summary)."""
+        return asyncio.run_coroutine_threadsafe(self.translate_async(urdu_text), self._loop)
+
+    def translate(self, urdu_text):
+        return self.submit(urdu_text).result()
+
+    def translate_stream(self, urdu_text, on_partial):
+        """
+        Stream the reply, calling on_partial(english_so_far) as the English
+        line grows. Returns the final (english, summary). When every
+        request slot is busy it is coalesced like translate() instead, and
+        on_partial is not called. on_partial runs on the event loop
+        thread, so keep it quick.
+        """
+        coro = self.translate_stream_async(urdu_text, on_partial)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self):
+        async def _shutdown():
+            await self._client.close()
+
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(_shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    # ---------- event loop side ----------
+
+    def _busy(self):
+        """Something is already waiting, or every request slot is taken."""
+        return bool(self._pending) or self._in_flight >= self.concurrency
+
+    def _deadline(self):
+        return None if self.budget is None else self._loop.time() + self.budget
+
+    async def translate_async(self, urdu_text):
+        # Nothing to share a request with: don't hold it for the window
+        if self.coalesce_window <= 0 or not self._busy():
+            return await self._translate_one(urdu_text, self._deadline())
+
+        future = self._loop.create_future()
+        self._pending.append((urdu_text, future, self._deadline()))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush_pending()
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.coalesce_window, self._flush_pending)
+
+        return await future
+
+    def _flush_pending(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            self._loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        texts = [text for text, _, _ in batch]
+        # The oldest segment's budget covers the batch and any re-sends
+        deadlines = [d for _, _, d in batch if d is not None]
+        deadline = min(deadlines) if deadlines else None
+
+        try:
+            if len(batch) == 1:
+                results = {1: await self._translate_one(texts[0], deadline)}
+            else:
+                print(f"📦 Coalesced {len(batch)} segments into one GPT call")
+                self.coalesced += len(batch)
+                results = await self._translate_many(texts, deadline)
+
+                # Anything the model dropped gets its own request
+                missing = [i for i in range(1, len(texts) + 1) if i not in results]
+                if missing:
+                    redo = await asyncio.gather(*(self._translate_one(texts[i - 1], deadline) for i in missing))
+                    results.update(zip(missing, redo))
+        except Exception as e:
+            print("❌ GPT ERROR:", e)
+            results = {}
+
+        for i, (_, future, _) in enumerate(batch, 1):
+            if not future.done():
+                future.set_result(results.get(i, ("", "")))
+
+    async def _translate_one(self, urdu_text, deadline=None):
+        try:
+            out = await self._complete(build_prompt(urdu_text), deadline=deadline)
+        except Exception as e:
+            print("❌ GPT ERROR:", e)
+            return "", ""
+        return parse_reply(out)
+
+    async def _translate_many(self, urdu_texts, deadline=None):
+        out = await self._complete(
+            build_batch_prompt(urdu_texts),
+            deadline=deadline,
+            response_format={"type": "json_object"}
+        )
+        return parse_batch_reply(out, len(urdu_texts))
+
+    async def _complete(self, prompt, on_delta=None, deadline=None, **extra):
+        """
+        One chat completion with retries. With on_delta the reply is
+        streamed: on_delta(None) marks the start of each attempt, then
+        on_delta(text) is called for every content chunk. No attempt or
+        backoff runs past `deadline` (event loop time).
+        """
+        self._in_flight += 1
+        try:
+            attempt = 0
+            while True:
+                timeout = self.timeout
+                if deadline is not None:
+                    timeout = min(timeout, deadline - self._loop.time())
+                    if timeout <= 0:
+                        raise asyncio.TimeoutError("GPT retry budget used up")
+                try:
+                    async with self._semaphore:
+                        self.requests += 1
+                        if on_delta is not None:
+                            return await asyncio.wait_for(
+                                self._stream(prompt, on_delta, **extra),
+                                timeout=timeout
+                            )
+
+                        resp = await asyncio.wait_for(
+                            self.client.chat.completions.create(
+                                model=self.model,
+                                messages=[{"role": "user", "content": prompt}],
+                                **extra
+                            ),
+                            timeout=timeout
+                        )
+                    return resp.choices[0].message.content or ""
+
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        raise
+
+                    delay = retry_after(e) or self.backoff * (2 ** attempt)
+                    delay += random.uniform(0, delay / 4)
+                    if deadline is not None and self._loop.time() + delay >= deadline:
+                        raise
+                    attempt += 1
+                    self.retries += 1
+                    print(f"⏳ GPT retry {attempt}/{self.max_retries} in {delay:.1f}s:", e)
+                    await asyncio.sleep(delay)
+        finally:
+            self._in_flight -= 1
+
+    async def _stream(self, prompt, on_delta, **extra):
+        on_delta(None)
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            **extra
+        )
+
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+        return "".join(parts)
+
+    async def translate_stream_async(self, urdu_text, on_partial):
+        # Every slot busy: one coalesced request beats several more streams
+        if self.coalesce_window > 0 and self._busy():
+            return await self.translate_async(urdu_text)
+
+        parser = StreamingReplyParser()
+
+        def on_delta(delta):
+            if delta is None:
+                parser.reset()
+                return
+            english = parser.feed(delta)
+            if english is not None:
+                on_partial(english)
+
+        try:
+            out = await self._complete(build_prompt(urdu_text), on_delta=on_delta, deadline=self._deadline())
+        except Exception as e:
+            print("❌ GPT ERROR:", e)
+            return "", ""
+        return parse_reply(out)
@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+import secrets
+import tempfile
+import threading
+import time
+from multiprocessing.managers import BaseManager, BaseProxy, RemoteError
+
+# Where the engine listens: "127.0.0.1:50555", a Unix socket path, or a
+# Windows named pipe (r"\\.\pipe\translation-engine"). Only local
+# addresses make sense; the authkey keeps other local users out.
+DEFAULT_ADDRESS = "127.0.0.1:50555"
+
+# Shared secret for the engine connection: ENGINE_AUTHKEY, or else a random
+# key the engine writes to this file (owner-only) on its first start and
+# the web workers read. On Windows the file takes the folder's ACL, so keep
+# the app folder readable only by the app pool and service accounts.
+AUTHKEY_FILE = os.getenv("ENGINE_AUTHKEY_FILE",
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), ".engine_authkey"))
+
+# Engine methods that only read state. These are retried on a fresh
+# connection after a RemoteError; anything else (start, stop, save_edits,
+# save_text...) may already have run, so its error goes to the caller.
+SAFE_TO_RETRY = frozenset({
+    "sessions", "session_id", "latest", "transcript", "search", "wait_updates",
+    "pipeline_stats", "metrics_text", "stats", "tracing_enabled", "test_db",
+    "saved_segments", "health", "ready"
+})
+
+
+def parse_address(value):
+    """"host:port" → (host, port); anything else (socket path, pipe) as is."""
+    value = (value or DEFAULT_ADDRESS).strip()
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit() and not value.startswith("\\\\"):
+        return host or "127.0.0.1", int(port)
+    return value
+
+
+def read_authkey(path=None):
+    """The key from ENGINE_AUTHKEY or the key file; None if there is none yet."""
+    key = os.getenv("ENGINE_AUTHKEY")
+    if key:
+        return key.encode()
+    try:
+        with open(path or AUTHKEY_FILE, encoding="ascii") as f:
+            return f.read().strip().encode() or None
+    except FileNotFoundError:
+        return None
+
+
+def create_authkey(path=None):
+    """Engine side: the existing key, or a new random one written with mode 0600."""
+    key = read_authkey(path)
+    if key is not None:
+        return key
+
+    path = path or AUTHKEY_FILE
+    # mkstemp creates the file 0600; the rename makes it appear complete
+    fd, tmp = tempfile.mkstemp(prefix=".engine_authkey-", dir=os.path.dirname(path) or ".")
+    with os.fdopen(fd, "w", encoding="ascii") as f:
+        f.write(secrets.token_hex(32))
+    os.replace(tmp, path)
+    print(f"🔑 Wrote a new engine key to {path}")
+    return read_authkey(path)
+
+
+class EngineManager(BaseManager):
+    """multiprocessing manager that serves one Engine object to the web workers."""
+
+
+class EngineUnavailable(ConnectionError):
+    """The engine process can't be reached (not started yet, or restarting)."""
+
+
+class UnknownSession(LookupError):
+    """No session by that name: it was never started, or was evicted."""
+
+
+# ----------------------------------------------------
+# Engine side
+# ----------------------------------------------------
+def serve_engine(engine, address=None):
+    """Serve `engine` until the process is stopped. Blocks."""
+    EngineManager.register("engine", callable=lambda: engine)
+    manager = EngineManager(address=parse_address(address), authkey=create_authkey())
+    server = manager.get_server()
+    print(f"✔ Engine serving on {server.address} (pid {os.getpid()})")
+    server.serve_forever()
+
+
+# ----------------------------------------------------
+# Web side
+# ----------------------------------------------------
+class EngineClient:
+    """
+    Calls Engine methods in the engine process: client.start("default").
+
+    Connects on first use and reconnects after the engine restarts. A
+    call that can't reach the engine raises EngineUnavailable; errors
+    raised by the engine itself (RuntimeError, ValueError) come through
+    unchanged. Only SAFE_TO_RETRY methods are retried after a failure.
+    Safe to share between request threads: the proxy opens one
+    connection per thread.
+    """
+
+    def __init__(self, address=None, retry_interval=1.0):
+        self.address = parse_address(address)
+        self.retry_interval = retry_interval
+        self._proxy = None
+        self._lock = threading.Lock()
+        self._failed_at = 0.0
+
+    def _connect(self):
+        with self._lock:
+            if self._proxy is not None:
+                return self._proxy
+            # Don't hammer a dead engine from every request thread
+            if time.monotonic() - self._failed_at < self.retry_interval:
+                raise EngineUnavailable(f"Engine at {self.address} is not reachable")
+
+            key = read_authkey()
+            if key is None:
+                self._failed_at = time.monotonic()
+                raise EngineUnavailable(f"No engine key: set ENGINE_AUTHKEY or start the engine "
+                                        f"to create {AUTHKEY_FILE}")
+
+            EngineManager.register("engine")
+            manager = EngineManager(address=self.address, authkey=key)
+            try:
+                manager.connect()
+                self._proxy = manager.engine()
+            except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+                self._failed_at = time.monotonic()
+                raise EngineUnavailable(f"Engine at {self.address} is not reachable: {e}") from e
+            return self._proxy
+
+    def _reset(self, proxy):
+        with self._lock:
+            if self._proxy is proxy:
+                self._proxy = None
+                # Proxies share their per-thread connections by address;
+                # drop them so the next proxy doesn't reuse dead sockets
+                BaseProxy._address_to_local.pop(proxy._token.address, None)
+
+    def call(self, method, *args, **kwargs):
+        attempts = 2 if method in SAFE_TO_RETRY else 1
+        for attempt in range(1, attempts + 1):
+            proxy = self._connect()
+            try:
+                return proxy._callmethod(method, args, kwargs)
+            except RemoteError as e:
+                # Usually a restarted engine that doesn't know the old
+                # proxy, but the call may also have failed part way through
+                self._reset(proxy)
+                if attempt < attempts:
+                    continue
+                if attempts == 1:
+                    raise EngineUnavailable(f"{method} did not complete on the engine "
+                                            f"(not retried): {e}") from e
+                raise
+            except (OSError, EOFError) as e:
+                # Engine went away mid-call; the next call reconnects
+                self._reset(proxy)
+                raise EngineUnavailable(f"Lost the engine at {self.address}: {e}") from e
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return lambda *args, **kwargs: self.call(method, *args, **kwargs)
+
+    def wait_ready(self, timeout=300, interval=0.5):
+        """Block until the engine answers ready(); False on timeout."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if self.call("ready")["ready"]:
+                    return True
+            except EngineUnavailable:
+                pass
+            time.sleep(interval)
+        return False
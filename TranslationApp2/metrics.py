@@ -0,0 +1,189 @@
+import bisect
+import threading
+
+# Seconds: 10 ms … 60 s, roughly ×2 per step
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# ----------------------------------------------------
+# Latency Histogram
+# ----------------------------------------------------
+class Histogram:
+    """
+    Fixed-bucket histogram (Prometheus style: bucket i counts values <= bound i).
+
+    observe() is a bisect plus two additions under a lock. quantile()
+    interpolates inside the bucket, which is accurate enough to compare
+    backends and spot regressions.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)   # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if total == 0:
+            return 0.0
+
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if c and seen + c >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / c
+            seen += c
+        return self.bounds[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+            "p50": round(self.quantile(0.50), 4),
+            "p95": round(self.quantile(0.95), 4),
+            "p99": round(self.quantile(0.99), 4)
+        }
+
+
+# ----------------------------------------------------
+# Counter
+# ----------------------------------------------------
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ----------------------------------------------------
+# Metrics Registry (Prometheus text + JSON)
+# ----------------------------------------------------
+class MetricsRegistry:
+    """
+    Histograms and counters by name and label set, plus gauges read at
+    scrape time. render_prometheus() is the text exposition format for
+    /metrics; snapshot() is the same data as JSON for /stats.
+    """
+
+    def __init__(self, prefix="translation_"):
+        self.prefix = prefix
+        self._series = {}    # name → {"type", "help", "series": {labels: metric}}
+        self._gauges = {}    # name → (help, fn)
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help, labels, make):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._series.get(name)
+            if family is None:
+                family = self._series[name] = {"type": kind, "help": help, "series": {}}
+            metric = family["series"].get(key)
+            if metric is None:
+                metric = family["series"][key] = make()
+            return metric
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS, **labels):
+        return self._get("histogram", name, help, labels, lambda: Histogram(buckets))
+
+    def counter(self, name, help="", **labels):
+        return self._get("counter", name, help, labels, Counter)
+
+    def register(self, name, histogram, help="", **labels):
+        """Expose a Histogram that lives elsewhere (e.g. FallbackChain.latency)."""
+        return self._get("histogram", name, help, labels, lambda: histogram)
+
+    def gauge(self, name, fn, help=""):
+        """fn() → a number, or a list of (labels dict, number)."""
+        with self._lock:
+            self._gauges[name] = (help, fn)
+
+    def _families(self):
+        with self._lock:
+            return [(name, f["type"], f["help"], list(f["series"].items()))
+                    for name, f in self._series.items()]
+
+    def _gauge_values(self):
+        with self._lock:
+            gauges = list(self._gauges.items())
+        for name, (help, fn) in gauges:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if not isinstance(value, list):
+                value = [({}, value)]
+            yield name, help, [(tuple(sorted(labels.items())), v) for labels, v in value]
+
+    def render_prometheus(self):
+        lines = []
+        for name, kind, help, series in self._families():
+            full = self.prefix + name
+            if help:
+                lines.append(f"# HELP {full} {help}")
+            lines.append(f"# TYPE {full} {kind}")
+
+            for labels, metric in series:
+                if kind == "counter":
+                    lines.append(f"{full}{_label_text(labels)} {metric.value}")
+                    continue
+
+                with metric._lock:
+                    counts, total, value_sum = list(metric.counts), metric.count, metric.sum
+                cumulative = 0
+                for bound, c in zip(metric.bounds + (float("inf"),), counts):
+                    cumulative += c
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    lines.append(f"{full}_bucket{_label_text(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{full}_sum{_label_text(labels)} {_number(value_sum)}")
+                lines.append(f"{full}_count{_label_text(labels)} {total}")
+
+        for name, help, values in self._gauge_values():
+            full = self.prefix + name
+            if help:
+                lines.append(f"# HELP {full} {help}")
+            lines.append(f"# TYPE {full} gauge")
+            for labels, value in values:
+                lines.append(f"{full}{_label_text(labels)} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        out = {}
+        for name, kind, _, series in self._families():
+            out[name] = {
+                ",".join(f"{k}={v}" for k, v in labels) or "all":
+                    metric.value if kind == "counter" else metric.snapshot()
+                for labels, metric in series
+            }
+        for name, _, values in self._gauge_values():
+            out[name] = {",".join(f"{k}={v}" for k, v in labels) or "all": value for labels, value in values}
+        return out
@@ -0,0 +1,14 @@
+import os
+import sys
+
+# Modules shared with the other apps live outside this folder:
+#   common/                        DB pool and writers, translation cache, duplicate filter
+#   PythonProject/TranslationApp   NLLB translators (nllb_ct2, nllb_service)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMON_DIR = os.path.join(ROOT, "common")
+PYTHON_PROJECT_DIR = os.path.join(ROOT, "PythonProject", "TranslationApp")
+
+# Appended, so a module in this folder always wins over a shared one
+for folder in (COMMON_DIR, PYTHON_PROJECT_DIR):
+    if folder not in sys.path:
+        sys.path.append(folder)
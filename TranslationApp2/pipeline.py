@@ -0,0 +1,385 @@
+import threading
+import time
+from collections import deque
+from queue import Queue, Empty, Full
+
+_STOP = object()
+
+
+# ----------------------------------------------------
+# Pipeline Stage (bounded queue + worker pool)
+# ----------------------------------------------------
+class Stage:
+    """
+    A pool of worker threads fed by a bounded queue.
+
+    put() blocks when the queue is full, so a slow stage pushes back on
+    the one before it instead of letting memory grow; offer() is the
+    non-blocking form for callers that must not wait. Each item carries a
+    sequence number; results are handed to on_result(seq, result) in
+    whatever order the workers finish (use a Reorderer to restore order).
+    A failed item is reported as None so downstream ordering never stalls.
+    """
+
+    def __init__(self, name, func, on_result, workers=1, maxsize=8):
+        self.name = name
+        self.func = func
+        self.on_result = on_result
+        self.workers = workers
+        self.queue = Queue(maxsize=maxsize)
+        self._threads = []
+        self._lock = threading.Lock()
+
+        self.processed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.max_depth = 0
+        self.blocked_puts = 0
+        self.service_time = 0.0
+        self.wait_time = 0.0
+        self.started_at = None
+        self._recent = deque(maxlen=200)
+
+    def start(self):
+        self.started_at = time.time()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def put(self, seq, item, timeout=None):
+        entry = (seq, item, time.monotonic())
+        try:
+            self.queue.put_nowait(entry)
+        except Full:
+            with self._lock:
+                self.blocked_puts += 1
+            self.queue.put(entry, timeout=timeout)
+
+        with self._lock:
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def offer(self, seq, item):
+        """put() without waiting: False (and nothing queued) if the queue is full."""
+        try:
+            self.queue.put_nowait((seq, item, time.monotonic()))
+        except Full:
+            return False
+        with self._lock:
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def stop(self, timeout=5):
+        """Drop pending items and join the workers."""
+        while True:
+            try:
+                self.queue.get_nowait()
+            except Empty:
+                break
+
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for t in self._threads:
+            t.join(timeout)
+        # Anything still alive is stuck in func(); keep it visible
+        self._threads = [t for t in self._threads if t.is_alive()]
+
+    @property
+    def threads(self):
+        return list(self._threads)
+
+    def _work(self):
+        while True:
+            entry = self.queue.get()
+            if entry is _STOP:
+                return
+
+            seq, item, enqueued = entry
+            started = time.monotonic()
+            with self._lock:
+                self.in_flight += 1
+                self.wait_time += started - enqueued
+
+            try:
+                result = self.func(item)
+                ok = True
+            except Exception as e:
+                print(f"❌ {self.name} error:", e)
+                result = None
+                ok = False
+
+            finished = time.monotonic()
+            with self._lock:
+                self.in_flight -= 1
+                self.service_time += finished - started
+                if ok:
+                    self.processed += 1
+                else:
+                    self.failed += 1
+                self._recent.append(finished)
+
+            self.on_result(seq, result)
+
+    def stats(self):
+        with self._lock:
+            done = self.processed + self.failed
+            recent = list(self._recent)
+            stats = {
+                "name": self.name,
+                "workers": self.workers,
+                "depth": self.queue.qsize(),
+                "capacity": self.queue.maxsize,
+                "max_depth": self.max_depth,
+                "in_flight": self.in_flight,
+                "processed": self.processed,
+                "failed": self.failed,
+                "blocked_puts": self.blocked_puts,
+                "avg_service_ms": round(1000 * self.service_time / done, 1) if done else 0.0,
+                "avg_wait_ms": round(1000 * self.wait_time / done, 1) if done else 0.0,
+            }
+
+        # Items/second over the most recent completions
+        if len(recent) >= 2 and recent[-1] > recent[0]:
+            stats["throughput_per_s"] = round((len(recent) - 1) / (recent[-1] - recent[0]), 3)
+        else:
+            stats["throughput_per_s"] = 0.0
+        return stats
+
+
+# ----------------------------------------------------
+# Fair shared pool (one worker pool, many sources)
+# ----------------------------------------------------
+class FairPool:
+    """
+    One worker pool shared by several sources.
+
+    Each source gets a Lane with its own bounded queue; workers serve the
+    lanes round-robin, one item at a time, so a busy feed cannot starve
+    a quiet one and the total worker count stays fixed however many
+    sources are live. A Lane has the same start/put/offer/stop/stats
+    shape as a Stage, so a session can use either.
+
+    on_result runs on the shared workers, so it must not block on
+    another full lane (use offer()): a worker stuck there is lost to
+    every other source.
+    """
+
+    def __init__(self, name, workers=2, maxsize=8):
+        self.name = name
+        self.workers = workers
+        self.maxsize = maxsize
+        self._lanes = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._closed = False
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def lane(self, key, func, on_result):
+        lane = Lane(self, key, func, on_result, self.maxsize)
+        with self._cond:
+            self._lanes.append(lane)
+        return lane
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = [t for t in self._threads if t.is_alive()]
+
+    def _remove(self, lane):
+        with self._cond:
+            if lane in self._lanes:
+                self._lanes.remove(lane)
+
+    def _next(self):
+        """Next (lane, entry), taking lanes in turn; None once the pool is closed."""
+        with self._cond:
+            while not self._closed:
+                for _ in range(len(self._lanes)):
+                    lane = self._lanes[0]
+                    self._lanes.rotate(-1)
+                    if lane._items:
+                        entry = lane._items.popleft()
+                        lane.in_flight += 1
+                        self._cond.notify_all()   # room for a blocked put()
+                        return lane, entry
+                self._cond.wait()
+            return None
+
+    def _work(self):
+        while True:
+            job = self._next()
+            if job is None:
+                return
+            lane, (seq, item, enqueued) = job
+            lane._run(seq, item, enqueued)
+
+    def stats(self):
+        with self._cond:
+            lanes = list(self._lanes)
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "alive": sum(t.is_alive() for t in self._threads),
+            "lanes": [lane.stats() for lane in lanes]
+        }
+
+
+class Lane:
+    """One source's queue in a FairPool (see FairPool)."""
+
+    def __init__(self, pool, key, func, on_result, maxsize):
+        self.pool = pool
+        self.name = f"{pool.name}:{key}"
+        self.func = func
+        self.on_result = on_result
+        self.maxsize = maxsize
+        self._items = deque()   # guarded by pool._cond
+        self._closed = False
+
+        self.processed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.max_depth = 0
+        self.blocked_puts = 0
+        self.service_time = 0.0
+        self.wait_time = 0.0
+
+    @property
+    def threads(self):
+        # The workers belong to the pool
+        return []
+
+    def start(self):
+        pass
+
+    def put(self, seq, item, timeout=None):
+        cond = self.pool._cond
+        with cond:
+            if len(self._items) >= self.maxsize:
+                self.blocked_puts += 1
+                cond.wait_for(lambda: self._closed or len(self._items) < self.maxsize, timeout)
+            self._append(seq, item)
+
+    def offer(self, seq, item):
+        """put() without waiting: False if the lane is full. A closed lane drops it."""
+        with self.pool._cond:
+            if not self._closed and len(self._items) >= self.maxsize:
+                return False
+            self._append(seq, item)
+            return True
+
+    def _append(self, seq, item):
+        # Caller holds pool._cond
+        if self._closed:
+            return
+        self._items.append((seq, item, time.monotonic()))
+        self.max_depth = max(self.max_depth, len(self._items))
+        self.pool._cond.notify_all()
+
+    def stop(self, timeout=5):
+        """Drop pending items, wait for the ones being worked on, leave the pool."""
+        cond = self.pool._cond
+        with cond:
+            self._closed = True
+            self._items.clear()
+            cond.notify_all()
+            cond.wait_for(lambda: self.in_flight == 0, timeout)
+        self.pool._remove(self)
+
+    def _run(self, seq, item, enqueued):
+        started = time.monotonic()
+        try:
+            result = self.func(item)
+            ok = True
+        except Exception as e:
+            print(f"❌ {self.name} error:", e)
+            result = None
+            ok = False
+        finished = time.monotonic()
+
+        try:
+            self.on_result(seq, result)
+        finally:
+            with self.pool._cond:
+                self.in_flight -= 1
+                self.wait_time += started - enqueued
+                self.service_time += finished - started
+                if ok:
+                    self.processed += 1
+                else:
+                    self.failed += 1
+                self.pool._cond.notify_all()
+
+    def stats(self):
+        with self.pool._cond:
+            done = self.processed + self.failed
+            return {
+                "name": self.name,
+                "depth": len(self._items),
+                "capacity": self.maxsize,
+                "max_depth": self.max_depth,
+                "in_flight": self.in_flight,
+                "processed": self.processed,
+                "failed": self.failed,
+                "blocked_puts": self.blocked_puts,
+                "avg_service_ms": round(1000 * self.service_time / done, 1) if done else 0.0,
+                "avg_wait_ms": round(1000 * self.wait_time / done, 1) if done else 0.0,
+            }
+
+
+# ----------------------------------------------------
+# Reorder Buffer
+# ----------------------------------------------------
+class Reorderer:
+    """
+    Release results strictly in sequence order.
+
+    Workers finish out of order; push() parks early results until the
+    gap before them is filled, then calls emit(seq, result) for each one
+    in turn. emit runs under the reorderer's lock, so it is never called
+    concurrently.
+    """
+
+    def __init__(self, emit, first_seq=1):
+        self.emit = emit
+        self.next_seq = first_seq
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def push(self, seq, result):
+        with self._lock:
+            self._pending[seq] = result
+            while self.next_seq in self._pending:
+                value = self._pending.pop(self.next_seq)
+                try:
+                    self.emit(self.next_seq, value)
+                finally:
+                    self.next_seq += 1
+
+    @property
+    def waiting(self):
+        with self._lock:
+            return len(self._pending)
+
+
+class SequenceCounter:
+    """Thread-safe 1, 2, 3, ... counter for tagging items."""
+
+    def __init__(self, first=1):
+        self._next = first
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            value = self._next
+            self._next += 1
+            return value
@@ -0,0 +1,78 @@
+import threading
+import time
+
+
+# ----------------------------------------------------
+# Deadline Timer (silence flush)
+# ----------------------------------------------------
+class DeadlineTimer:
+    """
+    One re-armable deadline served by a single background thread.
+
+    arm(delay) moves the deadline to now + delay, cancel() clears it.
+    When nothing is armed the thread sleeps on a condition variable,
+    so an idle session costs no CPU. The callback runs on the timer
+    thread at the deadline, not on the next poll.
+    """
+
+    def __init__(self, callback, name="deadline-timer"):
+        self.callback = callback
+        self.name = name
+        self._cond = threading.Condition()
+        self._deadline = None
+        self._closed = False
+        self._thread = None
+
+    def arm(self, delay):
+        with self._cond:
+            if self._closed:
+                return
+            self._deadline = time.monotonic() + delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self):
+        with self._cond:
+            self._deadline = None
+            self._cond.notify()
+
+    @property
+    def thread(self):
+        return self._thread
+
+    @property
+    def armed(self):
+        with self._cond:
+            return self._deadline is not None
+
+    def close(self, timeout=None):
+        with self._cond:
+            self._closed = True
+            self._deadline = None
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._deadline is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                if self._closed:
+                    return
+                self._deadline = None
+
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"❌ {self.name} callback error:", e)
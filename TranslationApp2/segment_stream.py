@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+
+# ----------------------------------------------------
+# Segment Stream (ring buffer feeding /stream)
+# ----------------------------------------------------
+class SegmentStream:
+    """
+    Bounded ring buffer of translated segments.
+
+    Every segment gets a sequence number. Readers never remove anything,
+    they just ask for "everything after seq N", so any number of browser
+    tabs can follow the same session and each one sees every segment once.
+    """
+
+    def __init__(self, maxlen=500):
+        self.maxlen = maxlen
+        self._segments = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self._next_seq = 1
+        self.session_id = uuid.uuid4().hex[:12]
+
+        # In-progress text keyed by job id: {job: (rev, data)}
+        self._partials = {}
+        self._partial_rev = 0
+        # Jobs are published in order, so every job up to this one is final
+        self._last_final_job = 0
+
+    def reset(self):
+        """Start a new session: drop old segments and wake every reader."""
+        with self._cond:
+            self._segments.clear()
+            self._partials.clear()
+            self._last_final_job = 0
+            self._next_seq = 1
+            self.session_id = uuid.uuid4().hex[:12]
+            self._cond.notify_all()
+
+    def publish(self, segment):
+        with self._cond:
+            segment = dict(segment)
+            segment["seq"] = self._next_seq
+            segment["session"] = self.session_id
+            segment.setdefault("time", time.time())
+            self._next_seq += 1
+            self._segments.append(segment)
+            job = segment.get("job")
+            if job is not None:
+                self._partials.pop(job, None)
+                self._last_final_job = max(self._last_final_job, job)
+            self._cond.notify_all()
+            return segment
+
+    def publish_partial(self, job, data):
+        """
+        Live preview of a segment that is still being translated.
+
+        Partials are not numbered or kept: readers only see the newest text
+        for each job, and it disappears once the final segment for that job
+        is published. A partial arriving after that (from an abandoned
+        attempt still streaming) is dropped.
+        """
+        with self._cond:
+            if job <= self._last_final_job:
+                return
+            self._partial_rev += 1
+            self._partials[job] = (self._partial_rev, dict(data, job=job))
+            self._cond.notify_all()
+
+    @property
+    def last_seq(self):
+        with self._cond:
+            return self._next_seq - 1
+
+    def since(self, seq):
+        """Segments with a sequence number greater than `seq`."""
+        with self._cond:
+            return self._since(seq)
+
+    def _since(self, seq):
+        if not self._segments or self._segments[-1]["seq"] <= seq:
+            return []
+        # Sequence numbers are contiguous, so the offset is direct.
+        start = max(0, seq - self._segments[0]["seq"] + 1)
+        return [self._segments[i] for i in range(start, len(self._segments))]
+
+    def wait_since(self, seq, session_id=None, timeout=15):
+        """
+        Block until there is something after `seq` (or the timeout passes).
+
+        Returns (session_id, segments). If the caller's session id is stale
+        (the stream was reset), it gets the new session from the start.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if session_id is not None and session_id != self.session_id:
+                    session_id, seq = self.session_id, 0
+                segments = self._since(seq)
+                if segments:
+                    return self.session_id, segments
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self.session_id, []
+                self._cond.wait(remaining)
+
+    def wait_updates(self, seq, session_id=None, partial_rev=0, timeout=15):
+        """
+        Like wait_since(), but also wakes up for partials newer than
+        `partial_rev`. Returns (session_id, segments, partials, partial_rev).
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if session_id is not None and session_id != self.session_id:
+                    session_id, seq, partial_rev = self.session_id, 0, 0
+
+                segments = self._since(seq)
+                partials = [data for rev, data in self._partials.values() if rev > partial_rev]
+
+                remaining = deadline - time.monotonic()
+                if segments or partials or remaining <= 0:
+                    return self.session_id, segments, partials, self._partial_rev
+
+                self._cond.wait(remaining)
+
+
+# ----------------------------------------------------
+# SSE helpers
+# ----------------------------------------------------
+def parse_event_id(value):
+    """Split a "<session>:<seq>" Last-Event-ID into its parts."""
+    if not value:
+        return None, 0
+    session_id, _, seq = value.partition(":")
+    try:
+        return session_id or None, int(seq)
+    except ValueError:
+        return None, 0
+
+
+def format_sse(data, event=None, event_id=None):
+    msg = ""
+    if event_id is not None:
+        msg += f"id: {event_id}\n"
+    if event:
+        msg += f"event: {event}\n"
+    msg += f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return msg
+
+
+def sse_events(stream, last_event_id=None, keepalive=15, on_deliver=None):
+    """Generator for a text/event-stream response. on_deliver(segment) runs per segment sent."""
+    session_id, seq = parse_event_id(last_event_id)
+    if session_id is None:
+        session_id = stream.session_id
+
+    yield "retry: 2000\n\n"
+
+    partial_rev = 0
+
+    while True:
+        current, segments, partials, partial_rev = stream.wait_updates(
+            seq, session_id, partial_rev, timeout=keepalive
+        )
+        if current != session_id:
+            session_id, seq = current, 0
+
+        if not segments and not partials:
+            yield ": keepalive\n\n"
+            continue
+
+        for seg in segments:
+            seq = seg["seq"]
+            yield format_sse(seg, event="segment", event_id=f"{session_id}:{seq}")
+            if on_deliver is not None:
+                on_deliver(seg)
+
+        # No id: partials must not move the reconnect position
+        done = {seg.get("job") for seg in segments}
+        for data in partials:
+            if data["job"] not in done:
+                yield format_sse(data, event="partial")
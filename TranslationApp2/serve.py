@@ -0,0 +1,118 @@
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+
+from ipc import DEFAULT_ADDRESS, EngineClient, serve_engine
+
+# Production serving: one engine process (capture, models, pools, DB
+# writers) and web workers that reach it over ipc.py.
+#
+#   python serve.py              engine + waitress web server, supervised
+#   python serve.py engine       engine only (run it as a service)
+#   python serve.py web          web only, against a running engine; IIS
+#                                runs this through HttpPlatformHandler
+#                                (web.config) on HTTP_PLATFORM_PORT
+#
+# e.g. on Linux: python serve.py engine &
+#                ENGINE_ADDRESS=127.0.0.1:50555 gunicorn -w 4 -k gthread --threads 16 app:app
+#
+# /stream holds a thread per open browser tab, so the web server needs
+# threads rather than only processes (not wfastcgi). The engine creates
+# the shared key file on first start (ipc.AUTHKEY_FILE); web processes
+# started before that answer 503 until it exists.
+
+
+def run_engine(address):
+    """Engine process body: load everything, then serve calls until stopped."""
+    # SIGTERM (service stop, supervisor) takes the same path as Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    started = time.time()
+    from engine import Engine
+    engine = Engine()
+    engine.warm_up()
+    print(f"✔ Engine loaded in {time.time() - started:.1f}s")
+
+    if os.getenv("ENGINE_AUTOSTART", "0") == "1":
+        print("▶ Starting sessions:", engine.start_all())
+
+    try:
+        serve_engine(engine, address)
+    finally:
+        lingering = engine.shutdown()
+        print(f"■ Engine stopped ({len(lingering)} lingering threads)")
+
+
+def supervise(address, stop_event, restart_delay=2.0):
+    """Keep one engine process running; restart it if it dies."""
+    while not stop_event.is_set():
+        process = multiprocessing.Process(target=run_engine, args=(address,), name="engine")
+        process.start()
+        supervise.process = process
+
+        while process.is_alive() and not stop_event.is_set():
+            process.join(1)
+        if stop_event.is_set():
+            break
+
+        print(f"⚠ Engine exited with code {process.exitcode}, restarting in {restart_delay:.0f}s")
+        stop_event.wait(restart_delay)
+
+
+supervise.process = None
+
+
+def run_web(address, host, port, threads):
+    # app.py picks the IPC client up from the environment
+    os.environ["ENGINE_ADDRESS"] = address
+    from waitress import serve
+    from app import app
+
+    serve(app, host=host, port=port, threads=threads, channel_timeout=120)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the translation app in production.")
+    parser.add_argument("mode", nargs="?", choices=["all", "engine", "web"], default="all")
+    parser.add_argument("--address", default=os.getenv("ENGINE_ADDRESS", DEFAULT_ADDRESS),
+                        help="engine IPC address (host:port, socket path or named pipe)")
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int,
+                        default=int(os.getenv("HTTP_PLATFORM_PORT") or os.getenv("PORT", 5000)))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("WEB_THREADS", 32)))
+    parser.add_argument("--ready-timeout", type=float, default=300,
+                        help="seconds to wait for the engine to load its models")
+    args = parser.parse_args()
+
+    if args.mode == "engine":
+        run_engine(args.address)
+        return
+
+    if args.mode == "all":
+        stop_event = threading.Event()
+        threading.Thread(target=supervise, args=(args.address, stop_event),
+                         name="engine-supervisor", daemon=True).start()
+
+        # Don't take traffic before the models are in memory
+        print("… Waiting for the engine to load")
+        if not EngineClient(args.address).wait_ready(args.ready_timeout):
+            print("⚠ Engine not ready yet; /ready answers 503 until it is")
+
+        try:
+            run_web(args.address, args.host, args.port, args.threads)
+        finally:
+            stop_event.set()
+            if supervise.process is not None and supervise.process.is_alive():
+                supervise.process.terminate()
+                supervise.process.join(15)
+        return
+
+    run_web(args.address, args.host, args.port, args.threads)
+
+
+if __name__ == "__main__":
+    main()
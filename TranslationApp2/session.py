@@ -0,0 +1,567 @@
+import re
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import speech_recognition as sr
+
+import paths  # noqa: F401  (shared modules on sys.path)
+from dedupe import NearDuplicateFilter
+from pipeline import Reorderer, SequenceCounter, Stage
+from scheduler import DeadlineTimer
+from segment_stream import SegmentStream
+from tracing import Tracer
+from transcript import TranscriptStore
+from vad import VADSegmenter
+
+
+# ----------------------------------------------------
+# Urdu punctuation helper
+# ----------------------------------------------------
+def punctuate_urdu(text):
+    text = text.strip()
+    if not re.search(r"[۔.!?]$", text):
+        text += "۔"
+    text = re.sub(r"( اور | لیکن | تاہم | پھر | جبکہ )", r".\1", text)
+    text = re.sub(r"۔+", "۔", text)
+    return text
+
+
+def new_recognizer():
+    recognizer = sr.Recognizer()
+    recognizer.pause_threshold = 1.2
+    recognizer.phrase_threshold = 0.2
+    recognizer.non_speaking_duration = 0.2
+    return recognizer
+
+
+# ----------------------------------------------------
+# Translation Session (one capture → ASR → translate pipeline)
+# ----------------------------------------------------
+class TranslationSession:
+    """
+    Everything one live translation needs, owned by one object:
+    capture thread, ASR and translation stages, the Urdu buffer and its
+    silence timer, the duplicate filter, the SegmentStream the UI reads
+    and the TranscriptStore behind paging and search.
+
+    recognize(audio) → Urdu text or None and translate(urdu, on_partial)
+    → (english, summary) are shared across sessions. on_segment(segment)
+    is called for every published segment (e.g. to store it).
+
+    Audio comes from sr.Microphone(device_index), or from a capture.py
+    CaptureSource when `source` is given. With asr_pool/translate_pool
+    (pipeline.FairPool) the session gets a lane in the shared pools
+    instead of its own worker threads; the ASR results never wait for
+    room in the translate lane on a shared worker (see _send_outbox).
+    Segments carry the session name
+    as "source". With an enabled `tracer`, every chunk and segment is
+    timed stage by stage (see tracing.Tracer).
+
+    start() is a no-op while running, and raises RuntimeError while the
+    previous run's capture thread is still winding down. Every run gets
+    its own stop event. stop() sets it, then joins the capture thread,
+    the timer and both stage pools, and returns the names of any threads
+    that did not exit in time.
+    """
+
+    def __init__(self, name, device_index, recognize, translate, on_segment=None,
+                 segmenter="listen", asr_workers=2, translate_workers=2,
+                 asr_queue_size=16, translate_queue_size=8, silence_flush=4,
+                 dedupe_window=8, dedupe_threshold=0.8, maxlen=500,
+                 source=None, asr_pool=None, translate_pool=None, tracer=None,
+                 vad_options=None, transcript_memory=8 * 1024 * 1024, transcript_dir=None):
+        self.name = name
+        self.device_index = source.device if source else device_index
+        self.source = source
+        self.asr_pool = asr_pool
+        self.translate_pool = translate_pool
+        self.tracer = tracer or Tracer(None, enabled=False)
+        self.vad_options = vad_options or {}
+        self.recognize = recognize
+        self.translate = translate
+        self.on_segment = on_segment
+        self.segmenter = segmenter
+        self.asr_workers = asr_workers
+        self.translate_workers = translate_workers
+        self.asr_queue_size = asr_queue_size
+        self.translate_queue_size = translate_queue_size
+        self.silence_flush = silence_flush
+
+        # Finished segments for the UI (pushed over /stream)
+        self.stream = SegmentStream(maxlen=maxlen)
+
+        # The whole run, for paging and search; the stream only keeps `maxlen`
+        self.transcript = TranscriptStore(memory_limit=transcript_memory, spill_dir=transcript_dir)
+
+        # Overlapping listen() windows hear the same words twice
+        self.duplicate_filter = NearDuplicateFilter(window=dedupe_window, threshold=dedupe_threshold)
+
+        self._stop = threading.Event()
+        self._stop.set()
+        self._lifecycle = threading.Lock()
+        self._buffer_lock = threading.Lock()
+        self._buffer = ""
+        self._buffer_trace = None
+        self._buffer_spoken = None      # (start, end) wall times of the buffered speech
+
+        # Translate jobs waiting for room in the translate stage
+        self._outbox = deque()
+        self._outbox_cond = threading.Condition()
+        self.deferred = 0
+
+        self._capture = None
+        self._timer = None
+        self.asr_stage = None
+        self.translate_stage = None
+        self.asr_order = None
+        self.translate_order = None
+        self._audio_seq = None
+        self._segment_seq = None
+
+        self.started_at = None
+        self.capture_error = None
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    @property
+    def capturing(self):
+        """False once the capture thread has exited (stopped, failed, or a file source ran out)."""
+        return self._capture is not None and self._capture.is_alive()
+
+    @property
+    def session_id(self):
+        return self.stream.session_id
+
+    # ---------- lifecycle ----------
+
+    def start(self, join_timeout=2):
+        with self._lifecycle:
+            if self.running:
+                return False
+
+            # A capture thread that outlived stop() still holds the device
+            if self._capture is not None:
+                self._capture.join(join_timeout)
+                if self._capture.is_alive():
+                    raise RuntimeError(f"Session '{self.name}' is still stopping, try again shortly")
+
+            self.stream.reset()
+            self.transcript.reset()
+            self.duplicate_filter.reset()
+            self._buffer = ""
+            self._buffer_trace = None
+            self._buffer_spoken = None
+            self._outbox.clear()
+            self.capture_error = None
+            self._audio_seq = SequenceCounter()
+            self._segment_seq = SequenceCounter()
+
+            self.asr_order = Reorderer(self._on_recognized)
+            self.translate_order = Reorderer(self._on_translated)
+
+            if self.asr_pool:
+                self.asr_stage = self.asr_pool.lane(self.name, self._recognize, self.asr_order.push)
+            else:
+                self.asr_stage = Stage(f"{self.name}-asr", self._recognize, self.asr_order.push,
+                                       workers=self.asr_workers, maxsize=self.asr_queue_size)
+            if self.translate_pool:
+                self.translate_stage = self.translate_pool.lane(self.name, self._translate, self._translated)
+            else:
+                self.translate_stage = Stage(f"{self.name}-translate", self._translate, self._translated,
+                                             workers=self.translate_workers, maxsize=self.translate_queue_size)
+            self._timer = DeadlineTimer(self._flush, name=f"{self.name}-silence-flush")
+
+            # A fresh event per run: a straggling thread of the old run
+            # keeps seeing its own (set) event
+            stop = self._stop = threading.Event()
+            self.started_at = time.time()
+
+            self.translate_stage.start()
+            self.asr_stage.start()
+
+            if self.source is not None:
+                capture = self._source_capture
+            else:
+                capture = self._vad_capture if self.segmenter == "vad" else self._listen_capture
+            self._capture = threading.Thread(target=capture, args=(stop,),
+                                             name=f"{self.name}-capture", daemon=True)
+            self._capture.start()
+            return True
+
+    def stop(self, timeout=5):
+        with self._lifecycle:
+            if not self.running:
+                return []
+            self._stop.set()
+            with self._outbox_cond:
+                self._outbox_cond.notify_all()
+
+            self._timer.close(timeout)
+            # Stopping ASR first unblocks a capture thread stuck on a full queue
+            self.asr_stage.stop(timeout)
+            self._capture.join(timeout)
+            self.translate_stage.stop(timeout)
+
+            threads = [self._capture, self._timer.thread]
+            threads += self.asr_stage.threads + self.translate_stage.threads
+            return [t.name for t in threads if t is not None and t.is_alive()]
+
+    # ---------- capture ----------
+
+    def _listen_capture(self, stop):
+        recognizer = new_recognizer()
+        print(f"🎤 [{self.name}] Microphone Listening (device {self.device_index})...")
+
+        try:
+            with sr.Microphone(device_index=self.device_index) as source:
+                recognizer.adjust_for_ambient_noise(source, duration=0.5)
+
+                while not stop.is_set():
+                    try:
+                        # Short timeout so a stop request is noticed during silence
+                        audio = recognizer.listen(source, timeout=1, phrase_time_limit=10)
+                    except sr.WaitTimeoutError:
+                        continue
+                    except Exception:
+                        continue
+
+                    if stop.is_set():
+                        break
+
+                    self._submit_audio(audio)
+        except Exception as e:
+            self._capture_failed(e)
+
+    def _vad_capture(self, stop):
+        """Same job as _listen_capture, but the audio itself picks the split points."""
+        print(f"🎤 [{self.name}] Microphone Listening (VAD, device {self.device_index})...")
+
+        try:
+            with sr.Microphone(device_index=self.device_index) as source:
+                vad = VADSegmenter(sample_rate=source.SAMPLE_RATE, **self.vad_options)
+
+                def enqueue(segment):
+                    self._enqueue_segment(segment, source.SAMPLE_RATE)
+
+                while not stop.is_set():
+                    try:
+                        raw = source.stream.read(source.CHUNK)
+                    except Exception as e:
+                        print(f"❌ [{self.name}] Audio Capture Error:", e)
+                        continue
+
+                    samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+                    for segment in vad.feed(samples):
+                        enqueue(segment)
+
+                for segment in vad.flush():
+                    enqueue(segment)
+        except Exception as e:
+            self._capture_failed(e)
+
+    def _source_capture(self, stop):
+        """Blocks pushed by the CaptureManager's device callback, split by VAD."""
+        print(f"🎤 [{self.name}] Capturing {self.source.device} channel {self.source.channel}...")
+
+        try:
+            self.source.open()
+        except Exception as e:
+            self._capture_failed(e)
+            return
+
+        vad = VADSegmenter(sample_rate=self.source.sample_rate, **self.vad_options)
+        try:
+            while not stop.is_set() and not self.source.finished:
+                block = self.source.read(timeout=0.5)
+                if block is None:
+                    continue
+                for segment in vad.feed(block):
+                    self._enqueue_segment(segment, self.source.sample_rate)
+
+            for segment in vad.flush():
+                self._enqueue_segment(segment, self.source.sample_rate)
+        finally:
+            self.source.close()
+
+    def _enqueue_segment(self, segment, sample_rate):
+        pcm = (segment["audio"] * 32767).astype(np.int16).tobytes()
+        self._submit_audio(sr.AudioData(pcm, sample_rate, 2))
+
+    def _submit_audio(self, audio):
+        # The chunk just ended; its length gives when the speech started.
+        # Stamped before any wait below, so time spent behind counts.
+        ended = time.time()
+        spoken = (ended - len(audio.frame_data) / (audio.sample_rate * audio.sample_width), ended)
+        trace = self.tracer.start(speech_end=ended)
+
+        # Translation is behind: hold this session's capture thread (its
+        # source counts the overruns), never a shared worker
+        with self._outbox_cond:
+            while len(self._outbox) >= self.translate_queue_size and not self._stop.is_set():
+                self._outbox_cond.wait(0.5)
+
+        self.tracer.mark(trace, "asr_enqueue")
+        # Blocks when the ASR queue is full (backpressure)
+        self.asr_stage.put(self._audio_seq.next(), (audio, trace, spoken))
+
+    def _capture_failed(self, error):
+        print(f"❌ [{self.name}] Could not open device {self.device_index}:", error)
+        self.capture_error = str(error)
+
+    # ---------- pipeline: capture → ASR pool → buffer → translation pool ----------
+
+    def _recognize(self, item):
+        audio, trace, spoken = item
+        self.tracer.mark(trace, "asr_start")
+        text = self.recognize(audio)
+        self.tracer.mark(trace, "asr_end")
+        if text:
+            print(f"🎧 [{self.name}] Heard:", text)
+        return text, trace, spoken
+
+    def _on_recognized(self, seq, result):
+        """Runs in audio order (via asr_order), one chunk at a time."""
+        if not result:
+            return
+        text, trace, spoken = result
+        self.tracer.chunk_done(trace, self.name)
+
+        if not text or self._stop.is_set():
+            return
+
+        # Drop near-repeats, trim the overlap with the previous chunk
+        text = self.duplicate_filter.filter(text)
+        if not text:
+            print(f"⚠ [{self.name}] Duplicate ignored")
+            self.tracer.count("duplicates_dropped_total", self.name)
+            return
+
+        with self._buffer_lock:
+            self._buffer += " " + text
+            # A segment's latency counts from the end of its last chunk
+            self._buffer_trace = trace
+            # ...and it was spoken from its first chunk's start to its last one's end
+            start = self._buffer_spoken[0] if self._buffer_spoken else spoken[0]
+            self._buffer_spoken = (start, spoken[1])
+
+            # If long or ends with punctuation → translate immediately
+            flush_now = len(self._buffer.split()) >= 40 or re.search(r"[۔.!?]$", self._buffer)
+
+        if flush_now:
+            self._timer.cancel()
+            self._flush()
+        else:
+            # Process batch after silence
+            self._timer.arm(self.silence_flush)
+
+    def _flush(self):
+        """Queue whatever is buffered for translation. Called by ASR or the silence timer."""
+        with self._buffer_lock:
+            text = self._buffer.strip()
+            chunk_trace = self._buffer_trace
+            spoken = self._buffer_spoken or (time.time(), time.time())
+            self._buffer = ""
+            self._buffer_trace = None
+            self._buffer_spoken = None
+
+            if not text or self._stop.is_set():
+                return
+
+            # Numbered under the lock so segments keep their spoken order
+            seq = self._segment_seq.next()
+
+        trace = None
+        if chunk_trace is not None:
+            trace = self.tracer.start(speech_end=chunk_trace["speech_end"])
+            self.tracer.mark(trace, "translate_enqueue")
+
+        with self._outbox_cond:
+            self._outbox.append((seq, punctuate_urdu(text), spoken, trace))
+        self._send_outbox()
+
+    def _send_outbox(self):
+        """
+        Move queued translate jobs into the translate stage while it has
+        room, without blocking. Runs after every flush and every finished
+        translation, so whatever is left over goes out as room appears.
+        """
+        with self._outbox_cond:
+            while self._outbox:
+                job = self._outbox[0]
+                if not self.translate_stage.offer(job[0], job):
+                    self.deferred += 1
+                    break
+                self._outbox.popleft()
+            self._outbox_cond.notify_all()
+
+    def _translate(self, job):
+        seq, full, spoken, trace = job
+        self.tracer.mark(trace, "translate_start")
+
+        def on_partial(english):
+            # Live preview; replaced by the final segment
+            self.stream.publish_partial(seq, {"urdu": full, "english": english})
+
+        english, summary = self.translate(full, on_partial)
+        self.tracer.mark(trace, "translate_end")
+        return full, english, summary, spoken, trace
+
+    def _translated(self, seq, result):
+        self.translate_order.push(seq, result)
+        # The stage has room for one more now
+        self._send_outbox()
+
+    def _on_translated(self, seq, result):
+        """Runs in segment order (via translate_order)."""
+        if not result:
+            return
+
+        urdu, english, summary, spoken, trace = result
+        segment = {
+            "urdu": urdu,
+            "english": english,
+            "summary": summary,
+            "source": self.name,
+            "started": spoken[0],   # speech start / end (wall time); "time" is when it was published
+            "ended": spoken[1],
+            "job": seq
+        }
+        if trace is not None:
+            self.tracer.mark(trace, "published")
+            self.tracer.segment_done(trace, self.name)
+            segment["speech_end"] = trace["speech_end"]
+
+        segment = self.stream.publish(segment)
+
+        try:
+            self.transcript.append(segment)
+        except ValueError as e:
+            # A straggler from before a restart; the stream has moved on
+            print(f"⚠ [{self.name}] transcript:", e)
+
+        if self.on_segment is not None:
+            try:
+                self.on_segment(segment)
+            except Exception as e:
+                print(f"❌ [{self.name}] on_segment error:", e)
+
+    # ---------- stats ----------
+
+    def shares_input_with(self, other):
+        """Same device, and not two different channels of it via the CaptureManager."""
+        if self.device_index != other.device_index:
+            return False
+        if self.source is not None and other.source is not None:
+            return self.source.channel == other.source.channel
+        return True
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "session": self.session_id,
+            "running": self.running,
+            "device": self.device_index,
+            "channel": self.source.channel if self.source else None,
+            "segmenter": "vad" if self.source else self.segmenter,
+            "started_at": self.started_at,
+            "capture_error": self.capture_error,
+            "stages": [s.stats() for s in (self.asr_stage, self.translate_stage) if s],
+            "translate_outbox": len(self._outbox),
+            "deferred_translations": self.deferred,
+            "dedupe": self.duplicate_filter.stats(),
+            "transcript": self.transcript.stats(),
+            "reorder_waiting": {
+                "asr": self.asr_order.waiting if self.asr_order else 0,
+                "translate": self.translate_order.waiting if self.translate_order else 0
+            }
+        }
+
+
+# ----------------------------------------------------
+# Session Manager
+# ----------------------------------------------------
+class SessionManager:
+    """
+    Named sessions in one process, e.g. one per audio device or channel.
+
+    factory(name, device_index) builds a TranslationSession. Only start()
+    creates a session; get() is a lookup and returns None for unknown
+    names. A stopped session is kept (with its stream and transcript)
+    for readers until it has gone unused for `idle_timeout` seconds, then
+    evicted. Two running sessions may not share a device, except as
+    separate channels of a CaptureManager device.
+    """
+
+    def __init__(self, factory, max_sessions=8, idle_timeout=3600):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """The session called `name`, or None. Counts as a use (see idle_timeout)."""
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(name)
+            if session is not None:
+                self._last_used[name] = time.monotonic()
+            return session
+
+    def _evict_idle(self):
+        """Drop stopped sessions nobody has read for idle_timeout. Holds _lock."""
+        now = time.monotonic()
+        for name, session in list(self._sessions.items()):
+            if session.running or session.capturing:
+                continue
+            if now - self._last_used.get(name, now) >= self.idle_timeout:
+                del self._sessions[name]
+                self._last_used.pop(name, None)
+                session.transcript.close()
+                print(f"🧹 Session '{name}' evicted after {self.idle_timeout}s idle")
+
+    def start(self, name, device_index=None):
+        """Returns (session, started); started is False if it was already running."""
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(name)
+            if session is None:
+                if len(self._sessions) >= self.max_sessions:
+                    raise RuntimeError(f"Too many sessions (max {self.max_sessions})")
+                session = self._sessions[name] = self.factory(name, device_index)
+            self._last_used[name] = time.monotonic()
+
+            if not session.running and device_index is not None and session.source is None:
+                session.device_index = device_index
+
+            for other in self._sessions.values():
+                if other is not session and other.running and session.shares_input_with(other):
+                    raise RuntimeError(f"Device {session.device_index} is in use by session '{other.name}'")
+
+            return session, session.start()
+
+    def stop(self, name, timeout=5):
+        """Returns the names of threads that did not exit in time."""
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is not None:
+                # The idle clock starts when the run ends
+                self._last_used[name] = time.monotonic()
+        return session.stop(timeout) if session else []
+
+    def stop_all(self, timeout=5):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return [t for s in sessions for t in s.stop(timeout)]
+
+    def sessions(self):
+        with self._lock:
+            return list(self._sessions.values())
+
+    def stats(self):
+        return {s.name: s.stats() for s in self.sessions()}
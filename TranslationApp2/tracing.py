@@ -0,0 +1,85 @@
+import time
+
+from metrics import DEFAULT_BUCKETS
+
+# Queue waits are often well under 10 ms; add finer buckets below that
+TRACE_BUCKETS = (0.001, 0.0025, 0.005) + DEFAULT_BUCKETS
+
+# Histograms recorded per segment: (name, from mark, to mark, help)
+SEGMENT_SPANS = (
+    ("buffer_wait_seconds", "speech_end", "translate_enqueue", "Speech end to translation enqueue (buffering, silence flush)"),
+    ("translate_queue_seconds", "translate_enqueue", "translate_start", "Wait in the translation queue"),
+    ("translate_seconds", "translate_start", "translate_end", "Translation call incl. cache lookup"),
+    ("reorder_wait_seconds", "translate_end", "published", "Held back to keep segments in order"),
+    ("end_to_end_seconds", "speech_end", "published", "Speech end to segment published"),
+)
+
+CHUNK_SPANS = (
+    ("asr_queue_seconds", "asr_enqueue", "asr_start", "Wait in the ASR queue"),
+    ("asr_seconds", "asr_start", "asr_end", "ASR call"),
+    ("capture_to_text_seconds", "speech_end", "asr_end", "Speech end to recognized text"),
+)
+
+
+# ----------------------------------------------------
+# Per-segment tracing
+# ----------------------------------------------------
+class Tracer:
+    """
+    Timestamps each audio chunk and segment on its way through the pipeline.
+
+    A trace is a plain dict of wall-clock marks (speech_end, asr_enqueue,
+    asr_start, asr_end, translate_enqueue, translate_start, translate_end,
+    published) that rides along with the item. When the item is done, the
+    gaps between marks go into MetricsRegistry histograms labelled by session.
+    UI delivery is measured when /stream hands a segment to a client.
+
+    Disabled, start() returns None and every other call returns at once
+    for a None trace: one check per call site, no allocation, no lock.
+    """
+
+    def __init__(self, registry, enabled=True):
+        self.registry = registry
+        self.enabled = enabled
+
+    def start(self, **marks):
+        if not self.enabled:
+            return None
+        trace = {"speech_end": time.time()}
+        trace.update(marks)
+        return trace
+
+    @staticmethod
+    def mark(trace, key):
+        if trace is not None:
+            trace[key] = time.time()
+
+    def count(self, name, session, n=1):
+        if self.enabled:
+            self.registry.counter(name, session=session).inc(n)
+
+    def _observe(self, trace, spans, session):
+        for name, start, end, help in spans:
+            if start in trace and end in trace:
+                self.registry.histogram(name, help, TRACE_BUCKETS, session=session).observe(trace[end] - trace[start])
+
+    def chunk_done(self, trace, session):
+        if trace is None:
+            return
+        self._observe(trace, CHUNK_SPANS, session)
+        self.registry.counter("audio_chunks_total", "Audio chunks recognized", session=session).inc()
+
+    def segment_done(self, trace, session):
+        if trace is None:
+            return
+        self._observe(trace, SEGMENT_SPANS, session)
+        self.registry.counter("segments_total", "Segments published", session=session).inc()
+
+    def delivered(self, segment):
+        """Called by /stream for each segment it sends to a browser."""
+        if not self.enabled or "speech_end" not in segment:
+            return
+        session = segment.get("source", "")
+        self.registry.histogram("ui_delivery_seconds", "Speech end to segment sent to a client",
+                                TRACE_BUCKETS, session=session).observe(time.time() - segment["speech_end"])
+        self.registry.counter("segments_delivered_total", "Segment sends to clients", session=session).inc()
@@ -0,0 +1,245 @@
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+
+import paths  # noqa: F401  (shared modules on sys.path)
+from translation_cache import normalize_urdu
+
+_WORDS = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Search terms of a text: normalized (see normalize_urdu), lowercased words."""
+    return _WORDS.findall(normalize_urdu(text or ""))
+
+
+# ----------------------------------------------------
+# Transcript record
+# ----------------------------------------------------
+class TranscriptRecord:
+    """One finished segment; __slots__ keeps it to the strings plus ~80 bytes."""
+
+    __slots__ = ("seq", "time", "started", "urdu", "english", "summary")
+
+    def __init__(self, seq, time, started, urdu, english, summary):
+        self.seq = seq
+        self.time = time
+        self.started = started
+        self.urdu = urdu
+        self.english = english
+        self.summary = summary
+
+    def size(self):
+        return (sys.getsizeof(self) + sys.getsizeof(self.urdu)
+                + sys.getsizeof(self.english) + sys.getsizeof(self.summary))
+
+    def to_row(self):
+        return [self.seq, self.time, self.started, self.urdu, self.english, self.summary]
+
+    def to_dict(self):
+        return {
+            "seq": self.seq,
+            "time": self.time,
+            "started": self.started,
+            "urdu": self.urdu,
+            "english": self.english,
+            "summary": self.summary
+        }
+
+
+# ----------------------------------------------------
+# Transcript Store (append-only, spills to disk)
+# ----------------------------------------------------
+class TranscriptStore:
+    """
+    Every finished segment of one session run, for paging and search.
+
+    Append-only with contiguous sequence numbers from 1 (the same numbers
+    SegmentStream hands out), so a record's position is seq - 1. Times
+    sit in an array("d") for range reads by time.
+
+    The inverted index maps each Urdu and English word to an array("I")
+    of the seqs containing it; postings grow in seq order, so searches
+    page backwards from the newest match with a bisect.
+
+    The index stays in memory and counts against `memory_limit` together
+    with the records held in memory. Once the two pass it, the oldest
+    records are written to a JSONL spill file and only their offsets
+    (array("q")) stay in memory, so a large index leaves less room for
+    records.
+    """
+
+    def __init__(self, memory_limit=8 * 1024 * 1024, spill_dir=None, max_page=500):
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.max_page = max_page
+        self._lock = threading.Lock()
+        self._spill_path = None
+        self._spill_file = None
+        self._clear()
+
+    def _clear(self):
+        self._times = array("d")
+        self._offsets = array("q")   # spill file offsets of records 1..len(_offsets)
+        self._hot = []               # the rest, oldest first
+        self._hot_bytes = 0
+        self._index = {}
+        self._index_bytes = 0
+        if self._spill_file is not None:
+            self._spill_file.seek(0)
+            self._spill_file.truncate()
+
+    def reset(self):
+        """Start a new run: drop every record and the index."""
+        with self._lock:
+            self._clear()
+
+    def close(self):
+        with self._lock:
+            self._clear()
+            if self._spill_file is not None:
+                self._spill_file.close()
+                os.remove(self._spill_path)
+                self._spill_file = None
+
+    def __len__(self):
+        return len(self._times)
+
+    # ---------- writing ----------
+
+    def append(self, segment):
+        """Add a published segment (it must carry the next seq)."""
+        record = TranscriptRecord(segment["seq"], segment["time"], segment.get("started"),
+                                  segment.get("urdu", ""), segment.get("english", ""),
+                                  segment.get("summary", ""))
+        with self._lock:
+            if record.seq != len(self._times) + 1:
+                raise ValueError(f"Expected seq {len(self._times) + 1}, got {record.seq}")
+
+            self._times.append(record.time)
+            self._hot.append(record)
+            self._hot_bytes += record.size()
+
+            for term in set(tokenize(record.urdu)) | set(tokenize(record.english)):
+                postings = self._index.get(term)
+                if postings is None:
+                    postings = self._index[term] = array("I")
+                    self._index_bytes += sys.getsizeof(term) + sys.getsizeof(postings)
+                postings.append(record.seq)
+                self._index_bytes += postings.itemsize
+
+            if self._memory_bytes() > self.memory_limit:
+                self._spill()
+
+    def _memory_bytes(self):
+        return self._hot_bytes + self._index_bytes
+
+    def _spill(self):
+        """Write the oldest records out until memory use is down to half the limit."""
+        if self._spill_file is None:
+            fd, self._spill_path = tempfile.mkstemp(prefix="transcript-", suffix=".jsonl", dir=self.spill_dir)
+            self._spill_file = os.fdopen(fd, "w+b")
+
+        f = self._spill_file
+        f.seek(0, os.SEEK_END)
+        count = 0
+        # Always keep the newest record in memory
+        while count < len(self._hot) - 1 and self._memory_bytes() > self.memory_limit // 2:
+            record = self._hot[count]
+            self._offsets.append(f.tell())
+            f.write(json.dumps(record.to_row(), ensure_ascii=False).encode("utf-8") + b"\n")
+            self._hot_bytes -= record.size()
+            count += 1
+        f.flush()
+        del self._hot[:count]
+
+    # ---------- reading ----------
+
+    def _record(self, seq):
+        spilled = len(self._offsets)
+        if seq > spilled:
+            return self._hot[seq - spilled - 1]
+        self._spill_file.seek(self._offsets[seq - 1])
+        return TranscriptRecord(*json.loads(self._spill_file.readline()))
+
+    def _page(self, seqs):
+        return [self._record(seq).to_dict() for seq in seqs]
+
+    def get(self, seq):
+        with self._lock:
+            if not 1 <= seq <= len(self._times):
+                return None
+            return self._record(seq).to_dict()
+
+    def range(self, after=0, limit=50, start=None, end=None):
+        """
+        Segments with seq > `after`, optionally only those published in
+        [start, end) (Unix times), oldest first. `next` is the `after`
+        for the following page, or None at the end.
+        """
+        limit = max(1, min(limit, self.max_page))
+        with self._lock:
+            first = max(after, 0)
+            if start is not None:
+                first = max(first, bisect_left(self._times, start))
+            stop = len(self._times) if end is None else bisect_left(self._times, end)
+
+            last = min(stop, first + limit)
+            segments = self._page(range(first + 1, last + 1))
+            return {
+                "segments": segments,
+                "total": len(self._times),
+                "next": last if last < stop else None
+            }
+
+    def search(self, query, limit=20, before=None):
+        """
+        Segments containing every word of `query` (in the Urdu or the
+        English), newest first. `matches` counts every matching segment,
+        not just this page. Pass the returned `next` as `before` for the
+        following page.
+        """
+        limit = max(1, min(limit, self.max_page))
+        terms = set(tokenize(query))
+        with self._lock:
+            postings = [self._index.get(term) for term in terms]
+            if not postings or any(p is None for p in postings):
+                return {"segments": [], "matches": 0, "next": None}
+
+            # Walk the rarest term's postings, check the rest by bisect
+            postings.sort(key=len)
+            rarest, others = postings[0], postings[1:]
+            if others:
+                hits = [seq for seq in rarest if all(contains(p, seq) for p in others)]
+            else:
+                hits = rarest
+            end = len(hits) if before is None else bisect_left(hits, before)
+
+            page = hits[max(0, end - limit):end][::-1]
+            return {
+                "segments": self._page(page),
+                "matches": len(hits),
+                "next": page[-1] if end > limit else None
+            }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "segments": len(self._times),
+                "in_memory": len(self._hot),
+                "spilled": len(self._offsets),
+                "memory_bytes": self._memory_bytes(),
+                "index_bytes": self._index_bytes,
+                "terms": len(self._index),
+                "postings": sum(len(p) for p in self._index.values())
+            }
+
+
+def contains(postings, seq):
+    i = bisect_left(postings, seq)
+    return i < len(postings) and postings[i] == seq
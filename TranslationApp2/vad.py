@@ -0,0 +1,236 @@
+import glob
+import os
+import sys
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+
+# ----------------------------------------------------
+# Frame energy
+# ----------------------------------------------------
+def frame_energy_db(samples, frame_len):
+    """RMS level in dBFS for each whole frame of float32 samples (vectorized)."""
+    n = len(samples) // frame_len
+    if n == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:n * frame_len].reshape(n, frame_len)
+    rms = np.sqrt(np.mean(frames * frames, axis=1) + 1e-12)
+    return 20 * np.log10(rms)
+
+
+# ----------------------------------------------------
+# Energy VAD segmenter
+# ----------------------------------------------------
+class VADSegmenter:
+    """
+    Frame-by-frame voice activity detection on NumPy audio.
+
+    Hysteresis: speech starts when a frame is `start_db` above the noise
+    floor and only ends after `min_silence_ms` of frames below `stop_db`
+    above the floor. The floor is a low percentile of recent non-speech
+    frames, so it adapts to the line-in level like adjust_for_ambient_noise
+    did, without creeping up during long stretches of speech.
+
+    A segment is padded with `pad_ms` on both sides. If speech runs past
+    `max_segment_s`, it is split at the quietest frame in the last
+    `split_search_s` seconds, so the cut lands in a breath rather than
+    mid-word as phrase_time_limit does.
+
+    feed() can be called with blocks of any size and returns the
+    segments that finished; flush() ends the stream. Each segment is a
+    dict with start/end (seconds from stream start) and float32 audio.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, start_db=12.0, stop_db=6.0,
+                 min_speech_ms=250, min_silence_ms=600, pad_ms=200,
+                 max_segment_s=15.0, split_search_s=3.0, floor_window_s=10.0,
+                 calibrate_ms=500):
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.start_db = start_db
+        self.stop_db = stop_db
+        self.min_speech = max(1, int(min_speech_ms / frame_ms))
+        self.min_silence = max(1, int(min_silence_ms / frame_ms))
+        self.pad = int(pad_ms / frame_ms)
+        self.max_frames = int(max_segment_s * 1000 / frame_ms)
+        self.split_search = int(split_search_s * 1000 / frame_ms)
+        self.floor_frames = int(floor_window_s * 1000 / frame_ms)
+        self.calibrate = int(calibrate_ms / frame_ms)
+
+        self.reset()
+
+    def reset(self):
+        self._audio = np.empty(0, dtype=np.float32)    # unconsumed samples
+        self._energy = np.empty(0, dtype=np.float32)   # dB per frame of _audio
+        self._base = 0                                 # frame index of _audio[0]
+        self._history = deque(maxlen=self.floor_frames)  # non-speech energies for the floor
+        self._speech_start = None                      # absolute frame index
+        self._run = 0                                  # consecutive loud frames
+        self._quiet = 0                                # consecutive quiet frames
+        self._pos = 0                                  # next frame to classify (relative)
+        self._seen = 0                                 # frames classified so far
+        self._continued = False                        # open segment follows a forced split
+
+    # ---------- input ----------
+
+    def feed(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+
+        self._audio = np.concatenate([self._audio, samples])
+        have = len(self._energy)
+        total = len(self._audio) // self.frame_len
+        if total > have:
+            new = frame_energy_db(self._audio[have * self.frame_len:total * self.frame_len], self.frame_len)
+            self._energy = np.concatenate([self._energy, new])
+
+        return self._scan()
+
+    def flush(self):
+        """End of stream: close any open segment."""
+        segments = []
+        if self._speech_start is not None:
+            end = self._base + len(self._energy)
+            if end - self._speech_start >= self.min_speech:
+                segments.append(self._emit(self._speech_start, end, pad_start=not self._continued))
+        self.reset()
+        return segments
+
+    # ---------- detection ----------
+
+    def _floor(self):
+        if len(self._history) == 0:
+            return -90.0
+        return float(np.percentile(np.fromiter(self._history, dtype=np.float32), 10))
+
+    def _scan(self):
+        segments = []
+        floor = self._floor()
+        energy = self._energy
+        loud = energy > floor + self.start_db
+        still = energy > floor + self.stop_db
+
+        i = self._pos
+        while i < len(energy):
+            absolute = self._base + i
+            self._seen += 1
+
+            if self._seen <= self.calibrate:
+                # Like adjust_for_ambient_noise: the first frames only set the floor
+                self._history.append(energy[i])
+                if self._seen == self.calibrate:
+                    floor = self._floor()
+                    loud = energy > floor + self.start_db
+                    still = energy > floor + self.stop_db
+
+            elif self._speech_start is None:
+                if not loud[i]:
+                    self._history.append(energy[i])
+                self._run = self._run + 1 if loud[i] else 0
+                if self._run >= self.min_speech:
+                    self._speech_start = absolute - self._run + 1
+                    self._quiet = 0
+            else:
+                self._quiet = 0 if still[i] else self._quiet + 1
+
+                if self._quiet >= self.min_silence:
+                    end = absolute - self._quiet + 1
+                    segments.append(self._emit(self._speech_start, end, pad_start=not self._continued))
+                    self._speech_start, self._run, self._quiet = None, 0, 0
+                    self._continued = False
+
+                elif absolute + 1 - self._speech_start >= self.max_frames:
+                    cut = self._split_point(self._speech_start, absolute + 1)
+                    segments.append(self._emit(self._speech_start, cut,
+                                               pad_start=not self._continued, pad_end=False))
+                    self._speech_start, self._quiet = cut, 0
+                    self._continued = True
+            i += 1
+
+        self._pos = i
+        self._trim()
+        return segments
+
+    def _split_point(self, start, end):
+        """Quietest frame near the end of an over-long segment."""
+        lo = max(start + self.min_speech, end - self.split_search)
+        window = self._energy[lo - self._base:end - self._base]
+        if len(window) == 0:
+            return end
+        return lo + int(np.argmin(window))
+
+    def _emit(self, start, end, pad_start=True, pad_end=True):
+        s = max(self._base, start - (self.pad if pad_start else 0))
+        e = min(self._base + len(self._energy), end + (self.pad if pad_end else 0))
+        a = (s - self._base) * self.frame_len
+        b = (e - self._base) * self.frame_len
+        return {
+            "start": s * self.frame_len / self.sample_rate,
+            "end": e * self.frame_len / self.sample_rate,
+            "audio": self._audio[a:b].copy()
+        }
+
+    def _trim(self):
+        """Forget audio that can no longer be part of a segment."""
+        keep_from = self._base + self._pos - self.pad - self.min_speech
+        if self._speech_start is not None:
+            keep_from = min(keep_from, self._speech_start - self.pad)
+        drop = keep_from - self._base
+        if drop <= 0:
+            return
+
+        self._audio = self._audio[drop * self.frame_len:]
+        self._energy = self._energy[drop:]
+        self._base += drop
+        self._pos -= drop
+
+
+# ----------------------------------------------------
+# Offline check: python vad.py [wav files or globs]
+# ----------------------------------------------------
+def load_wav(path):
+    with wave.open(path, "rb") as wf:
+        rate, channels = wf.getframerate(), wf.getnchannels()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    pcm = pcm.reshape(-1, channels).mean(axis=1) if channels > 1 else pcm
+    return pcm.astype(np.float32) / 32768.0, rate
+
+
+def segment_file(path, block_ms=100, **kwargs):
+    samples, rate = load_wav(path)
+    vad = VADSegmenter(sample_rate=rate, **kwargs)
+    block = int(rate * block_ms / 1000)
+
+    segments = []
+    for offset in range(0, len(samples), block):
+        segments += vad.feed(samples[offset:offset + block])
+    segments += vad.flush()
+    return segments, len(samples) / rate
+
+
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    patterns = sys.argv[1:] or [os.path.join(here, "..", "PythonProject", "TranslationApp", "linein_*.wav")]
+    paths = [p for pattern in patterns for p in sorted(glob.glob(pattern))]
+
+    total_audio = total_wall = 0.0
+    for path in paths:
+        started = time.perf_counter()
+        segments, seconds = segment_file(path)
+        wall = time.perf_counter() - started
+        total_audio += seconds
+        total_wall += wall
+
+        speech = sum(s["end"] - s["start"] for s in segments)
+        print(f"{os.path.basename(path)}: {seconds:.1f}s, {len(segments)} segments, "
+              f"{speech:.1f}s speech, {wall * 1000:.1f} ms")
+        for s in segments:
+            print(f"    {s['start']:6.2f} → {s['end']:6.2f}  ({s['end'] - s['start']:.2f}s)")
+
+    if total_wall:
+        print(f"\n{total_audio:.1f}s audio segmented in {total_wall:.3f}s "
+              f"({total_audio / total_wall:.0f}x real time)")
@@ -0,0 +1,532 @@
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from contextlib import contextmanager
+from queue import Queue, Empty
+
+SQLSERVER_CONN = (
+    "DRIVER={SQL Server};"
+    "SERVER=khi-webdbs;"
+    "DATABASE=TranslationApp;"
+    "UID=NcUser;"
+    "PWD=New#Contact_DB_user_2003;"
+)
+
+# Local stand-in schema (schema.sql has the SQL Server version)
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Translations (
+    Id INTEGER PRIMARY KEY AUTOINCREMENT,
+    UrduText TEXT,
+    EnglishText TEXT,
+    CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS Segments (
+    SessionId TEXT NOT NULL,
+    Seq INTEGER NOT NULL,
+    StartedAt TEXT,
+    EndedAt TEXT,
+    UrduText TEXT,
+    EnglishText TEXT,
+    Summary TEXT,
+    Edited INTEGER NOT NULL DEFAULT 0,
+    EditedAt TEXT,
+    PRIMARY KEY (SessionId, Seq)
+);
+"""
+
+
+# ----------------------------------------------------
+# Connection factory
+# ----------------------------------------------------
+def connect_factory(url=None):
+    """
+    DB_URL="sqlite:///translations.db" → local SQLite stand-in.
+    Anything else → SQL Server over pyodbc (DB_CONN or the default string).
+    """
+    url = url if url is not None else os.getenv("DB_URL", "")
+
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+
+        def connect():
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.executescript(SQLITE_SCHEMA)
+            return conn
+        return connect
+
+    conn_str = os.getenv("DB_CONN", SQLSERVER_CONN)
+
+    def connect():
+        import pyodbc
+        return pyodbc.connect(conn_str)
+    return connect
+
+
+# ----------------------------------------------------
+# Connection Pool
+# ----------------------------------------------------
+class ConnectionPool:
+    """
+    Reuses database connections instead of a new handshake per request.
+
+    - at most `max_size` connections; acquire() waits when all are out
+    - idle connections older than `max_idle` seconds are closed
+    - a connection idle for more than `check_after` seconds is pinged
+      with `health_query` before it is handed out; dead ones are replaced
+    """
+
+    def __init__(self, factory, max_size=5, max_idle=300, check_after=30,
+                 health_query="SELECT 1"):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.health_query = health_query
+
+        self._idle = deque()   # (conn, last_used); newest on the right
+        self._out = 0
+        self._cond = threading.Condition()
+
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self.broken = 0
+
+    def acquire(self, timeout=10):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._evict_idle()
+
+                while self._idle:
+                    conn, last_used = self._idle.pop()
+                    if time.monotonic() - last_used < self.check_after or self._healthy(conn):
+                        self._out += 1
+                        self.reused += 1
+                        return conn
+                    self.broken += 1
+                    self._close(conn)
+
+                if self._out < self.max_size:
+                    self._out += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("No database connection available")
+                self._cond.wait(remaining)
+
+        # Connect outside the lock; the slot is already reserved
+        try:
+            conn = self.factory()
+        except Exception:
+            with self._cond:
+                self._out -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self.created += 1
+        return conn
+
+    def release(self, conn, broken=False):
+        with self._cond:
+            self._out -= 1
+            if broken:
+                self.broken += 1
+                self._close(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            # The connection may be mid-transaction or dead: don't reuse it
+            self.release(conn, broken=True)
+            raise
+        else:
+            self.release(conn)
+
+    def close_all(self):
+        with self._cond:
+            while self._idle:
+                self._close(self._idle.pop()[0])
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            self._close(self._idle.popleft()[0])
+            self.evicted += 1
+
+    def _healthy(self, conn):
+        try:
+            conn.cursor().execute(self.health_query).fetchall()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        # Roll back first: a failed statement's open transaction would
+        # otherwise keep its locks (SQLite) until the cursor is collected
+        for step in (conn.rollback, conn.close):
+            try:
+                step()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                "idle": len(self._idle),
+                "in_use": self._out,
+                "max_size": self.max_size,
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+                "broken": self.broken
+            }
+
+
+# ----------------------------------------------------
+# Write-behind queue (batched inserts)
+# ----------------------------------------------------
+# DB-API errors that retrying won't fix (bad data, duplicate key, bad SQL)
+PERMANENT_ERRORS = ("IntegrityError", "DataError", "ProgrammingError")
+
+
+def is_permanent(error):
+    return type(error).__name__ in PERMANENT_ERRORS
+
+
+class WriteBehindQueue:
+    """
+    Takes inserts off the request thread.
+
+    Rows are collected and written with one executemany() per batch
+    (fast_executemany on pyodbc), committed once `batch_size` rows are
+    waiting or `flush_interval` seconds after the first one.
+
+    A batch that fails because the database is unreachable is appended
+    to a JSONL spool file and retried with backoff, so rows survive an
+    outage and a process restart. A batch rejected for its data
+    (duplicate key, bad value) is retried row by row, and the rows that
+    still fail go to a dead-letter file instead of being retried forever.
+
+    Every process spools to its own file (<spool>.<pid>.jsonl), so
+    several IIS worker processes never truncate each other's rows. Spool
+    files left by a process that has gone quiet for `orphan_age` seconds
+    are picked up by whichever writer retries next.
+    """
+
+    def __init__(self, pool, sql, batch_size=50, flush_interval=2.0,
+                 spool_path="db_spool.jsonl", max_backoff=60, orphan_age=600):
+        self.pool = pool
+        self.sql = sql
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.orphan_age = orphan_age
+
+        self.spool_base = spool_path
+        self.spool_path = None
+        self.dead_letter_path = None
+        if spool_path:
+            root, ext = os.path.splitext(spool_path)
+            self.spool_path = f"{root}.{os.getpid()}{ext}"
+            self.dead_letter_path = f"{root}.dead{ext}"
+
+        self._queue = Queue()
+        self._done = threading.Condition()
+        self._stop = threading.Event()
+        self._flushing = threading.Event()
+        self._spool_lock = threading.Lock()
+        self._backoff = 0
+        self._retry_at = 0.0
+
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.dead = 0
+
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, params):
+        self._queue.put(tuple(params))
+
+    def flush(self, timeout=10):
+        """Wait until every row put so far is written (or spooled)."""
+        self._flushing.set()
+        try:
+            with self._done:
+                return self._done.wait_for(lambda: self._queue.unfinished_tasks == 0, timeout)
+        finally:
+            self._flushing.clear()
+
+    def close(self, timeout=10):
+        """Write what is queued, then stop."""
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except Empty:
+                # Nothing more right now; stop waiting if someone is flushing
+                if self._flushing.is_set() or self._stop.is_set():
+                    break
+        return batch
+
+    def _run(self):
+        while True:
+            self._retry_spool()
+
+            batch = self._collect()
+            if batch:
+                self._write_or_spool(batch)
+                with self._done:
+                    for _ in batch:
+                        self._queue.task_done()
+                    self._done.notify_all()
+            elif self._stop.is_set():
+                self._retry_spool(force=True)
+                return
+
+    def _write(self, rows):
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            if hasattr(cur, "fast_executemany"):
+                cur.fast_executemany = True
+            cur.executemany(self.sql, rows)
+            conn.commit()
+
+        self.written += len(rows)
+        self.batches += 1
+
+    def _write_or_spool(self, rows):
+        try:
+            self._write(rows)
+            self._backoff = 0
+            return
+        except Exception as e:
+            error = e
+
+        self.failures += 1
+        if is_permanent(error):
+            if len(rows) > 1:
+                # One bad row fails the whole batch; find it
+                for row in rows:
+                    self._write_or_spool([row])
+                return
+            print("❌ DB rejected a row, dead-lettering it:", error)
+            self._dead_letter(rows[0], error)
+            return
+
+        print("❌ DB write failed, spooling", len(rows), "rows:", error)
+        self._spool(rows)
+        self._backoff = min(self.max_backoff, max(1, self._backoff * 2))
+        self._retry_at = time.monotonic() + self._backoff
+
+    def _spool(self, rows):
+        if not self.spool_path:
+            print("⚠ No spool file, dropping", len(rows), "rows")
+            return
+        with self._spool_lock, open(self.spool_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def _dead_letter(self, row, error):
+        self.dead += 1
+        if not self.dead_letter_path:
+            return
+        entry = {"row": row, "error": str(error), "time": time.time()}
+        with self._spool_lock, open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+    def _spool_files(self):
+        """Our own spool, plus spool files other processes have left untouched for `orphan_age`."""
+        root, ext = os.path.splitext(self.spool_base)
+        now = time.time()
+        files = []
+        candidates = glob.glob(f"{glob.escape(root)}.*{ext}") + glob.glob(f"{glob.escape(root)}.*.retry")
+        if os.path.exists(self.spool_base):
+            candidates.append(self.spool_base)   # single spool file of older versions
+        for path in candidates:
+            if path == self.dead_letter_path:
+                continue
+            try:
+                if path == self.spool_path or now - os.path.getmtime(path) > self.orphan_age:
+                    files.append(path)
+            except OSError:
+                pass
+        return files
+
+    def _claim(self, path):
+        """Atomically take a spool file over; None if another process got it first."""
+        if path.endswith(".retry"):
+            claimed = path
+        else:
+            claimed = f"{path}.{os.getpid()}.retry"
+            try:
+                # Rows appended after this go to a fresh file, never into the one being read
+                with self._spool_lock:
+                    os.replace(path, claimed)
+                # Fresh mtime: not an orphan for anyone else while we read it
+                os.utime(claimed)
+            except OSError:
+                return None
+
+        try:
+            with open(claimed, encoding="utf-8") as f:
+                rows = [tuple(json.loads(line)) for line in f if line.strip()]
+            os.remove(claimed)
+        except OSError:
+            return None
+        return rows
+
+    def _retry_spool(self, force=False):
+        if not self.spool_path:
+            return
+        if not force and time.monotonic() < self._retry_at:
+            return
+
+        for path in self._spool_files():
+            rows = self._claim(path)
+            if rows:
+                print("🔁 Retrying", len(rows), "spooled rows")
+                for i in range(0, len(rows), self.batch_size):
+                    self._write_or_spool(rows[i:i + self.batch_size])
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dead_lettered": self.dead,
+            "spooled": os.path.exists(self.spool_path) if self.spool_path else False
+        }
+
+
+# ----------------------------------------------------
+# Segment store (one row per translated segment)
+# ----------------------------------------------------
+INSERT_SEGMENT = """
+    INSERT INTO Segments (SessionId, Seq, StartedAt, EndedAt, UrduText, EnglishText, Summary, Edited)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+"""
+
+# NULL keeps the stored value, so an edit can send just the field that changed
+UPDATE_SEGMENT = """
+    UPDATE Segments
+    SET UrduText = COALESCE(?, UrduText),
+        EnglishText = COALESCE(?, EnglishText),
+        Summary = COALESCE(?, Summary),
+        Edited = 1,
+        EditedAt = ?
+    WHERE SessionId = ? AND Seq = ?
+"""
+
+SELECT_SEGMENTS = """
+    SELECT Seq, StartedAt, EndedAt, UrduText, EnglishText, Summary, Edited
+    FROM Segments
+    WHERE SessionId = ?
+    ORDER BY Seq
+"""
+
+
+def db_time(t):
+    """Timestamp as text both SQLite and SQL Server (DATETIME2) accept; None stays NULL."""
+    if t is None:
+        return None
+    return datetime.fromtimestamp(t).isoformat(sep=" ", timespec="milliseconds")
+
+
+class SegmentStore:
+    """
+    Stores a session as (session, seq) rows instead of one editor dump.
+
+    add() is called as each segment is translated and goes through a
+    WriteBehindQueue, so the pipeline never waits on the database.
+    save_edits() updates only the segments the editor changed.
+    """
+
+    def __init__(self, pool, batch_size=50, flush_interval=2.0, spool_path="segments_spool.jsonl"):
+        self.pool = pool
+        self.writer = WriteBehindQueue(
+            pool, INSERT_SEGMENT,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            spool_path=spool_path
+        )
+        self.edits = 0
+
+    def add(self, session_id, seq, urdu, english, summary=None, started=None, ended=None):
+        self.writer.put((
+            session_id, seq,
+            db_time(started), db_time(ended),
+            urdu, english, summary
+        ))
+
+    def save_edits(self, session_id, edits):
+        """
+        edits: [{"seq": 3, "english": "...", ...}]; urdu, english and
+        summary are each optional. Returns the seqs that matched no row.
+        """
+        # A just-published segment may still be in the write-behind queue
+        self.writer.flush()
+
+        now = db_time(time.time())
+        missing = []
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            for edit in edits:
+                cur.execute(UPDATE_SEGMENT, (
+                    edit.get("urdu"), edit.get("english"), edit.get("summary"),
+                    now, session_id, int(edit["seq"])
+                ))
+                if cur.rowcount == 0:
+                    missing.append(edit["seq"])
+            conn.commit()
+
+        self.edits += len(edits) - len(missing)
+        return missing
+
+    def load(self, session_id):
+        with self.pool.connection() as conn:
+            rows = conn.cursor().execute(SELECT_SEGMENTS, (session_id,)).fetchall()
+
+        return [{
+            "seq": r[0],
+            "started": None if r[1] is None else str(r[1]),
+            "ended": None if r[2] is None else str(r[2]),
+            "urdu": r[3],
+            "english": r[4],
+            "summary": r[5],
+            "edited": bool(r[6])
+        } for r in rows]
+
+    def stats(self):
+        stats = self.writer.stats()
+        stats["edits"] = self.edits
+        return stats
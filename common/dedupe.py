@@ -0,0 +1,113 @@
+import threading
+from collections import deque
+
+from translation_cache import normalize_urdu
+
+
+# ----------------------------------------------------
+# Near-duplicate filter for recognized chunks
+# ----------------------------------------------------
+def shingles(tokens, k=2):
+    if len(tokens) < k:
+        return {tuple(tokens)} if tokens else set()
+    return {tuple(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def containment(new_tokens, old_tokens, k=2):
+    """(share of new's shingles found in old, share of old's found in new)."""
+    a, b = shingles(new_tokens, k), shingles(old_tokens, k)
+    if not a or not b:
+        return 0.0, 0.0
+    common = len(a & b)
+    return common / len(a), common / len(b)
+
+
+class NearDuplicateFilter:
+    """
+    Trims the part of a chunk that repeats the end of the previous one
+    and drops chunks with nothing new left in them.
+
+    Overlapping listen() windows tend to produce "A B C D" followed by
+    "C D E F"; filter() returns "E F" for the second one. A chunk is
+    dropped when the overlap covers all of it, when every word pair in
+    what remains was heard in a recent chunk, or when it is a near-exact
+    repeat: each of the two chunks mostly inside the other (containment
+    both ways >= threshold) with no word the old one lacks. So "risen to
+    twelve" followed by "risen to fifteen" keeps the update.
+    """
+
+    def __init__(self, window=8, threshold=0.8, min_overlap=2, shingle_size=2):
+        self.threshold = threshold
+        self.min_overlap = min_overlap
+        self.shingle_size = shingle_size
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+        self.passed = 0
+        self.dropped = 0
+        self.trimmed_words = 0
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+
+    def filter(self, text):
+        words = text.split()
+        tokens = [normalize_urdu(w) for w in words]
+        keep = [i for i, t in enumerate(tokens) if t]
+        words = [words[i] for i in keep]
+        tokens = [tokens[i] for i in keep]
+
+        if not tokens:
+            return None
+
+        with self._lock:
+            overlap = self._overlap(self._recent[-1], tokens) if self._recent else 0
+            duplicate = overlap >= len(tokens) or any(
+                self._nothing_new(tokens, overlap, old) or self._is_repeat(tokens, old)
+                for old in self._recent
+            )
+            self._recent.append(tokens)
+
+            if duplicate:
+                self.dropped += 1
+                return None
+
+            self.passed += 1
+            self.trimmed_words += overlap
+            return " ".join(words[overlap:])
+
+    def _overlap(self, prev, new):
+        """
+        Longest suffix of prev that (nearly) matches a prefix of new. The
+        last word has to match exactly, so a chunk that only changes its
+        final word ("twelve" → "fifteen") isn't read as one big overlap.
+        """
+        longest = min(len(prev), len(new))
+        for k in range(longest, self.min_overlap - 1, -1):
+            if prev[-1] != new[k - 1]:
+                continue
+            matches = sum(a == b for a, b in zip(prev[-k:], new[:k]))
+            if matches / k >= self.threshold:
+                return k
+        return 0
+
+    def _nothing_new(self, tokens, overlap, old):
+        """Every shingle touching the untrimmed part is already in `old`."""
+        k = self.shingle_size
+        rest = tokens[max(0, overlap - k + 1):]
+        if len(rest) < k:
+            return False
+        return shingles(rest, k) <= shingles(old, k)
+
+    def _is_repeat(self, tokens, old):
+        forward, backward = containment(tokens, old, self.shingle_size)
+        return forward >= self.threshold and backward >= self.threshold and set(tokens) <= set(old)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "passed": self.passed,
+                "dropped": self.dropped,
+                "trimmed_words": self.trimmed_words
+            }
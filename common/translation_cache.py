@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Arabic-script harakat, superscript alef and Urdu marks that vary
+# between recognitions of the same speech
+_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]")
+_PUNCT = re.compile(r"[۔؟،؛.!?,;:\"'()\[\]]")
+_SPACES = re.compile(r"\s+")
+
+
+# ----------------------------------------------------
+# Key normalization
+# ----------------------------------------------------
+def normalize_urdu(text):
+    """Fold the differences that don't change meaning: form, marks, punctuation, spacing."""
+    text = unicodedata.normalize("NFKC", text)
+    text = _DIACRITICS.sub("", text)
+    text = text.replace("\u200c", "").replace("\u200d", "")  # zero-width (non-)joiners
+    text = _PUNCT.sub(" ", text)
+    return _SPACES.sub(" ", text).strip().lower()
+
+
+def cache_key(text, model, prompt_version):
+    raw = f"{model}\x1f{prompt_version}\x1f{normalize_urdu(text)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# ----------------------------------------------------
+# Translation Cache (memory LRU + SQLite)
+# ----------------------------------------------------
+class TranslationCache:
+    """
+    Two-tier cache for translations of repeated segments.
+
+    Memory tier: an LRU of `memory_size` entries, each with the time it
+    was first stored so the TTL holds there too. Disk tier: a SQLite
+    table with the same TTL and a row cap; the least recently used rows are
+    evicted when it grows past `max_rows`. Values are anything JSON
+    can hold (a string, or an [english, summary] pair).
+    """
+
+    def __init__(self, path=None, memory_size=512, ttl=7 * 24 * 3600, max_rows=50000):
+        self.path = path
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.max_rows = max_rows
+
+        self._memory = OrderedDict()   # key -> (created, value)
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path:
+            folder = os.path.dirname(os.path.abspath(path))
+            os.makedirs(folder, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    used REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_used ON cache(used)")
+            self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row and now - row[1] <= self.ttl:
+                    self._db.execute("UPDATE cache SET used = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    self.disk_hits += 1
+                    return value
+
+                if row:
+                    self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+
+            if self._db is None:
+                return
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created, used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            self._db.commit()
+
+            # Size/TTL eviction every so often, not on every write
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict(now)
+
+    def _remember(self, key, value, created):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now):
+        cur = self._db.execute("DELETE FROM cache WHERE created < ?", (now - self.ttl,))
+        self.evictions += cur.rowcount
+
+        count = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count > self.max_rows:
+            cur = self._db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY used LIMIT ?)",
+                (count - self.max_rows,)
+            )
+            self.evictions += cur.rowcount
+        self._db.commit()
+
+    def get_or_compute(self, text, compute, model, prompt_version="v1"):
+        """Cached compute(text). Empty results (API errors) are not cached."""
+        key = cache_key(text, model, prompt_version)
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = compute(text)
+        parts = value if isinstance(value, (list, tuple)) else [value]
+        if any(parts):
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "evictions": self.evictions
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Tests import the app modules the way the apps do: TranslationApp2 on
+# sys.path, and its paths.py adds the shared folders
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "TranslationApp2"))
+
+import paths  # noqa: E402,F401
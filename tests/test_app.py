@@ -0,0 +1,21 @@
+import pytest
+
+from app import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.mark.parametrize("body", [
+    {"edits": [{"seq": 1, "english": "x"}]},            # no session
+    {"session": "run1", "edits": [{"english": "x"}]},   # edit without seq
+    {"session": "run1", "edits": "not a list"},
+    {"something": "else"},
+    ["not", "an", "object"],
+])
+def test_bad_save_requests_are_400(client, body):
+    response = client.post("/save", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from backends import FallbackChain, TranslationBackend
+from segment_stream import SegmentStream
+
+
+class SlowStreamingBackend(TranslationBackend):
+    """Streams one partial, misses the chain timeout, then keeps streaming."""
+
+    name = "slow"
+    streaming = True
+
+    def __init__(self):
+        self.finished = threading.Event()
+
+    def translate(self, urdu_text, on_partial=None):
+        on_partial("early")
+        time.sleep(0.3)
+        on_partial("late")
+        self.finished.set()
+        return "slow answer", ""
+
+
+class FixedBackend(TranslationBackend):
+    name = "fixed"
+
+    def translate(self, urdu_text, on_partial=None):
+        return "fallback answer", ""
+
+
+def test_abandoned_attempt_stops_sending_partials():
+    slow = SlowStreamingBackend()
+    chain = FallbackChain([slow, FixedBackend()], timeout=0.1)
+    partials = []
+
+    english, _, backend = chain.translate("اردو", on_partial=partials.append)
+    assert (english, backend) == ("fallback answer", "fixed")
+
+    assert slow.finished.wait(2)
+    assert partials == ["early"]
+    assert chain.counts() == {"slow": {"ok": 0, "failed": 0, "timeout": 1},
+                              "fixed": {"ok": 1, "failed": 0, "timeout": 0}}
+
+
+def test_counters_are_exact_under_concurrency():
+    chain = FallbackChain([FixedBackend()], timeout=5)
+    threads = [threading.Thread(target=lambda: [chain.translate("x") for _ in range(200)])
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert chain.counts()["fixed"]["ok"] == 1600
+
+
+def test_partial_for_a_final_job_is_dropped():
+    stream = SegmentStream()
+    stream.publish_partial(1, {"english": "draft"})
+    stream.publish({"job": 1, "english": "final"})
+    stream.publish_partial(1, {"english": "stale"})
+    stream.publish_partial(2, {"english": "next"})
+
+    _, segments, partials, _ = stream.wait_updates(0, timeout=0)
+    assert [s["english"] for s in segments] == ["final"]
+    assert [p["job"] for p in partials] == [2]
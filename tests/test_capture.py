@@ -0,0 +1,121 @@
+import threading
+import time
+import wave
+
+import numpy as np
+
+from capture import CaptureManager, CaptureSource, parse_device, parse_sources
+
+
+class CallbackDevice:
+    """
+    Stands in for a PortAudio stream: a thread calls back every few ms
+    and stop() waits for the callback in progress, as stop_stream does.
+    """
+
+    def __init__(self, device, channels, sample_rate, blocksize, callback):
+        self.channels = channels
+        self.blocksize = blocksize
+        self.callback = callback
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._delivered = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        block = np.zeros(self.blocksize * self.channels, dtype=np.int16)
+        while not self._stop.is_set():
+            self.callback(block, self.blocksize, None)
+            self._delivered.set()
+            time.sleep(0.002)
+
+    def stop(self):
+        # The buffer in flight is delivered before the stream stops
+        self._delivered.clear()
+        self._delivered.wait()
+        self._stop.set()
+        self._thread.join()
+
+
+def test_reopening_a_capturing_device_with_more_channels_does_not_deadlock():
+    manager = CaptureManager(blocksize=16, device_factory=CallbackDevice)
+    first = manager.add("first", "3:0").open()
+    assert first.read(timeout=2) is not None
+
+    # Needs channel 1 too: the running 1-channel stream is replaced
+    second = manager.add("second", "3:1")
+    opener = threading.Thread(target=second.open, daemon=True)
+    opener.start()
+    opener.join(timeout=5)
+    assert not opener.is_alive()
+
+    assert second.read(timeout=2) is not None
+    assert [s["active"] for s in manager.stats()] == [True, True]
+    manager.close_all()
+
+
+def write_channels(path, *levels, seconds=0.3, rate=16000):
+    """A WAV whose channel i holds the constant int16 value levels[i]."""
+    frames = np.tile(np.array(levels, dtype=np.int16), (int(seconds * rate), 1))
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(len(levels))
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(frames.tobytes())
+    return f"file:{path}"
+
+
+def read_all(source, timeout=5):
+    blocks = []
+    deadline = time.monotonic() + timeout
+    while not source.finished and time.monotonic() < deadline:
+        block = source.read(timeout=0.1)
+        if block is not None:
+            blocks.append(block)
+    return np.concatenate(blocks)
+
+
+def test_source_specs():
+    assert parse_device("2") == (2, 0)
+    assert parse_device("2:1") == (2, 1)
+    assert parse_device("file:clip.wav") == ("file:clip.wav", 0)
+    assert parse_device("file:clip.wav:1") == ("file:clip.wav", 1)
+    assert parse_sources("studio=2, feed2=7:1,,bad") == {"studio": "2", "feed2": "7:1"}
+
+
+def test_channels_of_one_device_share_a_stream(tmp_path):
+    opened = []
+    manager = CaptureManager()
+    make_stream = manager._make_stream
+
+    def counting(device, channels):
+        opened.append(channels)
+        return make_stream(device, channels)
+
+    manager._make_stream = counting
+    spec = write_channels(tmp_path / "two.wav", 1000, -2000)
+    left = manager.add("left", spec)
+    right = manager.add("right", f"{spec}:1")
+
+    # The first open already covers every configured channel
+    left.open()
+    right.open()
+    assert opened == [2]
+
+    assert np.allclose(read_all(left), 1000 / 32768)
+    assert np.allclose(read_all(right), -2000 / 32768)
+    manager.close_all()
+    assert manager._streams == {}
+
+
+def test_a_stalled_reader_drops_the_oldest_blocks():
+    source = CaptureSource(CaptureManager(), "s", 0, 0, max_blocks=3)
+    for i in range(5):
+        source._push(np.full(4, i, dtype=np.float32))
+
+    assert source.overruns == 2
+    assert [source.read(timeout=0)[0] for _ in range(3)] == [2, 3, 4]
+    assert source.read(timeout=0) is None
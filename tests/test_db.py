@@ -0,0 +1,90 @@
+import json
+import os
+
+from db import INSERT_SEGMENT, ConnectionPool, SegmentStore, WriteBehindQueue, connect_factory, db_time
+
+
+def make_pool(tmp_path):
+    return ConnectionPool(connect_factory(f"sqlite:///{tmp_path / 'test.db'}"), max_size=2)
+
+
+def count_rows(pool, table="Translations"):
+    with pool.connection() as conn:
+        return conn.cursor().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def segment_row(seq, session="s1"):
+    return (session, seq, "2026-01-01 00:00:00", "2026-01-01 00:00:01", f"urdu {seq}", f"english {seq}", None)
+
+
+def test_batches_are_written_and_flush_waits(tmp_path):
+    pool = make_pool(tmp_path)
+    writer = WriteBehindQueue(pool, "INSERT INTO Translations (UrduText, EnglishText) VALUES (?, ?)",
+                              batch_size=10, flush_interval=5, spool_path=str(tmp_path / "db_spool.jsonl"))
+    for i in range(25):
+        writer.put((f"u{i}", f"e{i}"))
+
+    assert writer.flush(timeout=5)
+    assert count_rows(pool) == 25
+    writer.close()
+
+
+def test_duplicate_row_is_dead_lettered_and_the_rest_written(tmp_path):
+    pool = make_pool(tmp_path)
+    spool = tmp_path / "segments_spool.jsonl"
+    writer = WriteBehindQueue(pool, INSERT_SEGMENT, batch_size=10, flush_interval=5, spool_path=str(spool))
+
+    for seq in (1, 2, 2, 3):
+        writer.put(segment_row(seq))
+    assert writer.flush(timeout=5)
+
+    assert count_rows(pool, "Segments") == 3
+    assert writer.stats()["dead_lettered"] == 1
+    dead = [json.loads(line) for line in open(tmp_path / "segments_spool.dead.jsonl", encoding="utf-8")]
+    assert [entry["row"][1] for entry in dead] == [2]
+    # Nothing is left to retry forever
+    assert not os.path.exists(writer.spool_path)
+    writer.close()
+
+
+def test_spooled_rows_are_retried_after_an_outage(tmp_path):
+    pool = make_pool(tmp_path)
+    broken = ConnectionPool(connect_factory(f"sqlite:///{tmp_path / 'missing' / 'x.db'}"))
+    spool = str(tmp_path / "db_spool.jsonl")
+
+    writer = WriteBehindQueue(broken, "INSERT INTO Translations (UrduText, EnglishText) VALUES (?, ?)",
+                              batch_size=10, flush_interval=5, spool_path=spool)
+    writer.put(("u", "e"))
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert os.path.exists(writer.spool_path)
+
+    # The next process (or a restart) picks the rows up once the DB is back
+    writer = WriteBehindQueue(pool, "INSERT INTO Translations (UrduText, EnglishText) VALUES (?, ?)",
+                              batch_size=10, flush_interval=5, spool_path=spool, orphan_age=0)
+    writer.close()
+    assert count_rows(pool) == 1
+    assert not [p for p in os.listdir(tmp_path) if p.startswith("db_spool.")]
+
+
+def test_segment_edits(tmp_path):
+    pool = make_pool(tmp_path)
+    store = SegmentStore(pool, spool_path=str(tmp_path / "segments_spool.jsonl"))
+    store.add("run1", 1, "اردو", "English", started=1_700_000_000, ended=1_700_000_002)
+
+    assert store.save_edits("run1", [{"seq": 1, "english": "Edited"}, {"seq": 9, "english": "x"}]) == [9]
+    rows = store.load("run1")
+    assert rows[0]["english"] == "Edited" and rows[0]["edited"]
+    store.writer.close()
+
+
+def test_missing_times_are_stored_as_null(tmp_path):
+    pool = make_pool(tmp_path)
+    store = SegmentStore(pool, spool_path=str(tmp_path / "segments_spool.jsonl"))
+    store.add("run1", 1, "اردو", "English", started=None, ended=0)
+    store.writer.flush()
+
+    row = store.load("run1")[0]
+    assert row["started"] is None
+    assert row["ended"] == db_time(0)      # the epoch is a time, not a missing one
+    store.writer.close()
@@ -0,0 +1,25 @@
+from dedupe import NearDuplicateFilter
+
+
+def test_overlap_with_the_previous_chunk_is_trimmed():
+    f = NearDuplicateFilter()
+    assert f.filter("one two three four") == "one two three four"
+    assert f.filter("three four five six") == "five six"
+    assert f.stats()["trimmed_words"] == 2
+
+
+def test_repeats_are_dropped():
+    f = NearDuplicateFilter()
+    f.filter("the death toll has risen to twelve")
+    assert f.filter("the death toll has risen to twelve") is None
+    assert f.filter("the death toll has risen") is None            # re-heard part
+    assert f.filter("the death toll toll has risen to twelve") is None  # stutter, no new word
+    assert f.stats()["dropped"] == 3
+
+
+def test_number_updates_are_kept():
+    f = NearDuplicateFilter()
+    assert f.filter("the death toll has risen to twelve") is not None
+    assert f.filter("the death toll has risen to fifteen") == "the death toll has risen to fifteen"
+    assert f.filter("the death toll has risen to twenty") == "the death toll has risen to twenty"
+    assert f.stats()["dropped"] == 0
@@ -0,0 +1,187 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from gpt_backend import AsyncGPTTranslator, parse_batch_reply
+
+
+class StubOpenAI:
+    """
+    A chat completions endpoint on localhost for AsyncGPTTranslator(base_url=...).
+
+    Answers "English: EN <word>" for single prompts and a JSON batch for
+    coalesced ones, leaving out the ids in `drop_ids`. `failures` is a
+    list of (status, headers) sent, one per request, before any answer;
+    `delays` likewise holds per-request delays before falling back to
+    `delay`. `max_active` is the most requests it ever held at once.
+    """
+
+    def __init__(self, failures=(), delay=0.0, delays=(), drop_ids=()):
+        self.failures = list(failures)
+        self.delay = delay
+        self.delays = list(delays)
+        self.drop_ids = set(drop_ids)
+        self.requests = []      # (time, "single" | "batch", words)
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, headers, reply = stub.handle(body)
+                data = json.dumps(reply).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def handle(self, body):
+        prompt = body["messages"][0]["content"]
+        batch = "response_format" in body
+        words = re.findall(r"seg-\w+", prompt)
+        with self._lock:
+            self.requests.append((time.monotonic(), "batch" if batch else "single", words))
+            failure = self.failures.pop(0) if self.failures else None
+            delay = self.delays.pop(0) if self.delays else self.delay
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(delay)
+        with self._lock:
+            self.active -= 1
+
+        if failure is not None:
+            status, headers = failure
+            return status, headers, {"error": {"message": "stub failure", "type": "stub"}}
+
+        if batch:
+            segments = [{"id": i, "english": f"EN {w}", "summary": "S"}
+                        for i, w in enumerate(words, 1) if i not in self.drop_ids]
+            content = json.dumps({"segments": segments})
+        else:
+            content = f"English: EN {words[0]}\nSummary: S"
+        return 200, {}, {
+            "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}]
+        }
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_factory():
+    created = []
+
+    def make(**kwargs):
+        stub = StubOpenAI(**kwargs)
+        created.append(stub)
+        return stub
+
+    yield make
+    for stub in created:
+        stub.close()
+
+
+def translator(stub, **options):
+    options = dict({"api_key": "test", "base_url": stub.base_url, "timeout": 5}, **options)
+    return AsyncGPTTranslator(**options)
+
+
+def test_retry_honours_retry_after(stub_factory):
+    stub = stub_factory(failures=[(429, {"Retry-After": "0.3"})])
+    gpt = translator(stub, backoff=10)
+
+    started = time.monotonic()
+    assert gpt.translate("seg-a") == ("EN seg-a", "S")
+    # Retry-After (0.3 s) was used, not the 10 s backoff
+    assert 0.3 <= time.monotonic() - started < 3
+    assert len(stub.requests) == 2 and gpt.retries == 1
+    gpt.close()
+
+
+def test_retries_stop_at_the_budget(stub_factory):
+    stub = stub_factory(failures=[(503, {})] * 50)
+    gpt = translator(stub, backoff=0.1, max_retries=50, budget=1.0)
+
+    started = time.monotonic()
+    assert gpt.translate("seg-a") == ("", "")
+    assert time.monotonic() - started < 1.5
+    gpt.close()
+
+
+def test_lone_segment_is_sent_without_waiting(stub_factory):
+    stub = stub_factory()
+    gpt = translator(stub, coalesce_window=2.0)
+
+    started = time.monotonic()
+    assert gpt.translate("seg-a") == ("EN seg-a", "S")
+    assert time.monotonic() - started < 1
+    assert [kind for _, kind, _ in stub.requests] == ["single"]
+    gpt.close()
+
+
+def test_dropped_ids_are_sent_again_on_their_own(stub_factory):
+    # One slot held by the first segment, so the next three are coalesced
+    stub = stub_factory(delay=0.3, drop_ids={2})
+    gpt = translator(stub, concurrency=1, coalesce_window=0.1)
+
+    futures = [gpt.submit(f"seg-{name}") for name in ("a", "b", "c", "d")]
+    assert [f.result(timeout=10) for f in futures] == [(f"EN seg-{n}", "S") for n in "abcd"]
+
+    assert [(kind, words) for _, kind, words in stub.requests] == [
+        ("single", ["seg-a"]),
+        ("batch", ["seg-b", "seg-c", "seg-d"]),
+        ("single", ["seg-c"]),
+    ]
+    assert gpt.coalesced == 3
+    gpt.close()
+
+
+def test_timed_out_attempt_is_retried(stub_factory):
+    stub = stub_factory(delays=[0.8])
+    gpt = translator(stub, timeout=0.3, backoff=0.05)
+
+    assert gpt.translate("seg-a") == ("EN seg-a", "S")
+    assert len(stub.requests) == 2 and gpt.retries == 1
+    gpt.close()
+
+
+def test_in_flight_requests_are_capped(stub_factory):
+    stub = stub_factory(delay=0.2)
+    gpt = translator(stub, concurrency=2, coalesce_window=0.05, max_batch=2)
+
+    futures = [gpt.submit(f"seg-{n}") for n in "abcdefgh"]
+    assert [f.result(timeout=10) for f in futures] == [(f"EN seg-{n}", "S") for n in "abcdefgh"]
+    assert stub.max_active <= 2
+    gpt.close()
+
+
+def test_batch_reply_keeps_known_ids_only():
+    reply = json.dumps({"segments": [
+        {"id": 1, "english": " one ", "summary": "s1"},
+        {"id": "2", "english": "two"},
+        {"id": 7, "english": "out of range"},
+        {"id": None, "english": "no id"},
+    ]})
+    assert parse_batch_reply(reply, 3) == {1: ("one", "s1"), 2: ("two", "")}
+    assert parse_batch_reply("not json", 3) == {}
+    assert parse_batch_reply("[1, 2]", 3) == {}
@@ -0,0 +1,61 @@
+import os
+import stat
+from multiprocessing.managers import RemoteError
+
+import pytest
+
+import ipc
+from ipc import EngineClient, EngineUnavailable, create_authkey, read_authkey
+
+
+def test_engine_creates_a_private_key_file_once(tmp_path, monkeypatch):
+    monkeypatch.delenv("ENGINE_AUTHKEY", raising=False)
+    path = str(tmp_path / ".engine_authkey")
+
+    assert read_authkey(path) is None
+    key = create_authkey(path)
+    assert len(key) == 64
+    assert create_authkey(path) == key
+    if os.name == "posix":
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_client_without_a_key_is_unavailable(tmp_path, monkeypatch):
+    monkeypatch.delenv("ENGINE_AUTHKEY", raising=False)
+    monkeypatch.setattr(ipc, "AUTHKEY_FILE", str(tmp_path / "missing"))
+    with pytest.raises(EngineUnavailable):
+        EngineClient("127.0.0.1:1").call("health")
+
+
+class FlakyProxy:
+    """Fails the first call with RemoteError, like a restarted engine."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def _callmethod(self, method, args, kwargs):
+        self.calls.append(method)
+        if len(self.calls) == 1:
+            raise RemoteError("unknown proxy")
+        return "ok"
+
+
+def flaky_client(monkeypatch):
+    calls = []
+    client = EngineClient("127.0.0.1:1")
+    monkeypatch.setattr(client, "_connect", lambda: FlakyProxy(calls))
+    monkeypatch.setattr(client, "_reset", lambda proxy: None)
+    return client, calls
+
+
+def test_read_only_calls_are_retried(monkeypatch):
+    client, calls = flaky_client(monkeypatch)
+    assert client.call("latest", "default") == "ok"
+    assert calls == ["latest", "latest"]
+
+
+def test_other_calls_are_not_retried(monkeypatch):
+    client, calls = flaky_client(monkeypatch)
+    with pytest.raises(EngineUnavailable):
+        client.call("start", "default")
+    assert calls == ["start"]
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import model_registry
+
+
+def test_every_app_defaults_to_the_bundled_model(monkeypatch):
+    monkeypatch.delenv("WHISPER_MODEL_PATH", raising=False)
+    monkeypatch.delitem(sys.modules, "translator", raising=False)
+    import asr
+    import translator
+
+    assert os.path.isfile(os.path.join(model_registry.BUNDLED_MODEL, "model.bin"))
+    # Same path, so the same registry key: one model per process
+    key = model_registry._key(translator.MODEL_PATH, "cpu", "int8")
+    assert key == model_registry._key(asr.BUNDLED_MODEL, "cpu", "int8")
@@ -0,0 +1,131 @@
+import threading
+import time
+import wave
+
+import numpy as np
+
+from capture import SAMPLE_RATE, CaptureManager
+from pipeline import FairPool
+from session import TranslationSession
+
+
+def write_bursts(path, count, seed=0):
+    """A WAV of `count` tone bursts between short silences; burst k peaks at level(k)."""
+    rng = np.random.default_rng(seed)
+    parts = [rng.normal(0, 0.001, int(0.6 * SAMPLE_RATE))]
+    t = np.arange(int(0.5 * SAMPLE_RATE)) / SAMPLE_RATE
+    for k in range(count):
+        parts.append(level(k) * np.sin(2 * np.pi * 400 * t))
+        parts.append(rng.normal(0, 0.001, int(0.9 * SAMPLE_RATE)))
+    pcm = (np.concatenate(parts) * 32767).astype(np.int16)
+
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(pcm.tobytes())
+    return f"file:{path}"
+
+
+def level(k):
+    return 0.1 + 0.02 * k
+
+
+def recognizer(name):
+    """Stub ASR: reads the burst number back from the audio level."""
+    def recognize(audio):
+        samples = np.frombuffer(audio.get_raw_data(), dtype=np.int16) / 32767
+        k = round((np.abs(samples).max() - 0.1) / 0.02)
+        return f"{name} chunk {k}."
+    return recognize
+
+
+def burst_numbers(session):
+    return [int(s["urdu"].split()[-1].rstrip("۔.")) for s in session.stream.since(0)]
+
+
+def wait_for(condition, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def make_session(name, capture, spec, translate, **options):
+    options = dict({"silence_flush": 0.2, "translate_queue_size": 2}, **options)
+    return TranslationSession(name, None, recognizer(name), translate, source=capture.add(name, spec), **options)
+
+
+def test_two_file_sources_keep_order_and_share_workers_round_robin(tmp_path):
+    capture = CaptureManager(file_speed=0)      # both files arrive at once: a flood
+    asr_pool = FairPool("asr", workers=1, maxsize=2).start()
+    translate_pool = FairPool("translate", workers=1, maxsize=2).start()
+
+    calls = []
+
+    def translate(urdu, on_partial=None):
+        calls.append(urdu.split()[0])
+        time.sleep(0.01)
+        return urdu.upper(), ""
+
+    busy = make_session("busy", capture, write_bursts(tmp_path / "busy.wav", 12), translate,
+                        asr_pool=asr_pool, translate_pool=translate_pool)
+    quiet = make_session("quiet", capture, write_bursts(tmp_path / "quiet.wav", 3, seed=1), translate,
+                         asr_pool=asr_pool, translate_pool=translate_pool)
+    busy.start()
+    quiet.start()
+    try:
+        assert wait_for(lambda: busy.stream.last_seq == 12 and quiet.stream.last_seq == 3)
+
+        # Every source in its own spoken order
+        assert burst_numbers(busy) == list(range(12))
+        assert burst_numbers(quiet) == list(range(3))
+        # Spoken times come from the capture, before publishing
+        assert all(s["started"] < s["ended"] <= s["time"] for s in busy.stream.since(0))
+
+        # The quiet source is served between the busy one's items, not after them
+        quiet_turns = [i for i, name in enumerate(calls) if name == "quiet"]
+        assert max(quiet_turns) < 8
+    finally:
+        busy.stop()
+        quiet.stop()
+        asr_pool.stop()
+        translate_pool.stop()
+
+
+def test_a_stuck_translation_does_not_starve_other_sources_asr(tmp_path):
+    """One shared ASR worker; "stuck" has its own translate stage that stops answering."""
+    capture = CaptureManager(file_speed=0)
+    asr_pool = FairPool("asr", workers=1, maxsize=2).start()
+    release = threading.Event()
+
+    def stuck_translate(urdu, on_partial=None):
+        release.wait()
+        return urdu, ""
+
+    def translate(urdu, on_partial=None):
+        return urdu, ""
+
+    stuck = make_session("stuck", capture, write_bursts(tmp_path / "stuck.wav", 8), stuck_translate,
+                         asr_pool=asr_pool, translate_workers=1, translate_queue_size=1)
+    other = make_session("other", capture, write_bursts(tmp_path / "other.wav", 4, seed=1), translate,
+                         asr_pool=asr_pool)
+    stuck.start()
+    other.start()
+    try:
+        # Before: the ASR worker blocked on stuck's full translate queue
+        assert wait_for(lambda: other.stream.last_seq == 4)
+        assert burst_numbers(other) == list(range(4))
+        assert stuck.stream.last_seq == 0
+
+        release.set()
+        assert wait_for(lambda: stuck.stream.last_seq == 8)
+        assert burst_numbers(stuck) == list(range(8))
+        assert stuck.stats()["deferred_translations"] > 0
+    finally:
+        release.set()
+        stuck.stop()
+        other.stop()
+        asr_pool.stop()
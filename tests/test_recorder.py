@@ -0,0 +1,79 @@
+import numpy as np
+
+from recorder import StreamingRecorder
+
+
+class ManualStream:
+    """InputStream stand-in: the test pushes blocks itself."""
+
+    def __init__(self, callback, blocksize, **kwargs):
+        self.callback = callback
+        self.blocksize = blocksize
+        self.frames = 0
+
+    def push(self, blocks=1):
+        for _ in range(blocks):
+            block = np.arange(self.frames, self.frames + self.blocksize, dtype=np.float32)
+            self.callback(block, self.blocksize, None, None)
+            self.frames += self.blocksize
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_recorder(n_windows=3):
+    streams = []
+
+    def factory(**kwargs):
+        streams.append(ManualStream(**kwargs))
+        return streams[-1]
+
+    recorder = StreamingRecorder(window_seconds=0.1, fs=100, n_windows=n_windows, blocksize=10,
+                                 stream_factory=factory).start()
+    return recorder, streams[0]
+
+
+def test_windows_are_copies_by_default():
+    recorder, stream = make_recorder()
+    windows = recorder.windows(timeout=0)
+
+    stream.push(1)
+    first = next(windows)
+    stream.push(5)              # the ring wraps over the first window's slot
+    assert first.tolist() == list(range(10))
+    assert recorder.torn == 0
+    recorder.stop()
+
+
+def test_an_overwritten_view_is_counted():
+    recorder, stream = make_recorder()
+    windows = recorder.windows(timeout=0, copy=False)
+
+    stream.push(1)
+    view = next(windows)
+    assert not view.flags.writeable
+    stream.push(3)              # more than a ring's worth past the view's start
+    assert view.tolist() != list(range(10))
+
+    next(windows)
+    assert recorder.torn == 1
+    recorder.stop()
+
+
+def test_read_returns_everything_ready_across_the_wrap():
+    recorder, stream = make_recorder()
+
+    stream.push(2)
+    assert recorder.read(min_frames=10, timeout=0).tolist() == list(range(20))
+    # A slow consumer: two windows arrive (wrapping the ring) before it reads again
+    stream.push(2)
+    assert recorder.read(min_frames=10, timeout=0).tolist() == list(range(20, 40))
+    assert recorder.read(min_frames=10, timeout=0) is None
+    assert recorder.overruns == 0
+    recorder.stop()
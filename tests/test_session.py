@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+import speech_recognition as sr
+
+from metrics import MetricsRegistry
+from session import SessionManager, TranslationSession
+from tracing import Tracer
+
+
+class SlowSource:
+    """A capture source whose read() can hold the capture thread past stop()."""
+
+    channel = 0
+    sample_rate = 16000
+    finished = False
+
+    def __init__(self, device="fake"):
+        self.device = device
+        self.hold = threading.Event()
+        self.hold.set()
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def read(self, timeout=0.5):
+        self.hold.wait()
+        time.sleep(0.01)
+        return None
+
+
+def make_session(name, device_index=None, source=None, **options):
+    return TranslationSession(name, device_index, lambda audio: "", lambda text, on_partial=None: ("", ""),
+                              source=source or SlowSource(name), asr_workers=1, translate_workers=1, **options)
+
+
+def test_each_run_has_its_own_stop_event():
+    session = make_session("s1")
+    assert session.start()
+    first_stop = session._stop
+    session.stop(timeout=2)
+
+    assert session.start()
+    assert session._stop is not first_stop
+    assert first_stop.is_set() and session.running
+    session.stop(timeout=2)
+
+
+def test_start_refuses_while_the_old_capture_thread_is_alive():
+    source = SlowSource()
+    session = make_session("s1", source=source)
+    session.start()
+
+    source.hold.clear()             # capture thread stuck in read()
+    time.sleep(0.05)
+    assert session.stop(timeout=0.1) == ["s1-capture"]
+    with pytest.raises(RuntimeError):
+        session.start(join_timeout=0.1)
+
+    source.hold.set()
+    assert session.start()
+    session.stop(timeout=2)
+
+
+def test_lookups_never_create_sessions():
+    manager = SessionManager(make_session)
+    assert manager.get("nope") is None
+    assert manager.sessions() == []
+
+    session, started = manager.start("s1")
+    assert started and manager.get("s1") is session
+    manager.stop("s1", timeout=2)
+
+
+def test_stopped_idle_sessions_are_evicted():
+    manager = SessionManager(make_session, idle_timeout=0.1)
+    manager.start("running")
+    manager.start("stopped")
+    manager.stop("stopped", timeout=2)
+
+    time.sleep(0.15)
+    assert manager.get("stopped") is None
+    assert manager.get("running") is not None
+    manager.stop_all(timeout=2)
+
+
+def test_speech_times_are_taken_before_waiting_for_translation():
+    session = make_session("s1", tracer=Tracer(MetricsRegistry()), translate_queue_size=1)
+    session.start()
+    submitted = []
+    session.asr_stage.put = lambda seq, item: submitted.append(item)
+
+    # Translation is behind: the outbox is full, so the chunk waits
+    session._outbox.append("stuck job")
+    one_second = sr.AudioData(b"\0\0" * 16000, 16000, 2)
+    ended = time.time()
+    waiting = threading.Thread(target=session._submit_audio, args=(one_second,))
+    waiting.start()
+    time.sleep(0.3)
+    with session._outbox_cond:
+        session._outbox.clear()
+        session._outbox_cond.notify_all()
+    waiting.join(2)
+
+    _, trace, spoken = submitted[0]
+    assert spoken[1] - ended < 0.1 and spoken[1] - spoken[0] == pytest.approx(1.0)
+    assert trace["speech_end"] == spoken[1]
+    assert trace["asr_enqueue"] - trace["speech_end"] >= 0.3
+    session.stop(timeout=2)
@@ -0,0 +1,41 @@
+from transcript import TranscriptStore
+
+
+def segment(seq, urdu, english):
+    return {"seq": seq, "time": 1000.0 + seq, "urdu": urdu, "english": english}
+
+
+def test_search_counts_every_match_and_pages_newest_first():
+    store = TranscriptStore()
+    for seq in range(1, 8):
+        english = "flood warning" if seq % 2 else "weather"
+        store.append(segment(seq, "سیلاب", english))
+
+    first = store.search("flood", limit=2)
+    assert [s["seq"] for s in first["segments"]] == [7, 5]
+    assert first["matches"] == 4
+
+    second = store.search("flood", limit=2, before=first["next"])
+    assert [s["seq"] for s in second["segments"]] == [3, 1]
+    assert second["matches"] == 4 and second["next"] is None
+
+    both = store.search("flood سیلاب", limit=10)
+    assert both["matches"] == 4 and both["next"] is None
+    store.close()
+
+
+def test_index_counts_against_the_memory_limit(tmp_path):
+    store = TranscriptStore(memory_limit=128 * 1024, spill_dir=tmp_path)
+    records = 0
+    for seq in range(1, 201):
+        # Every segment brings new words, so the index outgrows the records
+        store.append(segment(seq, "", " ".join(f"w{seq}x{i}" for i in range(20))))
+        records += store._hot[-1].size()
+
+    stats = store.stats()
+    assert records < store.memory_limit < stats["index_bytes"]
+    assert stats["memory_bytes"] == stats["index_bytes"] + sum(r.size() for r in store._hot)
+    assert stats["spilled"] > 0
+    # Spilled records are still found through the index
+    assert [s["seq"] for s in store.search("w1x3")["segments"]] == [1]
+    store.close()
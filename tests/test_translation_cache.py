@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+import translation_cache
+from translation_cache import TranslationCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_memory_entries_expire_with_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(translation_cache, "time", SimpleNamespace(time=clock))
+    cache = TranslationCache(ttl=60)
+
+    cache.put("k", ["hello", ""])
+    clock.now += 59
+    assert cache.get("k") == ["hello", ""]
+
+    # Lookups don't extend the entry's life
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats()["memory_entries"] == 0
+
+
+def test_disk_hits_keep_their_original_insert_time(monkeypatch, tmp_path):
+    clock = Clock()
+    monkeypatch.setattr(translation_cache, "time", SimpleNamespace(time=clock))
+    cache = TranslationCache(path=str(tmp_path / "cache.db"), memory_size=1, ttl=60)
+
+    cache.put("old", "first")
+    clock.now += 50
+    cache.put("new", "second")          # pushes "old" out of memory
+    assert cache.get("old") == "first"  # back into memory from disk
+
+    clock.now += 20
+    assert cache.get("old") is None
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()